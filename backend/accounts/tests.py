@@ -1,3 +1,39 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+
+class AccountsQueryCountTests(TestCase):
+    """
+    Auth endpoints run on every login; keep their query counts fixed.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', email='staff@example.com', password='pass', is_staff=True)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_register(self):
+        # Registration sits behind the default IsAuthenticated permission
+        self.client.force_authenticate(self.staff)
+        payload = {'username': 'new-user', 'email': 'new@example.com', 'password': 'secret-pass'}
+        # username uniqueness check + insert
+        with self.assertNumQueries(2):
+            response = self.client.post('/accounts/register/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_login(self):
+        # user lookup only; SIMPLE_JWT does not update last_login
+        with self.assertNumQueries(1):
+            response = self.client.post('/accounts/login/', {'username': 'staff', 'password': 'pass'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data)
+
+    def test_token_refresh(self):
+        response = self.client.post('/accounts/login/', {'username': 'staff', 'password': 'pass'}, format='json')
+        # simplejwt checks the user still exists and is active
+        with self.assertNumQueries(1):
+            response = self.client.post('/accounts/token/refresh/', {'refresh': response.data['refresh']}, format='json')
+        self.assertEqual(response.status_code, 200)
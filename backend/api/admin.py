@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Car, CarImage, HeroSection, BlogPost, Customer, Invoice, Extra
+from .invoicing import generate_invoices_for_bookings
+from .models import Amenity, Car, CarImage, HeroSection, BlogPost, Customer, Invoice, Extra
 
 class CarImageInline(admin.TabularInline):
     model = CarImage
@@ -8,6 +9,11 @@ class CarImageInline(admin.TabularInline):
 @admin.register(Car)
 class CarAdmin(admin.ModelAdmin):
     inlines = [CarImageInline]
+    filter_horizontal = ('amenities',)
+
+@admin.register(Amenity)
+class AmenityAdmin(admin.ModelAdmin):
+    search_fields = ('name',)
 
 @admin.register(CarImage)
 class CarImageAdmin(admin.ModelAdmin):
@@ -46,3 +52,9 @@ class BookingAdmin(admin.ModelAdmin):
     list_filter = ('status', 'rental_start')
     search_fields = ('reference_code',)
     inlines = [BookingCustomerInfoInline]
+
+    def save_related(self, request, form, formsets, change):
+        # Customer info is saved with the inlines, so invoice once they are in
+        super().save_related(request, form, formsets, change)
+        if form.instance.status == 'approved':
+            generate_invoices_for_bookings([form.instance.pk])
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "backend.api"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,48 @@
+from django.db import transaction
+
+
+BATCH_LIMIT = 1000
+
+
+def apply_status_update(queryset, lookup, keys, new_status, **extra):
+    """
+    Set `status` on every row whose `lookup` field is in `keys` with a single
+    UPDATE ... WHERE id IN (...), inside one transaction.
+
+    Returns (results, changed_ids) where results has one entry per key:
+    'updated', 'unchanged' (already in that status) or 'not_found'.
+    """
+    with transaction.atomic():
+        current = {
+            key: (pk, row_status)
+            for key, pk, row_status in queryset.select_for_update()
+            .filter(**{f'{lookup}__in': keys})
+            .values_list(lookup, 'id', 'status')
+        }
+        changed_ids = [pk for pk, row_status in current.values() if row_status != new_status]
+        if changed_ids:
+            queryset.filter(id__in=changed_ids).update(status=new_status, **extra)
+
+    results = []
+    for key in keys:
+        if key not in current:
+            outcome = 'not_found'
+        elif current[key][1] == new_status:
+            outcome = 'unchanged'
+        else:
+            outcome = 'updated'
+        results.append({lookup: key, 'result': outcome})
+    return results, changed_ids
+
+
+def apply_delete(queryset, lookup, keys):
+    """
+    Delete every row whose `lookup` field is in `keys`, in one transaction.
+    """
+    with transaction.atomic():
+        found = set(
+            queryset.select_for_update().filter(**{f'{lookup}__in': keys}).values_list(lookup, flat=True)
+        )
+        queryset.filter(**{f'{lookup}__in': found}).delete()
+
+    return [{lookup: key, 'result': 'deleted' if key in found else 'not_found'} for key in keys]
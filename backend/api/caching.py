@@ -0,0 +1,99 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .models import BlogPost, Car, CarImage, HeroSection
+from .routers import use_primary
+
+
+HOME_CACHE_KEY = 'api:home'
+HOME_FEATURED_BLOGS = 6
+HOME_SHOWCASE_CARS = 8
+
+HERO_VERSION_KEY = 'api:hero:version'
+HERO_SINGLETON_PK = 1
+
+# (version, instance) pair; replaced atomically, never mutated in place
+_hero_memo = (None, None)
+
+
+def get_hero_section():
+    """
+    Return the HeroSection singleton from a process-local memo.
+
+    The memo is stamped with a version held in the shared cache and bumped on
+    every save, so steady-state reads cost one cache lookup and no queries.
+    The stamp expires after HERO_VERSION_TTL seconds, which bounds how long a
+    worker can serve a stale hero if an invalidation never reaches it.
+    When no row exists yet an unsaved default is returned (reads never write).
+    """
+    global _hero_memo
+
+    version = cache.get(HERO_VERSION_KEY)
+    if version is not None and _hero_memo[0] == version:
+        return _hero_memo[1]
+
+    if version is None:
+        # Stamp before reading so a concurrent save always supersedes us
+        cache.add(HERO_VERSION_KEY, uuid.uuid4().hex, settings.HERO_VERSION_TTL)
+        version = cache.get(HERO_VERSION_KEY)
+
+    # Read the primary: a lagging replica would pin stale content to this version
+    with use_primary():
+        hero = HeroSection.objects.order_by('pk').first() or HeroSection(pk=HERO_SINGLETON_PK)
+    _hero_memo = (version, hero)
+    return hero
+
+
+def invalidate_hero_section():
+    cache.set(HERO_VERSION_KEY, uuid.uuid4().hex, settings.HERO_VERSION_TTL)
+
+
+def build_home_document():
+    """
+    Compose the home page payload: hero, featured blogs and a car showcase.
+    """
+    # Imported here because serializers imports this module
+    from .serializers import BlogPostListSerializer, CarListSerializer, HeroSectionSerializer
+
+    hero = get_hero_section()
+
+    blogs = (
+        BlogPost.objects.filter(is_featured=True)
+        .order_by('-created_at')
+        .only(*BlogPostListSerializer.Meta.fields)[:HOME_FEATURED_BLOGS]
+    )
+
+    # Only the primary image is needed for a car card
+    primary_images = Prefetch('images', queryset=CarImage.objects.filter(is_primary=True))
+    cars = (
+        Car.objects.filter(status='available')
+        .order_by('-created_at')
+        .only(*[name for name in CarListSerializer.Meta.fields if name != 'images'])
+        .prefetch_related(primary_images)[:HOME_SHOWCASE_CARS]
+    )
+
+    return {
+        'hero': HeroSectionSerializer(hero).data,
+        'featured_blogs': BlogPostListSerializer(blogs, many=True).data,
+        'cars': CarListSerializer(cars, many=True).data,
+    }
+
+
+def get_home_document():
+    """
+    Return the cached home document, rebuilding it on a miss.
+    """
+    document = cache.get(HOME_CACHE_KEY)
+    if document is None:
+        # Built from the primary so replication lag is never cached
+        with use_primary():
+            document = build_home_document()
+        cache.set(HOME_CACHE_KEY, document, settings.HOME_CACHE_TIMEOUT)
+    return document
+
+
+def invalidate_home_document():
+    cache.delete(HOME_CACHE_KEY)
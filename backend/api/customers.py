@@ -0,0 +1,180 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, Min, Value, When
+
+from .models import BookingCustomerInfo, Customer, Invoice
+from .utils import normalize_email, normalize_phone
+
+
+DEDUPE_CHUNK_SIZE = 1000
+
+
+def find_customer(email_key, phone_key):
+    """
+    Indexed lookup of an existing customer: email first, then phone.
+    """
+    if email_key:
+        customer = Customer.objects.filter(email_key=email_key).order_by('pk').first()
+        if customer:
+            return customer
+    if phone_key:
+        return Customer.objects.filter(phone_key=phone_key).order_by('pk').first()
+    return None
+
+
+def upsert_customer(full_name, email, phone_number):
+    """
+    Return the Customer for a booking's contact details, creating one for
+    first-time guests so repeat bookings accumulate on a single record.
+    """
+    email_key, phone_key = normalize_email(email), normalize_phone(phone_number)
+    customer = find_customer(email_key, phone_key)
+    if customer is not None:
+        if not customer.phone_number and phone_number:
+            customer.phone_number = phone_number
+            customer.save(update_fields=['phone_number', 'email_key', 'phone_key'])
+        return customer
+
+    try:
+        with transaction.atomic():
+            return Customer.objects.create(name=full_name, email=email, phone_number=phone_number)
+    except IntegrityError:
+        # Created concurrently by another booking for the same email
+        return find_customer(email_key, phone_key)
+
+
+def keyset_batches(queryset, chunk_size):
+    """
+    Yield lists of model instances in primary-key order, chunk by chunk.
+    """
+    last_pk = None
+    queryset = queryset.order_by('pk')
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(batch[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1].pk
+
+
+def backfill_keys(model, chunk_size=DEDUPE_CHUNK_SIZE):
+    """
+    Fill email_key/phone_key on rows saved before the keys existed.
+    Returns the number of rows updated. Also run by migration 0013, so it
+    only uses fields (no model methods) and works on historical models.
+    """
+    updated = 0
+    queryset = model.objects.only('pk', 'email', 'phone_number', 'email_key', 'phone_key')
+    for batch in keyset_batches(queryset, chunk_size):
+        changed = []
+        for row in batch:
+            keys = (normalize_email(row.email), normalize_phone(row.phone_number))
+            if (row.email_key, row.phone_key) != keys:
+                row.email_key, row.phone_key = keys
+                changed.append(row)
+        if changed:
+            model.objects.bulk_update(changed, ['email_key', 'phone_key'])
+            updated += len(changed)
+    return updated
+
+
+def merge_duplicate_customers(key_field='email_key', chunk_size=DEDUPE_CHUNK_SIZE):
+    """
+    Merge customers sharing the same key into the oldest record.
+    Invoices and booking links are repointed with one UPDATE per table per
+    chunk, blank contact fields are filled from the merged rows, and the
+    duplicates are deleted. Returns the number of customers removed.
+    """
+    duplicates = (
+        Customer.objects.exclude(**{key_field: ''})
+        .values(key_field)
+        .annotate(rows=Count('id'), survivor=Min('id'))
+        .filter(rows__gt=1)
+        .order_by(key_field)
+    )
+    keys = [row[key_field] for row in duplicates]
+
+    removed = 0
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        groups = {}
+        for customer in Customer.objects.filter(**{f'{key_field}__in': chunk}).order_by('pk'):
+            groups.setdefault(getattr(customer, key_field), []).append(customer)
+
+        survivor_of = {}
+        survivors = []
+        for customers in groups.values():
+            survivor, losers = customers[0], customers[1:]
+            for loser in losers:
+                survivor_of[loser.pk] = survivor.pk
+                survivor.phone_number = survivor.phone_number or loser.phone_number
+                survivor.address = survivor.address or loser.address
+            survivor.refresh_keys()
+            survivors.append(survivor)
+        if not survivor_of:
+            continue
+
+        repoint = Case(*[When(customer_id=old, then=Value(new)) for old, new in survivor_of.items()])
+        with transaction.atomic():
+            Invoice.objects.filter(customer_id__in=survivor_of).update(customer_id=repoint)
+            BookingCustomerInfo.objects.filter(customer_id__in=survivor_of).update(customer_id=repoint)
+            Customer.objects.filter(pk__in=survivor_of).delete()
+            Customer.objects.bulk_update(survivors, ['phone_number', 'address', 'phone_key'])
+        removed += len(survivor_of)
+    return removed
+
+
+def link_guest_bookings(chunk_size=DEDUPE_CHUNK_SIZE):
+    """
+    Link BookingCustomerInfo rows without a customer to a Customer, matching
+    on email key then phone key and creating customers for new guests.
+    Each chunk costs a fixed handful of queries. Returns the number linked.
+    """
+    linked = 0
+    unlinked = BookingCustomerInfo.objects.filter(customer__isnull=True).only(
+        'pk', 'full_name', 'email', 'phone_number', 'email_key', 'phone_key', 'customer',
+    )
+    for batch in keyset_batches(unlinked, chunk_size):
+        for info in batch:
+            info.refresh_keys()
+
+        by_email = _customers_by('email_key', {info.email_key for info in batch if info.email_key})
+        by_phone = _customers_by('phone_key', {
+            info.phone_key for info in batch if info.phone_key and info.email_key not in by_email
+        })
+
+        new_guests = {}
+        for info in batch:
+            customer = by_email.get(info.email_key) or by_phone.get(info.phone_key)
+            if customer is None and info.email_key:
+                new_guests.setdefault(info.email_key, info)
+            info.customer = customer
+
+        if new_guests:
+            created = []
+            for info in new_guests.values():
+                customer = Customer(name=info.full_name, email=info.email, phone_number=info.phone_number)
+                customer.refresh_keys()
+                created.append(customer)
+            Customer.objects.bulk_create(created)
+            # Re-read by key: MySQL does not return ids from bulk inserts
+            by_email.update(_customers_by('email_key', set(new_guests)))
+            for info in batch:
+                if info.customer is None:
+                    info.customer = by_email.get(info.email_key)
+
+        with transaction.atomic():
+            BookingCustomerInfo.objects.bulk_update(batch, ['customer', 'email_key', 'phone_key'])
+        linked += sum(1 for info in batch if info.customer is not None)
+    return linked
+
+
+def _customers_by(key_field, keys):
+    """
+    {key: oldest Customer} for the given keys, in one query.
+    """
+    customers = {}
+    if keys:
+        for customer in Customer.objects.filter(**{f'{key_field}__in': keys}).order_by('-pk'):
+            customers[getattr(customer, key_field)] = customer
+    return customers
@@ -0,0 +1,105 @@
+import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .models import Booking, Invoice
+
+
+def parse_date_param(params, name):
+    """
+    Read an optional YYYY-MM-DD query parameter.
+    """
+    raw = params.get(name)
+    if not raw:
+        return None
+    try:
+        value = parse_date(raw)
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValidationError({name: ['Enter a valid date (YYYY-MM-DD).']})
+    return value
+
+
+def start_of_day(value):
+    """
+    Aware datetime for midnight of `value`, so date bounds on DateTimeFields
+    stay sargable (no DATE() around the indexed column).
+    """
+    return timezone.make_aware(datetime.datetime.combine(value, datetime.time.min))
+
+
+def parse_int_param(params, name):
+    raw = params.get(name)
+    if not raw:
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValidationError({name: ['A valid integer is required.']})
+
+
+def parse_choice_param(params, name, choices):
+    raw = params.get(name)
+    if not raw:
+        return None
+    allowed = [value for value, _ in choices]
+    if raw not in allowed:
+        raise ValidationError({name: [f'Must be one of: {", ".join(allowed)}.']})
+    return raw
+
+
+def filter_bookings(queryset, params):
+    """
+    Staff booking table filters:
+    ?status=approved&car=3&rental_start_after=2025-01-01&rental_start_before=2025-01-31
+    Date bounds are inclusive.
+    """
+    booking_status = parse_choice_param(params, 'status', Booking.STATUS_CHOICES)
+    if booking_status:
+        queryset = queryset.filter(status=booking_status)
+
+    car_id = parse_int_param(params, 'car')
+    if car_id is not None:
+        queryset = queryset.filter(car_id=car_id)
+
+    start_after = parse_date_param(params, 'rental_start_after')
+    if start_after:
+        queryset = queryset.filter(rental_start__gte=start_after)
+
+    start_before = parse_date_param(params, 'rental_start_before')
+    if start_before:
+        queryset = queryset.filter(rental_start__lte=start_before)
+
+    return queryset
+
+
+def filter_invoices(queryset, params):
+    """
+    Invoice list/export filters:
+    ?status=paid&customer=4&car=3&created_after=2025-01-01&created_before=2025-01-31
+    Date bounds are inclusive.
+    """
+    invoice_status = parse_choice_param(params, 'status', Invoice.STATUS_CHOICES)
+    if invoice_status:
+        queryset = queryset.filter(status=invoice_status)
+
+    customer_id = parse_int_param(params, 'customer')
+    if customer_id is not None:
+        queryset = queryset.filter(customer_id=customer_id)
+
+    car_id = parse_int_param(params, 'car')
+    if car_id is not None:
+        queryset = queryset.filter(car_id=car_id)
+
+    created_after = parse_date_param(params, 'created_after')
+    if created_after:
+        queryset = queryset.filter(created_at__gte=start_of_day(created_after))
+
+    created_before = parse_date_param(params, 'created_before')
+    if created_before:
+        queryset = queryset.filter(created_at__lt=start_of_day(created_before + datetime.timedelta(days=1)))
+
+    return queryset
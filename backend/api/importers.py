@@ -0,0 +1,186 @@
+import csv
+import io
+import json
+
+from django.db import connection, transaction
+from django.db.models import prefetch_related_objects
+from rest_framework import serializers
+
+from .caching import invalidate_home_document
+from .models import Amenity, Car, Customer, Extra
+from .search import index_objects, uses_fulltext
+from .serializers import AmenityListField
+from .utils import normalize_email
+
+
+IMPORT_BATCH_SIZE = 500
+
+
+class CarImportSerializer(serializers.ModelSerializer):
+    amenities = AmenityListField(required=False, allow_null=True)
+
+    class Meta:
+        model = Car
+        fields = [
+            'name', 'car_type', 'fuel_type', 'seats', 'transmission', 'location',
+            'price_per_day', 'amenities', 'overview', 'status',
+        ]
+
+
+class CustomerImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Customer
+        fields = ['name', 'email', 'phone_number', 'address', 'status']
+        # Uniqueness is checked once per batch instead of one query per row
+        extra_kwargs = {'email': {'validators': []}}
+
+
+class ExtraImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Extra
+        fields = ['name', 'price']
+
+
+IMPORT_SERIALIZERS = {
+    'cars': CarImportSerializer,
+    'customers': CustomerImportSerializer,
+    'extras': ExtraImportSerializer,
+}
+
+
+def parse_rows(content, file_format):
+    """
+    Parse a CSV or JSON document (text) into a list of row dicts.
+    Raises ValueError with a readable message on malformed input.
+    """
+    if file_format == 'csv':
+        return [
+            {key.strip(): value for key, value in row.items() if key}
+            for row in csv.DictReader(io.StringIO(content))
+        ]
+    if file_format == 'json':
+        try:
+            rows = json.loads(content)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Invalid JSON: {exc}")
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError("JSON imports must be a list of objects.")
+        return rows
+    raise ValueError(f"Unsupported format '{file_format}', expected csv or json.")
+
+
+def validate_rows(kind, rows):
+    """
+    Validate every row in a single pass with one serializer instance.
+    Returns (valid, errors): valid is a list of (row_number, validated_data),
+    errors a list of {'row': n, 'errors': {...}}. Rows are numbered from 1.
+    """
+    serializer = IMPORT_SERIALIZERS[kind]()
+    valid, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        try:
+            valid.append((number, serializer.run_validation(row)))
+        except serializers.ValidationError as exc:
+            errors.append({'row': number, 'errors': exc.detail})
+
+    if kind == 'customers':
+        valid, errors = _check_unique_emails(valid, errors)
+    return valid, errors
+
+
+def _check_unique_emails(valid, errors):
+    """
+    Reject emails repeated inside the batch or already in the database
+    (case-insensitive, on the normalized email_key), using one query per
+    chunk of rows.
+    """
+    seen = set()
+    existing = set()
+    keys = [normalize_email(data['email']) for _, data in valid]
+    for start in range(0, len(keys), IMPORT_BATCH_SIZE):
+        chunk = keys[start:start + IMPORT_BATCH_SIZE]
+        existing.update(Customer.objects.filter(email_key__in=chunk).values_list('email_key', flat=True))
+
+    unique = []
+    for (number, data), key in zip(valid, keys):
+        if key in existing:
+            errors.append({'row': number, 'errors': {'email': ['Customer with this email already exists.']}})
+        elif key in seen:
+            errors.append({'row': number, 'errors': {'email': ['Duplicate email in this import.']}})
+        else:
+            seen.add(key)
+            unique.append((number, data))
+    errors.sort(key=lambda error: error['row'])
+    return unique, errors
+
+
+def import_rows(kind, rows, batch_size=IMPORT_BATCH_SIZE, partial=False, dry_run=False):
+    """
+    Validate and insert a batch of rows.
+
+    Nothing is written when any row fails, unless `partial` is set, in which
+    case the valid rows are inserted. All inserts happen in one transaction
+    with bulk_create in chunks of `batch_size`.
+    """
+    valid, errors = validate_rows(kind, rows)
+    result = {'kind': kind, 'total': len(rows), 'created': 0, 'errors': errors}
+    if dry_run or (errors and not partial) or not valid:
+        return result
+
+    model = IMPORT_SERIALIZERS[kind].Meta.model
+    with transaction.atomic():
+        for start in range(0, len(valid), batch_size):
+            chunk = [data for _, data in valid[start:start + batch_size]]
+            if kind == 'cars':
+                _insert_cars(chunk, batch_size)
+            else:
+                instances = [model(**data) for data in chunk]
+                if kind == 'customers':
+                    # bulk_create skips save(), which normally fills the lookup keys
+                    for instance in instances:
+                        instance.refresh_keys()
+                model.objects.bulk_create(instances, batch_size=batch_size)
+            result['created'] += len(chunk)
+
+    if kind == 'cars':
+        transaction.on_commit(invalidate_home_document)
+    return result
+
+
+def _insert_cars(chunk, batch_size):
+    amenity_names = [data.pop('amenities', None) or [] for data in chunk]
+    cars = [Car(**data) for data in chunk]
+
+    if connection.features.can_return_rows_from_bulk_insert:
+        Car.objects.bulk_create(cars, batch_size=batch_size)
+    else:
+        # MySQL does not return ids from a multi-row INSERT; cars are few,
+        # so save them one by one to be able to link amenities
+        for car in cars:
+            car.save()
+
+    amenities = _get_or_create_amenities({name for names in amenity_names for name in names})
+    Car.amenities.through.objects.bulk_create([
+        Car.amenities.through(car_id=car.pk, amenity_id=amenities[name.lower()].pk)
+        for car, names in zip(cars, amenity_names)
+        for name in names
+    ], batch_size=batch_size)
+
+    if not uses_fulltext():
+        prefetch_related_objects(cars, 'amenities')
+        index_objects('car', cars)
+
+
+def _get_or_create_amenities(names):
+    """
+    Return {lowercased name: Amenity} for `names`, creating missing rows.
+    """
+    amenities = {amenity.name.lower(): amenity for amenity in Amenity.objects.all()}
+    missing = {}
+    for name in names:
+        if name.lower() not in amenities:
+            missing.setdefault(name.lower(), name)
+    if missing:
+        Amenity.objects.bulk_create([Amenity(name=name) for name in missing.values()], ignore_conflicts=True)
+        amenities = {amenity.name.lower(): amenity for amenity in Amenity.objects.all()}
+    return amenities
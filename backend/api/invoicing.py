@@ -0,0 +1,187 @@
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from .customers import upsert_customer
+from .models import Booking, BookingCustomerInfo, Invoice
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+# --- Generation ---
+
+def generate_invoices_for_bookings(booking_ids, render=True):
+    """
+    Create the Invoice for every approved booking in `booking_ids` that does
+    not have one yet (idempotent). Amount, car and dates come from the booking.
+    PDFs are queued for background rendering unless `render` is False.
+    Returns the created invoices.
+
+    The bookings are locked first, so concurrent approvals of the same booking
+    create one invoice between them. Call it in the transaction that approved
+    the bookings: a failure then rolls the approval back too.
+    """
+    with transaction.atomic():
+        # Locked in id order, so overlapping batches cannot deadlock
+        locked = list(
+            Booking.objects.select_for_update().filter(pk__in=booking_ids, status='approved')
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        # A locking read sees invoices committed by the previous holder of the
+        # locks, whatever the isolation level's snapshot says
+        invoiced = set(Invoice.objects.select_for_update().filter(booking_id__in=locked).values_list('booking_id', flat=True))
+        bookings = (
+            Booking.objects.filter(pk__in=[pk for pk in locked if pk not in invoiced])
+            .select_related('customer_info__customer')
+        )
+
+        invoices = []
+        for booking in bookings:
+            try:
+                info = booking.customer_info
+            except BookingCustomerInfo.DoesNotExist:
+                logger.warning(f"Booking {booking.reference_code} approved without customer info; no invoice created")
+                continue
+
+            customer = info.customer or upsert_customer(info.full_name, info.email, info.phone_number)
+            invoices.append(Invoice(
+                customer=customer,
+                car_id=booking.car_id,
+                booking=booking,
+                rental_start=booking.rental_start,
+                rental_end=booking.rental_end,
+                amount=booking.total_price,
+            ))
+
+        if not invoices:
+            return []
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            Invoice.objects.bulk_create(invoices)
+        else:
+            # MySQL does not return ids from a multi-row INSERT
+            for invoice in invoices:
+                invoice.save()
+
+        if render:
+            enqueue_pdf_render([invoice.pk for invoice in invoices])
+    return invoices
+
+
+# --- PDF rendering (off the request path) ---
+
+def pdf_path(invoice_id, version):
+    return os.path.join(settings.INVOICE_PDF_DIR, f"invoice-{invoice_id}-v{version}.pdf")
+
+
+def cached_pdf_path(invoice):
+    """
+    Path of the rendered PDF for the invoice's current version, or None.
+    """
+    path = pdf_path(invoice.pk, invoice.version)
+    return path if os.path.exists(path) else None
+
+
+def render_invoice_pdf(invoice_id, force=False):
+    """
+    Render one invoice to disk (atomic rename) and drop older versions.
+    Returns the path written, or None if the invoice no longer exists.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    invoice = Invoice.objects.select_related('customer', 'car', 'booking').filter(pk=invoice_id).first()
+    if invoice is None:
+        return None
+
+    path = pdf_path(invoice.pk, invoice.version)
+    if os.path.exists(path) and not force:
+        return path
+    os.makedirs(settings.INVOICE_PDF_DIR, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=settings.INVOICE_PDF_DIR, suffix='.pdf.tmp')
+    os.close(fd)
+    try:
+        pdf = canvas.Canvas(tmp_path, pagesize=A4)
+        _, height = A4
+        y = height - 72
+
+        pdf.setFont('Helvetica-Bold', 18)
+        pdf.drawString(72, y, f"Vema Cars - Invoice #{invoice.pk}")
+        pdf.setFont('Helvetica', 11)
+        y -= 36
+
+        days = max((invoice.rental_end - invoice.rental_start).days, 1)
+        lines = [
+            ("Date", invoice.created_at.strftime('%Y-%m-%d')),
+            ("Status", invoice.get_status_display()),
+            ("Booking", invoice.booking.reference_code if invoice.booking else '-'),
+            ("Customer", invoice.customer.name),
+            ("Email", invoice.customer.email),
+            ("Phone", invoice.customer.phone_number or '-'),
+            ("Car", invoice.car.name),
+            ("Rental period", f"{invoice.rental_start} to {invoice.rental_end} ({days} days)"),
+            ("Amount", f"TZS {invoice.amount:,.2f}"),
+        ]
+        for label, value in lines:
+            pdf.drawString(72, y, f"{label}:")
+            pdf.drawString(200, y, str(value))
+            y -= 20
+
+        pdf.showPage()
+        pdf.save()
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    _remove_stale_versions(invoice.pk, keep=path)
+    return path
+
+
+def _remove_stale_versions(invoice_id, keep):
+    prefix = f"invoice-{invoice_id}-v"
+    for name in os.listdir(settings.INVOICE_PDF_DIR):
+        path = os.path.join(settings.INVOICE_PDF_DIR, name)
+        if name.startswith(prefix) and name.endswith('.pdf') and path != keep:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _render_in_background(invoice_id):
+    try:
+        render_invoice_pdf(invoice_id)
+    except Exception as error:
+        logger.error(f"Rendering invoice {invoice_id} PDF failed: {error}")
+    finally:
+        # Worker threads own their DB connections; don't leak them
+        close_old_connections()
+        connection.close()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.INVOICE_PDF_WORKERS, thread_name_prefix='invoice-pdf'
+        )
+    return _executor
+
+
+def enqueue_pdf_render(invoice_ids):
+    """
+    Render PDFs on the background pool once the current transaction commits.
+    """
+    def submit():
+        for invoice_id in invoice_ids:
+            get_executor().submit(_render_in_background, invoice_id)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from backend.api.customers import (
+    DEDUPE_CHUNK_SIZE, backfill_keys, link_guest_bookings, merge_duplicate_customers,
+)
+from backend.api.models import BookingCustomerInfo, Customer
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill normalized email/phone keys, merge duplicate customers and link "
+        "guest bookings (BookingCustomerInfo) to Customer records, in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=DEDUPE_CHUNK_SIZE)
+        parser.add_argument(
+            '--merge-phone', action='store_true',
+            help="Also merge customers that share a phone number but have different emails.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+
+        for model in (Customer, BookingCustomerInfo):
+            updated = backfill_keys(model, chunk_size)
+            self.stdout.write(f"{model.__name__}: backfilled keys on {updated} rows.")
+
+        removed = merge_duplicate_customers('email_key', chunk_size)
+        if options['merge_phone']:
+            removed += merge_duplicate_customers('phone_key', chunk_size)
+        self.stdout.write(f"Merged away {removed} duplicate customers.")
+
+        linked = link_guest_bookings(chunk_size)
+        self.stdout.write(self.style.SUCCESS(f"Linked {linked} guest bookings to customers."))
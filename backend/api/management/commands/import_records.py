@@ -0,0 +1,44 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.api.importers import IMPORT_BATCH_SIZE, IMPORT_SERIALIZERS, import_rows, parse_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import cars, customers or extras from a CSV or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(IMPORT_SERIALIZERS))
+        parser.add_argument('path', help="CSV or JSON file (a list of objects).")
+        parser.add_argument('--format', choices=['csv', 'json'], help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--partial', action='store_true', help="Insert valid rows even if some rows fail.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only.")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+
+        file_format = options['format'] or ('json' if path.suffix.lower() == '.json' else 'csv')
+        try:
+            rows = parse_rows(path.read_text(encoding='utf-8-sig'), file_format)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        result = import_rows(
+            options['kind'], rows,
+            batch_size=options['batch_size'],
+            partial=options['partial'],
+            dry_run=options['dry_run'],
+        )
+
+        for error in result['errors']:
+            self.stderr.write(f"Row {error['row']}: {json.dumps(error['errors'])}")
+
+        summary = f"{result['created']} of {result['total']} {options['kind']} imported, {len(result['errors'])} invalid rows."
+        if result['errors'] and not options['partial']:
+            raise CommandError(f"Nothing imported. {summary}")
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from backend.api.search import SEARCH_FIELDS, rebuild_index, uses_fulltext
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SearchTerm inverted index used by /api/search/ on non-MySQL databases."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=list(SEARCH_FIELDS), help="Only rebuild one kind.")
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if uses_fulltext():
+            self.stdout.write("MySQL uses FULLTEXT indexes; the SearchTerm table is not used.")
+            return
+
+        kinds = [options['kind']] if options['kind'] else None
+        indexed = rebuild_index(kinds, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} objects."))
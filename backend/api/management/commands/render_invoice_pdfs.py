@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from backend.api.invoicing import cached_pdf_path, generate_invoices_for_bookings, render_invoice_pdf
+from backend.api.models import Booking, Invoice
+
+
+class Command(BaseCommand):
+    help = "Render invoice PDFs missing from INVOICE_PDF_DIR (synchronously, without the worker pool)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill', action='store_true',
+            help="First create invoices for approved bookings that do not have one.",
+        )
+        parser.add_argument('--all', action='store_true', help="Re-render every invoice, not only missing ones.")
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            booking_ids = list(
+                Booking.objects.filter(status='approved', invoice__isnull=True).values_list('id', flat=True)
+            )
+            created = generate_invoices_for_bookings(booking_ids, render=False)
+            self.stdout.write(f"Created {len(created)} invoices for approved bookings.")
+
+        rendered = 0
+        for invoice in Invoice.objects.only('id', 'version').order_by('id').iterator():
+            if options['all'] or cached_pdf_path(invoice) is None:
+                render_invoice_pdf(invoice.pk, force=options['all'])
+                rendered += 1
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} invoice PDFs."))
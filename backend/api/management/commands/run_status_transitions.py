@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from backend.api.scheduling import run_status_transitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Complete approved bookings whose rental has ended and sync car availability. "
+        "Safe to run from cron on several nodes; one run at a time holds the lock."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep running, once every --interval seconds, instead of exiting after one pass.",
+        )
+        parser.add_argument('--interval', type=int, default=300)
+
+    def handle(self, *args, **options):
+        while True:
+            counts = run_status_transitions()
+            if counts is None:
+                self.stdout.write("Another node holds the scheduler lock; skipped.")
+            else:
+                summary = ", ".join(f"{key}={value}" for key, value in counts.items())
+                self.stdout.write(self.style.SUCCESS(f"Transitions applied: {summary}"))
+
+            if not options['loop']:
+                return
+            # Long-running process: don't hold on to a dead or stale connection
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,75 @@
+import threading
+from collections import deque
+
+
+METRICS_SAMPLE_SIZE = 1000
+METRIC_FIELDS = ('total_ms', 'db_ms', 'app_ms', 'render_ms', 'queries', 'bytes')
+PERCENTILES = (50, 95, 99)
+
+
+class ViewMetrics:
+    """
+    Rolling samples for one view. Only the last `size` requests are kept,
+    so memory is bounded and percentiles follow current behaviour.
+    """
+
+    def __init__(self, size):
+        self.count = 0
+        self.samples = {field: deque(maxlen=size) for field in METRIC_FIELDS}
+
+    def add(self, sample):
+        self.count += 1
+        for field in METRIC_FIELDS:
+            value = sample.get(field)
+            if value is not None:
+                self.samples[field].append(value)
+
+    def summary(self):
+        data = {'count': self.count}
+        for field, values in self.samples.items():
+            ordered = sorted(values)
+            if not ordered:
+                continue
+            stats = {f'p{pct}': percentile(ordered, pct) for pct in PERCENTILES}
+            stats['max'] = percentile(ordered, 100)
+            data[field] = stats
+        return data
+
+
+def percentile(ordered, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    value = ordered[index]
+    return round(value, 2) if isinstance(value, float) else value
+
+
+class MetricsRegistry:
+    """
+    Process-local per-view metrics. Each worker process keeps its own numbers;
+    scrape every worker (or run one) when comparing.
+    """
+
+    def __init__(self, size=METRICS_SAMPLE_SIZE):
+        self.size = size
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, sample):
+        with self._lock:
+            metrics = self._views.get(key)
+            if metrics is None:
+                metrics = self._views[key] = ViewMetrics(self.size)
+            metrics.add(sample)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: metrics.summary() for key, metrics in sorted(self._views.items())}
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+
+
+registry = MetricsRegistry()
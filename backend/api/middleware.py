@@ -0,0 +1,187 @@
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import registry
+from .routers import _replica_reads, replica_configured
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class QueryCounter:
+    """
+    execute_wrapper that counts queries and the time spent in the database.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+class QueryMetricsMiddleware:
+    """
+    Per-view SQL query count, DB time, view (serializer) time, render time and
+    response size, sent back as a Server-Timing header and aggregated for
+    /api/_metrics/.
+
+    Streaming responses (exports, PDFs) query while the body is sent, after
+    this middleware returns, so only their setup is measured.
+
+    Enabled with API_METRICS_ENABLED; when off Django drops the middleware at
+    startup, so it costs nothing per request.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'API_METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        end = time.perf_counter()
+
+        # The view ran between process_view and process_template_response;
+        # what is left of it after SQL is serializer and Python time
+        view_start = getattr(request, '_metrics_view_start', None)
+        view_end = getattr(request, '_metrics_view_end', None)
+        app = render = None
+        if view_start is not None:
+            app = max((view_end or end) - view_start - counter.db_time, 0.0)
+            if view_end is not None:
+                render = end - view_end
+
+        size = None if response.streaming else len(response.content)
+        sample = {
+            'total_ms': (end - start) * 1000,
+            'db_ms': counter.db_time * 1000,
+            'app_ms': app * 1000 if app is not None else None,
+            'render_ms': render * 1000 if render is not None else None,
+            'queries': counter.queries,
+            'bytes': size,
+        }
+
+        match = request.resolver_match
+        if match is not None:
+            registry.record(f"{request.method} {match.view_name}", sample)
+
+        timings = [
+            f'db;dur={sample["db_ms"]:.1f};desc="{counter.queries} queries"',
+            f'total;dur={sample["total_ms"]:.1f}',
+        ]
+        if app is not None:
+            timings.insert(1, f'app;dur={sample["app_ms"]:.1f}')
+        if render is not None:
+            timings.insert(2, f'render;dur={sample["render_ms"]:.1f}')
+        response['Server-Timing'] = ', '.join(timings)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called after the view returns and before DRF renders the body
+        request._metrics_view_end = time.perf_counter()
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Sends safe requests to views marked `read_from_replica = True` (the
+    public catalog, blog and hero endpoints) to the read replica.
+
+    Read-your-writes:
+    - requests that carry credentials (a JWT Authorization header or a
+      session) always read from the primary. The admin frontend is
+      cross-origin and never sends cookies back, so this is what lets an
+      admin see the car they just edited;
+    - a successful unsafe request also sets a short-lived cookie, and a
+      same-origin client carrying it reads from the primary until it
+      expires (REPLICA_PIN_SECONDS).
+
+    Only active when a 'replica' database is configured. Runs natively under
+    ASGI too, so async views (the WhatsApp webhook) stay on the event loop.
+    """
+    cookie_name = 'primary_pin'
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+            # A sync process_view would run in a worker thread and set the
+            # context variable outside the request's context
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.reset(request)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.reset(request)
+        return self.pin(request, response)
+
+    def reset(self, request):
+        token = getattr(request, '_replica_token', None)
+        if token is not None:
+            _replica_reads.reset(token)
+
+    def pin(self, request, response):
+        # A rejected write changed nothing there is to read back
+        if request.method not in SAFE_METHODS and 200 <= response.status_code < 300:
+            response.set_cookie(
+                self.cookie_name, '1',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.route(request, view_func)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.route(request, view_func)
+
+    def route(self, request, view_func):
+        view_class = getattr(view_func, 'view_class', None)
+        if (
+            request.method in SAFE_METHODS
+            and getattr(view_class, 'read_from_replica', False)
+            and not self.pinned(request)
+        ):
+            request._replica_token = _replica_reads.set(True)
+
+    def pinned(self, request):
+        # DRF authenticates inside the view, so look at the credentials themselves
+        return (
+            'HTTP_AUTHORIZATION' in request.META
+            or settings.SESSION_COOKIE_NAME in request.COOKIES
+            or self.cookie_name in request.COOKIES
+        )
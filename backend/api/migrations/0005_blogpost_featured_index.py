@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_extra_booking_dropoff_location_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="blogpost",
+            index=models.Index(
+                fields=["is_featured", "created_at"],
+                name="api_blog_featured_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:19
+
+from django.db import migrations, models
+
+
+def add_fulltext_indexes(apps, schema_editor):
+    # FULLTEXT is MySQL-only; other backends use the SearchTerm table.
+    if schema_editor.connection.vendor != "mysql":
+        return
+    schema_editor.execute(
+        "ALTER TABLE api_car ADD FULLTEXT INDEX api_car_fulltext "
+        "(name, overview, amenities, location)"
+    )
+    schema_editor.execute(
+        "ALTER TABLE api_blogpost ADD FULLTEXT INDEX api_blogpost_fulltext "
+        "(title, content)"
+    )
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    schema_editor.execute("ALTER TABLE api_car DROP INDEX api_car_fulltext")
+    schema_editor.execute("ALTER TABLE api_blogpost DROP INDEX api_blogpost_fulltext")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_blogpost_featured_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=64)),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("car", "Car"), ("blog", "Blog Post")], max_length=10
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("weight", models.PositiveIntegerField(default=1)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["term", "kind"], name="api_search_term_kind_idx"
+                    ),
+                    models.Index(
+                        fields=["kind", "object_id"], name="api_search_object_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(add_fulltext_indexes, drop_fulltext_indexes),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:19
+
+from django.db import migrations, models
+
+
+def split_amenities(text):
+    """
+    Parse the legacy comma separated amenities string, de-duplicating
+    case-insensitively while keeping the first spelling seen.
+    """
+    names = {}
+    for part in (text or "").split(","):
+        name = part.strip()[:50]
+        if name and name.lower() not in names:
+            names[name.lower()] = name
+    return list(names.values())
+
+
+def copy_amenities_to_m2m(apps, schema_editor):
+    Car = apps.get_model("api", "Car")
+    Amenity = apps.get_model("api", "Amenity")
+    Through = Car.amenities.through
+
+    amenities = {}  # lowercased name -> Amenity
+    links = []
+    cars = Car.objects.exclude(amenities_text__isnull=True).exclude(amenities_text="")
+    for car in cars.only("pk", "amenities_text").iterator(chunk_size=500):
+        for name in split_amenities(car.amenities_text):
+            amenity = amenities.get(name.lower())
+            if amenity is None:
+                amenity = amenities[name.lower()] = Amenity.objects.create(name=name)
+            links.append(Through(car_id=car.pk, amenity_id=amenity.pk))
+    Through.objects.bulk_create(links, batch_size=1000)
+
+
+def copy_amenities_to_text(apps, schema_editor):
+    Car = apps.get_model("api", "Car")
+    for car in Car.objects.prefetch_related("amenities"):
+        car.amenities_text = ", ".join(a.name for a in car.amenities.all())
+        car.save(update_fields=["amenities_text"])
+
+
+def rebuild_fulltext_without_amenities(apps, schema_editor):
+    # The amenities column leaves the car FULLTEXT index; amenity names get
+    # their own index, joined in by backend.api.search.
+    if schema_editor.connection.vendor != "mysql":
+        return
+    schema_editor.execute("ALTER TABLE api_car DROP INDEX api_car_fulltext")
+    schema_editor.execute(
+        "ALTER TABLE api_car ADD FULLTEXT INDEX api_car_fulltext "
+        "(name, overview, location)"
+    )
+    schema_editor.execute(
+        "ALTER TABLE api_amenity ADD FULLTEXT INDEX api_amenity_fulltext (name)"
+    )
+
+
+def restore_fulltext_with_amenities(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    schema_editor.execute("ALTER TABLE api_amenity DROP INDEX api_amenity_fulltext")
+    schema_editor.execute("ALTER TABLE api_car DROP INDEX api_car_fulltext")
+    schema_editor.execute(
+        "ALTER TABLE api_car ADD FULLTEXT INDEX api_car_fulltext "
+        "(name, overview, amenities_text, location)"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_searchterm"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Amenity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                "verbose_name_plural": "Amenities",
+                "ordering": ["name"],
+            },
+        ),
+        migrations.RenameField(
+            model_name="car",
+            old_name="amenities",
+            new_name="amenities_text",
+        ),
+        migrations.AddField(
+            model_name="car",
+            name="amenities",
+            field=models.ManyToManyField(
+                blank=True, related_name="cars", to="api.amenity"
+            ),
+        ),
+        migrations.RunPython(copy_amenities_to_m2m, copy_amenities_to_text),
+        migrations.RunPython(
+            rebuild_fulltext_without_amenities, restore_fulltext_with_amenities
+        ),
+        migrations.RemoveField(
+            model_name="car",
+            name="amenities_text",
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_booking_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(
+                fields=["created_at", "id"], name="api_invoice_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(
+                fields=["status", "created_at"], name="api_invoice_status_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_invoice_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookingcustomerinfo",
+            name="customer",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="booking_infos",
+                to="api.customer",
+            ),
+        ),
+        migrations.AddField(
+            model_name="bookingcustomerinfo",
+            name="email_key",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=254
+            ),
+        ),
+        migrations.AddField(
+            model_name="bookingcustomerinfo",
+            name="phone_key",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=20
+            ),
+        ),
+        migrations.AddField(
+            model_name="customer",
+            name="email_key",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=254
+            ),
+        ),
+        migrations.AddField(
+            model_name="customer",
+            name="phone_key",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=20
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0010_customer_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="invoice",
+            name="booking",
+            field=models.OneToOneField(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="invoice",
+                to="api.booking",
+            ),
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
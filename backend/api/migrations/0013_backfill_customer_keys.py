@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def backfill_customer_keys(apps, schema_editor):
+    """
+    Fill the lookup keys added blank by 0010, so upsert_customer and the bulk
+    import find existing customers without waiting for dedupe_customers.
+    """
+    from backend.api.customers import backfill_keys
+
+    for name in ("Customer", "BookingCustomerInfo"):
+        backfill_keys(apps.get_model("api", name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0012_joblock_booking_schedule_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_customer_keys, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,19 @@
 from django.db import models
 import uuid
 
+from .utils import normalize_email, normalize_phone
+
+
+class Amenity(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = "Amenities"
+
+    def __str__(self):
+        return self.name
+
 
 class Car(models.Model):
     STATUS_CHOICES = [
@@ -36,7 +49,7 @@ class Car(models.Model):
     price_per_day = models.DecimalField(max_digits=10, decimal_places=2)
     
     # Content for the Details Page
-    amenities = models.TextField(help_text="Comma separated list, e.g., A/C, 4WD", null=True, blank=True)
+    amenities = models.ManyToManyField(Amenity, related_name='cars', blank=True)
     overview = models.TextField(blank=True, null=True) 
     
     # Management
@@ -95,6 +108,10 @@ class BlogPost(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Home page swiper: WHERE is_featured ORDER BY created_at DESC
+            models.Index(fields=['is_featured', 'created_at'], name='api_blog_featured_created_idx'),
+        ]
         
         
 
@@ -107,6 +124,18 @@ class Customer(models.Model):
     status = models.CharField(max_length=20, choices=[('active', 'Active'), ('dormant', 'Dormant')], default='active')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Normalized lookup keys shared with BookingCustomerInfo (see api.utils)
+    email_key = models.CharField(max_length=254, blank=True, editable=False, db_index=True)
+    phone_key = models.CharField(max_length=20, blank=True, editable=False, db_index=True)
+
+    def refresh_keys(self):
+        self.email_key = normalize_email(self.email)
+        self.phone_key = normalize_phone(self.phone_number)
+
+    def save(self, *args, **kwargs):
+        self.refresh_keys()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
     
@@ -120,11 +149,28 @@ class Invoice(models.Model):
     ]
     customer = models.ForeignKey(Customer, related_name='invoices', on_delete=models.CASCADE)
     car = models.ForeignKey(Car, related_name='invoices', on_delete=models.CASCADE)
+    # Set when the invoice was generated from an approved booking
+    booking = models.OneToOneField('Booking', related_name='invoice', null=True, blank=True, on_delete=models.SET_NULL)
     rental_start = models.DateField()
     rental_end = models.DateField()
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped on every change; keys the cached PDF on disk
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='api_invoice_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='api_invoice_status_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Invoice {self.id} for {self.customer.name}"
@@ -206,6 +252,18 @@ class Booking(models.Model):
         # super().save(update_fields=['total_price']) is cleaner but grand_total is a property.
         super().save(update_fields=['total_price'])
 
+    class Meta:
+        indexes = [
+            # Staff booking table: keyset pagination, optionally by status
+            models.Index(fields=['created_at', 'id'], name='api_booking_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='api_booking_status_created_idx'),
+            models.Index(fields=['rental_start'], name='api_booking_rental_start_idx'),
+            # Scheduled transitions: approved bookings whose rental has ended
+            models.Index(fields=['status', 'rental_end'], name='api_booking_status_end_idx'),
+            # Car availability sync: active rentals per car
+            models.Index(fields=['car', 'status', 'rental_start'], name='api_booking_car_active_idx'),
+        ]
+
     def __str__(self):
         return f"Booking {self.reference_code} ({self.status})"
 
@@ -216,6 +274,8 @@ class BookingCustomerInfo(models.Model):
     Decoupled from the main Customer model to allow guest bookings.
     """
     booking = models.OneToOneField(Booking, related_name='customer_info', on_delete=models.CASCADE)
+    # Repeat guests are linked to one Customer record by email/phone key
+    customer = models.ForeignKey(Customer, related_name='booking_infos', null=True, blank=True, on_delete=models.SET_NULL)
     
     full_name = models.CharField(max_length=255)
     email = models.EmailField(help_text="Contact email for this booking")
@@ -223,10 +283,56 @@ class BookingCustomerInfo(models.Model):
     
     notes = models.TextField(blank=True, null=True, help_text="Special requests or notes")
 
+    email_key = models.CharField(max_length=254, blank=True, editable=False, db_index=True)
+    phone_key = models.CharField(max_length=20, blank=True, editable=False, db_index=True)
+
+    def refresh_keys(self):
+        self.email_key = normalize_email(self.email)
+        self.phone_key = normalize_phone(self.phone_number)
+
+    def save(self, *args, **kwargs):
+        self.refresh_keys()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Info for {self.booking.reference_code}"
 
 
+class SearchTerm(models.Model):
+    """
+    Inverted index row (term -> object) used by /api/search/ on databases
+    without FULLTEXT support (SQLite dev and test). Maintained on save.
+    """
+    KIND_CHOICES = [
+        ('car', 'Car'),
+        ('blog', 'Blog Post'),
+    ]
+
+    term = models.CharField(max_length=64)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'kind'], name='api_search_term_kind_idx'),
+            models.Index(fields=['kind', 'object_id'], name='api_search_object_idx'),
+        ]
 
+    def __str__(self):
+        return f"{self.term} -> {self.kind}:{self.object_id}"
 
 
+class JobLock(models.Model):
+    """
+    Lease-style lock for periodic jobs, so several app nodes can run the
+    scheduler without stepping on each other. Acquired with a conditional
+    UPDATE (see api.scheduling); an expired lease can be taken over.
+    """
+    name = models.CharField(max_length=64, primary_key=True)
+    owner = models.CharField(max_length=128, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.owner or 'free'})"
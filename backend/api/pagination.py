@@ -0,0 +1,21 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class SearchPagination(PageNumberPagination):
+    """
+    Ranked search results: page-number pagination over the score ordering.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination on created_at, newest first.
+    Every page is an indexed range scan, so deep pages cost the same as the first.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-created_at', '-id')
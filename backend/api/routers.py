@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+REPLICA_ALIAS = 'replica'
+
+# Set for the duration of a safe request to a replica-enabled view
+# (see api.middleware.ReplicaRoutingMiddleware)
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def reads_from(replica):
+    token = _replica_reads.set(replica)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def use_primary():
+    """
+    Force reads in the block to the primary, e.g. when filling a shared cache
+    that must not capture replication lag.
+    """
+    return reads_from(False)
+
+
+class ReplicaRouter:
+    """
+    Reads go to the replica only while a request has opted in; everything
+    else (writes, admin, management commands, background threads) uses the
+    primary. Migrations only run on the primary; the replica follows by
+    replication.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and replica_configured():
+            return REPLICA_ALIAS
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
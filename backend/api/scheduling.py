@@ -0,0 +1,117 @@
+import logging
+import os
+import socket
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .caching import invalidate_home_document
+from .models import Booking, Car, JobLock
+
+logger = logging.getLogger(__name__)
+
+TRANSITIONS_LOCK = 'status-transitions'
+LOCK_TTL = timedelta(minutes=5)
+
+
+# --- Job lock (lease held in the database) ---
+
+def lock_owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_lock(name, owner, ttl=LOCK_TTL):
+    """
+    Take the lease if it is free, expired or already ours. The conditional
+    UPDATE is atomic on every backend, so only one node wins.
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            JobLock.objects.get_or_create(name=name)
+    except IntegrityError:
+        # Another node created the row first; fall through to the UPDATE
+        pass
+
+    taken = JobLock.objects.filter(
+        Q(owner='') | Q(owner=owner) | Q(expires_at__isnull=True) | Q(expires_at__lt=now),
+        name=name,
+    ).update(owner=owner, expires_at=now + ttl)
+    return taken == 1
+
+
+def release_lock(name, owner):
+    JobLock.objects.filter(name=name, owner=owner).update(
+        owner='', expires_at=None, last_run_at=timezone.now(),
+    )
+
+
+@contextmanager
+def job_lock(name, ttl=LOCK_TTL):
+    """
+    Yields True when this process holds the lock, False when another does.
+    """
+    owner = lock_owner()
+    acquired = acquire_lock(name, owner, ttl)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            release_lock(name, owner)
+
+
+# --- Transitions ---
+
+def complete_finished_bookings(today):
+    """
+    approved -> completed once rental_end has passed.
+    """
+    return Booking.objects.filter(status='approved', rental_end__lt=today).update(
+        status='completed', updated_at=timezone.now(),
+    )
+
+
+def sync_car_availability(today):
+    """
+    Cars with an approved booking covering today are 'booked'; 'booked' cars
+    without one go back to 'available'. Cars in maintenance are left alone.
+    Returns (booked, released) row counts.
+    """
+    active_rental = Booking.objects.filter(
+        car=OuterRef('pk'), status='approved', rental_start__lte=today, rental_end__gte=today,
+    )
+    now = timezone.now()
+    booked = Car.objects.filter(status='available').filter(Exists(active_rental)).update(
+        status='booked', updated_at=now,
+    )
+    released = Car.objects.filter(status='booked').exclude(Exists(active_rental)).update(
+        status='available', updated_at=now,
+    )
+    return booked, released
+
+
+def run_status_transitions(today=None):
+    """
+    Apply every scheduled transition with set-based UPDATEs. Idempotent:
+    a second run on the same day changes nothing.
+    Returns a dict of row counts, or None if another node holds the lock.
+    """
+    today = today or timezone.localdate()
+    with job_lock(TRANSITIONS_LOCK) as acquired:
+        if not acquired:
+            return None
+
+        with transaction.atomic():
+            completed = complete_finished_bookings(today)
+            booked, released = sync_car_availability(today)
+
+    if booked or released:
+        # QuerySet.update() skips post_save, so drop the home page cache here
+        invalidate_home_document()
+
+    counts = {'bookings_completed': completed, 'cars_booked': booked, 'cars_released': released}
+    logger.info(f"Status transitions for {today}: {counts}")
+    return counts
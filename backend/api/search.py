@@ -0,0 +1,155 @@
+import re
+from collections import Counter
+
+from django.db import connection
+from django.db.models import F, FloatField, Sum, Value
+from django.db.models.expressions import RawSQL
+
+from .models import BlogPost, Car, SearchTerm
+
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 64
+STOP_WORDS = {'a', 'an', 'and', 'are', 'at', 'by', 'for', 'in', 'is', 'of', 'on', 'or', 'the', 'to', 'with'}
+
+# kind -> (model, {field: weight}); weights rank title hits above body hits
+SEARCH_FIELDS = {
+    'car': (Car, {'name': 5, 'location': 3, 'amenities': 2, 'overview': 1}),
+    'blog': (BlogPost, {'title': 5, 'content': 1}),
+}
+
+# MySQL FULLTEXT indexes (see migrations 0006/0007); column lists must match exactly
+FULLTEXT_MATCH = {
+    'car': (
+        "MATCH (name, overview, location) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+        " + 2 * (SELECT COUNT(*) FROM api_car_amenities ca"
+        " JOIN api_amenity a ON a.id = ca.amenity_id"
+        " WHERE ca.car_id = api_car.id"
+        " AND MATCH (a.name) AGAINST (%s IN NATURAL LANGUAGE MODE))"
+    ),
+    'blog': "MATCH (title, content) AGAINST (%s IN NATURAL LANGUAGE MODE)",
+}
+
+# Many-to-many fields indexed by the names of their related rows
+RELATED_NAME_FIELDS = {'amenities'}
+
+
+def uses_fulltext():
+    """
+    MySQL answers searches from its FULLTEXT indexes; other backends
+    (SQLite dev/test) use the SearchTerm inverted index.
+    """
+    return connection.vendor == 'mysql'
+
+
+def tokenize(text):
+    """
+    Split text into lowercase index terms.
+    """
+    if not text:
+        return []
+    terms = []
+    for token in TOKEN_RE.findall(str(text).lower()):
+        if len(token) >= MIN_TERM_LENGTH and token not in STOP_WORDS:
+            terms.append(token[:MAX_TERM_LENGTH])
+    return terms
+
+
+def get_document_weights(kind, instance):
+    """
+    Return {term: weight} for one car or blog post.
+    """
+    _, fields = SEARCH_FIELDS[kind]
+    weights = Counter()
+    for field_name, weight in fields.items():
+        if field_name in RELATED_NAME_FIELDS:
+            text = ' '.join(related.name for related in getattr(instance, field_name).all())
+        else:
+            text = getattr(instance, field_name, '')
+        for term in tokenize(text):
+            weights[term] += weight
+    return weights
+
+
+def index_object(kind, instance):
+    """
+    Replace the inverted-index rows for a single object.
+    """
+    remove_object(kind, instance.pk)
+    SearchTerm.objects.bulk_create([
+        SearchTerm(term=term, kind=kind, object_id=instance.pk, weight=weight)
+        for term, weight in get_document_weights(kind, instance).items()
+    ])
+
+
+def index_objects(kind, instances):
+    """
+    Index many freshly created objects with a single bulk insert
+    (bulk_create does not fire the post_save signal that normally does this).
+    """
+    SearchTerm.objects.bulk_create([
+        SearchTerm(term=term, kind=kind, object_id=instance.pk, weight=weight)
+        for instance in instances
+        for term, weight in get_document_weights(kind, instance).items()
+    ], batch_size=1000)
+
+
+def remove_object(kind, object_id):
+    SearchTerm.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def rebuild_index(kinds=None, chunk_size=500):
+    """
+    Rebuild the inverted index from scratch. Returns the number of objects indexed.
+    """
+    indexed = 0
+    for kind in kinds or SEARCH_FIELDS:
+        model, fields = SEARCH_FIELDS[kind]
+        SearchTerm.objects.filter(kind=kind).delete()
+
+        columns = [name for name in fields if name not in RELATED_NAME_FIELDS]
+        related = [name for name in fields if name in RELATED_NAME_FIELDS]
+        queryset = model.objects.only(*columns).prefetch_related(*related)
+
+        rows = []
+        for instance in queryset.iterator(chunk_size=chunk_size):
+            rows.extend(
+                SearchTerm(term=term, kind=kind, object_id=instance.pk, weight=weight)
+                for term, weight in get_document_weights(kind, instance).items()
+            )
+            indexed += 1
+            if len(rows) >= chunk_size:
+                SearchTerm.objects.bulk_create(rows)
+                rows = []
+        SearchTerm.objects.bulk_create(rows)
+    return indexed
+
+
+def search_queryset(query, kinds):
+    """
+    Build a ranked queryset of {'kind', 'object_id', 'score'} rows,
+    ordered best match first. Slicing it paginates in the database.
+    """
+    if uses_fulltext():
+        ranked = []
+        for kind in kinds:
+            model, _ = SEARCH_FIELDS[kind]
+            sql = FULLTEXT_MATCH[kind]
+            match = RawSQL(sql, (query,) * sql.count('%s'), output_field=FloatField())
+            ranked.append(
+                model.objects.annotate(score=match)
+                .filter(score__gt=0)
+                .annotate(kind=Value(kind), object_id=F('pk'))
+                .values('kind', 'object_id', 'score')
+            )
+        queryset = ranked[0].union(*ranked[1:]) if len(ranked) > 1 else ranked[0]
+        return queryset.order_by('-score', 'kind', '-object_id')
+
+    terms = set(tokenize(query))
+    return (
+        SearchTerm.objects.filter(term__in=terms, kind__in=kinds)
+        .values('kind', 'object_id')
+        .annotate(score=Sum('weight'))
+        .order_by('-score', 'kind', '-object_id')
+    )
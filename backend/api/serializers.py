@@ -2,19 +2,75 @@ from rest_framework import serializers
 from .models import *
 import json
 from django.core.files.base import ContentFile, File
+from .batch import BATCH_LIMIT
+from .caching import invalidate_home_document
+from .customers import upsert_customer
 
 
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    A ModelSerializer that takes an additional `fields` argument that
+    controls which fields should be displayed (sparse fieldsets).
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            allowed = set(fields)
+            for field_name in set(self.fields) - allowed:
+                self.fields.pop(field_name)
+
+
+class AmenityListField(serializers.Field):
+    """
+    Exposes the Car.amenities many-to-many in its legacy comma separated
+    form ("A/C, 4WD"). Accepts either that string or a list of names.
+    """
+    def to_representation(self, value):
+        return ', '.join(amenity.name for amenity in value.all())
+
+    def to_internal_value(self, data):
+        if data in (None, ''):
+            return []
+        if isinstance(data, str):
+            data = data.split(',')
+        if not isinstance(data, (list, tuple)):
+            raise serializers.ValidationError("Expected a comma separated string or a list of names.")
+
+        names = {}
+        for item in data:
+            name = str(item).strip()
+            if len(name) > 50:
+                raise serializers.ValidationError(f"Amenity names are limited to 50 characters: '{name}'.")
+            if name and name.lower() not in names:
+                names[name.lower()] = name
+        return list(names.values())
+
+
+def resolve_amenities(names):
+    """
+    Map amenity names to Amenity rows (case-insensitive), creating missing ones.
+    """
+    amenities = []
+    for name in names:
+        amenity = Amenity.objects.filter(name__iexact=name).first()
+        if amenity is None:
+            amenity = Amenity.objects.create(name=name)
+        amenities.append(amenity)
+    return amenities
 
         
-class CarImageSerializer(serializers.ModelSerializer):
+class CarImageSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = CarImage
         fields = '__all__'
         
 
 
-class CarSerializer(serializers.ModelSerializer):
+class CarSerializer(DynamicFieldsModelSerializer):
     images = CarImageSerializer(many=True, read_only=True)
+    amenities = AmenityListField(required=False, allow_null=True)
     
     class Meta:
         model = Car
@@ -52,26 +108,51 @@ class CarSerializer(serializers.ModelSerializer):
         for file in new_files:
             CarImage.objects.create(car=instance, image=file, is_primary=False)
 
+        # Queryset .update() above bypasses the post_save signals
+        invalidate_home_document()
+
     def create(self, validated_data):
         request = self.context.get('request')
+        amenity_names = validated_data.pop('amenities', None)
         instance = super().create(validated_data)
+        if amenity_names is not None:
+            instance.amenities.set(resolve_amenities(amenity_names))
         self._handle_images(instance, request)
         return instance
 
     def update(self, instance, validated_data):
         request = self.context.get('request')
+        amenity_names = validated_data.pop('amenities', None)
         instance = super().update(instance, validated_data)
+        if amenity_names is not None:
+            instance.amenities.set(resolve_amenities(amenity_names))
         self._handle_images(instance, request)
         return instance
+
+
+class CarListSerializer(DynamicFieldsModelSerializer):
+    """
+    Compact car representation for list/card views.
+    Drops the heavy text fields (overview, amenities).
+    """
+    images = CarImageSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Car
+        fields = [
+            'id', 'name', 'car_type', 'fuel_type', 'seats', 'transmission',
+            'location', 'price_per_day', 'status', 'images',
+        ]
+
         
-class HeroSectionSerializer(serializers.ModelSerializer):
+class HeroSectionSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = HeroSection
         fields = '__all__'
         
         
         
-class BlogPostSerializer(serializers.ModelSerializer):
+class BlogPostSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = BlogPost
         fields = '__all__'
@@ -98,22 +179,34 @@ class BlogPostSerializer(serializers.ModelSerializer):
             validated_data.pop('image')
 
         return super().update(instance, validated_data)
+
+
+class BlogPostListSerializer(DynamicFieldsModelSerializer):
+    """
+    Compact blog representation for list/card views (no `content` body).
+    """
+    class Meta:
+        model = BlogPost
+        fields = ['id', 'title', 'image', 'is_featured', 'created_at', 'updated_at']
         
         
         
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Customer
-        fields = '__all__'
+        exclude = ['email_key', 'phone_key']
         
         
         
-class InvoiceSerializer(serializers.ModelSerializer):
+class InvoiceSerializer(DynamicFieldsModelSerializer):
+    customer_name = serializers.CharField(source='customer.name', read_only=True)
+    car_name = serializers.CharField(source='car.name', read_only=True)
+
     class Meta:
         model = Invoice
         fields = '__all__'
 
-class ExtraSerializer(serializers.ModelSerializer):
+class ExtraSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Extra
         fields = '__all__'
@@ -126,15 +219,16 @@ class BookingCustomerInfoSerializer(serializers.ModelSerializer):
 
 
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(DynamicFieldsModelSerializer):
     customer_info = BookingCustomerInfoSerializer(read_only=True)
     extras = ExtraSerializer(many=True, read_only=True)
+    car_name = serializers.CharField(source='car.name', read_only=True)
 
     class Meta:
         model = Booking
         fields = "__all__"
 
-class PublicBookingSerializer(serializers.ModelSerializer):
+class PublicBookingSerializer(DynamicFieldsModelSerializer):
     """
     Restricted serializer for public viewing of a booking.
     Hides sensitive customer PII or internal notes if necessary.
@@ -153,6 +247,51 @@ class PublicBookingSerializer(serializers.ModelSerializer):
 
 
 
+class BatchActionSerializer(serializers.Serializer):
+    """
+    Request body for the batch endpoints:
+    {"action": "update", "<keys>": [...], "status": "approved"}
+    {"action": "delete", "<keys>": [...]}
+    Subclasses set `key_field`, `status_choices` and the allowed actions.
+    """
+    action = serializers.ChoiceField(choices=['update', 'delete'])
+    status = serializers.CharField(required=False)
+
+    def validate(self, data):
+        if data['action'] == 'update':
+            allowed = [value for value, _ in self.status_choices]
+            if data.get('status') not in allowed:
+                raise serializers.ValidationError({'status': [f'Must be one of: {", ".join(allowed)}.']})
+        # De-duplicate keys while keeping the caller's order for the results
+        data[self.key_field] = list(dict.fromkeys(data[self.key_field]))
+        return data
+
+
+class BookingBatchSerializer(BatchActionSerializer):
+    key_field = 'reference_codes'
+    status_choices = Booking.STATUS_CHOICES
+    reference_codes = serializers.ListField(
+        child=serializers.CharField(max_length=20), allow_empty=False, max_length=BATCH_LIMIT
+    )
+
+
+class InvoiceBatchSerializer(BatchActionSerializer):
+    key_field = 'ids'
+    status_choices = Invoice.STATUS_CHOICES
+    action = serializers.ChoiceField(choices=['create', 'update', 'delete'])
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=BATCH_LIMIT)
+    items = serializers.ListField(child=serializers.DictField(), required=False, max_length=BATCH_LIMIT)
+
+    def validate(self, data):
+        if data['action'] == 'create':
+            if not data.get('items'):
+                raise serializers.ValidationError({'items': ['This field is required for create.']})
+            return data
+        if not data.get('ids'):
+            raise serializers.ValidationError({'ids': ['This field is required.']})
+        return super().validate(data)
+
+
 class BookingCreateSerializer(serializers.ModelSerializer):
     customer_info = BookingCustomerInfoSerializer()
     extras = serializers.PrimaryKeyRelatedField(
@@ -195,9 +334,13 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         if extras:
             booking.extras.set(extras)
 
-        # Create nested customer info
+        # Create nested customer info, linked to the guest's Customer record
+        customer = upsert_customer(
+            customer_data['full_name'], customer_data['email'], customer_data['phone_number']
+        )
         BookingCustomerInfo.objects.create(
             booking=booking,
+            customer=customer,
             **customer_data
         )
 
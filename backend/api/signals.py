@@ -0,0 +1,55 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import invalidate_hero_section, invalidate_home_document
+from .invoicing import enqueue_pdf_render
+from .models import BlogPost, Car, CarImage, HeroSection, Invoice
+from .search import index_object, remove_object, uses_fulltext
+
+
+@receiver([post_save, post_delete], sender=HeroSection)
+@receiver([post_save, post_delete], sender=BlogPost)
+@receiver([post_save, post_delete], sender=Car)
+@receiver([post_save, post_delete], sender=CarImage)
+def invalidate_home_on_change(sender, **kwargs):
+    """
+    Any change to content shown on the home page drops the cached document.
+    """
+    invalidate_home_document()
+
+
+@receiver([post_save, post_delete], sender=HeroSection)
+def invalidate_hero_on_change(sender, **kwargs):
+    invalidate_hero_section()
+
+
+@receiver(post_save, sender=Car)
+@receiver(post_save, sender=BlogPost)
+def update_search_index(sender, instance, **kwargs):
+    """
+    Keep the fallback inverted index in step with saves.
+    MySQL searches its FULLTEXT indexes instead, so nothing to do there.
+    """
+    if not uses_fulltext():
+        index_object('car' if sender is Car else 'blog', instance)
+
+
+@receiver(post_delete, sender=Car)
+@receiver(post_delete, sender=BlogPost)
+def remove_from_search_index(sender, instance, **kwargs):
+    if not uses_fulltext():
+        remove_object('car' if sender is Car else 'blog', instance.pk)
+
+
+@receiver(m2m_changed, sender=Car.amenities.through)
+def reindex_car_amenities(sender, instance, action, **kwargs):
+    # Amenities are set after the car's post_save, so reindex once they land
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Car) and not uses_fulltext():
+        index_object('car', instance)
+
+
+@receiver(post_save, sender=Invoice)
+def rerender_invoice_pdf(sender, instance, created, **kwargs):
+    # New invoices are queued by whoever creates them; edits bump the version
+    if not created:
+        enqueue_pdf_render([instance.pk])
@@ -1,3 +1,543 @@
-from django.test import TestCase
+import datetime
+import importlib
+import json
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .caching import HERO_VERSION_KEY
+from .customers import link_guest_bookings, merge_duplicate_customers, upsert_customer
+from .invoicing import generate_invoices_for_bookings
+from .middleware import ReplicaRoutingMiddleware
+from .models import (
+    Amenity, BlogPost, Booking, BookingCustomerInfo, Car, CarImage, Customer, Extra, HeroSection, Invoice, JobLock,
+)
+from .routers import ReplicaRouter, use_primary
+from .serializers import CarSerializer
+from .scheduling import TRANSITIONS_LOCK, acquire_lock, job_lock, run_status_transitions
+
+# Fixture volumes: large enough that an N+1 shows up as dozens of extra queries
+CARS = 12
+IMAGES_PER_CAR = 4
+BLOGS = 8
+BOOKINGS = 30
+EXTRAS = 3
+
+
+class QueryCountTestCase(TestCase):
+    """
+    Seeds realistic volumes once per class and checks each endpoint's SQL
+    query count, so a reintroduced N+1 fails here instead of in production.
+    Requests are force-authenticated, so no auth queries are counted.
+    Clients are pinned to the primary (ReplicaRoutingTests covers the
+    replica path), because TestCase data is uncommitted and invisible to
+    the replica connection.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='pass', is_staff=True, is_superuser=True)
+
+        amenities = [Amenity.objects.create(name=name) for name in ('A/C', '4WD', 'Bluetooth')]
+        HeroSection.objects.create(pk=1, title='Drive Tanzania', ticks='Simple booking, Quick support')
+
+        cls.cars = []
+        for i in range(CARS):
+            car = Car.objects.create(
+                name=f'Car {i}', seats=5, location='Dar es Salaam', price_per_day=50 + i,
+                overview='A comfortable car. ' * 50,
+            )
+            car.amenities.set(amenities[:2])
+            for j in range(IMAGES_PER_CAR):
+                CarImage.objects.create(car=car, image=f'cars/{i}-{j}.jpg', is_primary=j == 0)
+            cls.cars.append(car)
+
+        for i in range(BLOGS):
+            BlogPost.objects.create(
+                title=f'Safari road trip {i}', image=f'blog/{i}.jpg', content='Long read. ' * 200,
+                is_featured=i % 2 == 0,
+            )
+
+        cls.extras = [Extra.objects.create(name=f'Extra {i}', price=5 + i) for i in range(EXTRAS)]
+
+        cls.customers = [
+            Customer.objects.create(name=f'Customer {i}', email=f'customer{i}@example.com', phone_number=f'07120000{i:02d}')
+            for i in range(BOOKINGS // 3)
+        ]
+
+        cls.bookings = []
+        start = datetime.date(2025, 3, 1)
+        for i in range(BOOKINGS):
+            customer = cls.customers[i % len(cls.customers)]
+            booking = Booking.objects.create(
+                car=cls.cars[i % CARS],
+                rental_start=start + datetime.timedelta(days=i),
+                rental_end=start + datetime.timedelta(days=i + 3),
+                status=['pending', 'approved'][i % 2],
+            )
+            booking.extras.set(cls.extras)
+            BookingCustomerInfo.objects.create(
+                booking=booking, customer=customer, full_name=customer.name,
+                email=customer.email, phone_number=customer.phone_number,
+            )
+            booking.save()
+            cls.bookings.append(booking)
+
+        for booking in cls.bookings[:BOOKINGS // 2]:
+            Invoice.objects.create(
+                customer=booking.customer_info.customer, car=booking.car,
+                rental_start=booking.rental_start, rental_end=booking.rental_end, amount=booking.total_price,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        self.client.cookies[ReplicaRoutingMiddleware.cookie_name] = '1'
+
+    def get(self, url, queries, **params):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, params)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 300, getattr(response, 'data', None))
+        return response
+
+
+class CarQueryCountTests(QueryCountTestCase):
+    def test_car_list(self):
+        # cars + images, regardless of how many cars there are
+        response = self.get(reverse('car-list'), 2)
+        self.assertEqual(len(response.data), CARS)
+
+    def test_car_list_with_amenities_field(self):
+        self.get(reverse('car-list'), 3, fields='id,name,images,amenities')
+
+    def test_car_list_empty_fields_means_all(self):
+        response = self.get(reverse('car-list'), 2, fields=',')
+        self.assertIn('name', response.data[0])
+
+    def test_car_list_unknown_field_is_rejected(self):
+        response = self.client.get(reverse('car-list'), {'fields': 'id,nope'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nope', str(response.data['fields']))
+
+    def test_serializer_only_filters_fields(self):
+        # Validating ?fields= is the view's job; other callers just get a subset
+        data = CarSerializer(self.cars[0], fields=['id', 'nope']).data
+        self.assertEqual(list(data), ['id'])
+
+    def test_car_list_amenity_filter(self):
+        self.get(reverse('car-list'), 3, amenity='A/C')
+
+    def test_car_detail(self):
+        self.get(reverse('car-detail', args=[self.cars[0].pk]), 3)
+
+    def test_car_image_list(self):
+        self.get(reverse('car-image-list', args=[self.cars[0].pk]), 2)
+
+    def test_car_image_all(self):
+        response = self.get(reverse('car-image-all'), 1)
+        self.assertEqual(len(response.data), CARS * IMAGES_PER_CAR)
+
+    def test_car_image_detail(self):
+        self.get(reverse('car-image-detail', args=[self.cars[0].images.first().pk]), 1)
+
+
+class ContentQueryCountTests(QueryCountTestCase):
+    def test_blog_list(self):
+        self.get(reverse('blog-list'), 1)
+
+    def test_blog_detail(self):
+        self.get(reverse('blog-detail', args=[BlogPost.objects.first().pk]), 1)
+
+    def test_hero_is_memoized(self):
+        self.get(reverse('hero-section'), 1)
+        self.get(reverse('hero-section'), 0)
+
+    def test_hero_stamp_expires(self):
+        self.get(reverse('hero-section'), 1)
+        # Stands in for the TTL running out in a worker that missed a save
+        cache.delete(HERO_VERSION_KEY)
+        self.get(reverse('hero-section'), 1)
+
+    def test_home_document_is_cached(self):
+        self.get(reverse('home'), 4)
+        self.get(reverse('home'), 0)
+
+    def test_search_cars(self):
+        # count + ranked page + cars + their images
+        response = self.get(reverse('search'), 4, q='car', type='car')
+        self.assertTrue(response.data['results'])
+
+    def test_search_blogs(self):
+        response = self.get(reverse('search'), 3, q='safari', type='blog')
+        self.assertTrue(response.data['results'])
+
+
+class CustomerQueryCountTests(QueryCountTestCase):
+    def test_customer_list(self):
+        self.get(reverse('customer-list'), 1)
+
+    def test_customer_detail(self):
+        self.get(reverse('customer-detail', args=[self.customers[0].pk]), 1)
+
+    def test_customer_bookings(self):
+        response = self.get(reverse('customer-bookings', args=[self.customers[0].pk]), 3)
+        self.assertEqual(len(response.data['results']), 3)
+
+
+class InvoiceQueryCountTests(QueryCountTestCase):
+    def test_invoice_list(self):
+        response = self.get(reverse('invoice-list'), 1)
+        self.assertEqual(len(response.data['results']), BOOKINGS // 2)
+
+    def test_invoice_detail(self):
+        self.get(reverse('invoice-detail', args=[Invoice.objects.first().pk]), 1)
+
+    def test_invoices_are_staff_only(self):
+        anonymous = APIClient()
+        self.assertEqual(anonymous.get(reverse('invoice-list')).status_code, 401)
+        self.assertEqual(anonymous.get(reverse('invoice-detail', args=[Invoice.objects.first().pk])).status_code, 401)
+
+    def test_invoice_export(self):
+        # one query per keyset batch, plus the empty batch that ends the scan
+        self.get(reverse('invoice-export'), 2, output='csv')
+
+    def test_invoice_pdf_not_rendered_yet(self):
+        response = self.get(reverse('invoice-pdf', args=[Invoice.objects.first().pk]), 1)
+        self.assertEqual(response.status_code, 202)
+
+    def test_invoice_batch_update(self):
+        ids = list(Invoice.objects.values_list('id', flat=True))
+        payload = {'action': 'update', 'ids': ids, 'status': 'paid'}
+        # SELECT ... FOR UPDATE + one UPDATE, wrapped in a savepoint
+        with self.assertNumQueries(4):
+            response = self.client.post(reverse('invoice-batch'), payload, format='json')
+        self.assertEqual(response.status_code, 200)
+
+
+class BookingQueryCountTests(QueryCountTestCase):
+    def test_booking_list(self):
+        # bookings with customer_info and car joined + extras prefetch
+        response = self.get(reverse('booking-list-create'), 2)
+        self.assertEqual(len(response.data['results']), BOOKINGS)
+
+    def test_booking_detail(self):
+        self.get(reverse('booking-detail', args=[self.bookings[0].reference_code]), 2)
+
+    def test_booking_export(self):
+        # bookings + extras per keyset batch, plus the empty batch that ends the scan
+        self.get(reverse('booking-export'), 3, output='jsonl')
+
+    def test_booking_create(self):
+        payload = {
+            'car': self.cars[0].pk,
+            'rental_start': '2025-06-01',
+            'rental_end': '2025-06-04',
+            'extras': [extra.pk for extra in self.extras],
+            'customer_info': {'full_name': 'New Guest', 'email': 'guest@example.com', 'phone_number': '0712999999'},
+        }
+        with self.assertNumQueries(19):
+            response = self.client.post(reverse('booking-list-create'), payload, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_booking_batch_approve(self):
+        pending = [b.reference_code for b in self.bookings if b.status == 'pending']
+        payload = {'action': 'update', 'reference_codes': pending, 'status': 'approved'}
+        # lock + update, then (in a savepoint) locks on the bookings and their
+        # invoices, one read and one bulk insert for all the invoices
+        with self.assertNumQueries(12):
+            response = self.client.post(reverse('booking-batch'), payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Invoice.objects.filter(booking__isnull=False).count(), len(pending))
+
+    def test_approving_invoiced_booking(self):
+        invoiced = [b for b in self.bookings if b.status == 'approved'][:2]
+        generate_invoices_for_bookings([b.pk for b in invoiced], render=False)
+        # Reopened after invoicing: approving it again must not invoice it twice
+        Booking.objects.filter(pk__in=[b.pk for b in invoiced]).update(status='pending')
+        invoices = Invoice.objects.count()
+
+        response = self.client.patch(
+            reverse('booking-detail', args=[invoiced[0].reference_code]), {'status': 'approved'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        payload = {'action': 'update', 'reference_codes': [invoiced[1].reference_code], 'status': 'approved'}
+        response = self.client.post(reverse('booking-batch'), payload, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['results'][0]['result'], 'updated')
+
+        self.assertEqual(Invoice.objects.count(), invoices)
+        self.assertEqual(Booking.objects.filter(pk__in=[b.pk for b in invoiced], status='approved').count(), 2)
+
+
+class AdminQueryCountTests(QueryCountTestCase):
+    def test_dashboard_stats(self):
+        self.get(reverse('dashboard-stats'), 4)
+
+    def test_metrics(self):
+        self.get(reverse('metrics'), 0)
+
+    def test_bulk_import_extras(self):
+        rows = [{'name': f'Import {i}', 'price': '1.00'} for i in range(50)]
+        with self.assertNumQueries(3):
+            response = self.client.post(
+                reverse('bulk-import', args=['extras']), json.dumps(rows), content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_bulk_import_customers_rejects_existing_email(self):
+        Customer.objects.create(name='Asha', email='Asha@Example.com')
+        rows = [
+            {'name': 'Asha again', 'email': 'asha@example.COM'},
+            {'name': 'New', 'email': 'new@example.com'},
+        ]
+        response = self.client.post(
+            reverse('bulk-import', args=['customers']), json.dumps(rows), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400, response.data)
+        self.assertEqual([error['row'] for error in response.data['errors']], [1])
+        self.assertFalse(Customer.objects.filter(email='new@example.com').exists())
+
+    def test_bulk_import_customers_rejects_duplicates_in_batch(self):
+        rows = [
+            {'name': 'One', 'email': 'dup@example.com'},
+            {'name': 'Two', 'email': 'Dup@Example.com'},
+        ]
+        response = self.client.post(
+            reverse('bulk-import', args=['customers']) + '?partial=1', json.dumps(rows), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'], [{'row': 2, 'errors': {'email': ['Duplicate email in this import.']}}])
+
+
+
+class CustomerMergeTests(TestCase):
+    """
+    Merging is destructive (it repoints invoices and booking links, then
+    deletes rows), so check exactly which records survive and what moves.
+    """
+
+    def setUp(self):
+        self.car = Car.objects.create(name='Car', seats=5, location='Arusha', price_per_day=80)
+        self.day = datetime.date(2025, 3, 1)
+
+    def booking_info(self, customer=None, email='guest@example.com', phone='0712345678', name='Guest'):
+        booking = Booking.objects.create(
+            car=self.car, rental_start=self.day, rental_end=self.day + datetime.timedelta(days=2),
+        )
+        return BookingCustomerInfo.objects.create(
+            booking=booking, customer=customer, full_name=name, email=email, phone_number=phone,
+        )
+
+    def invoice(self, customer):
+        return Invoice.objects.create(
+            customer=customer, car=self.car, rental_start=self.day, rental_end=self.day, amount=80,
+        )
+
+    def test_merge_by_email_case(self):
+        survivor = Customer.objects.create(name='Asha', email='asha@example.com')
+        duplicate = Customer.objects.create(
+            name='Asha M', email='Asha@Example.com', phone_number='0712345678', address='Arusha',
+        )
+        other = Customer.objects.create(name='Other', email='other@example.com')
+        invoice = self.invoice(duplicate)
+        info = self.booking_info(duplicate, email='Asha@Example.com')
+
+        self.assertEqual(merge_duplicate_customers('email_key'), 1)
+
+        # The oldest record survives and takes the blank contact fields
+        self.assertFalse(Customer.objects.filter(pk=duplicate.pk).exists())
+        survivor.refresh_from_db()
+        self.assertEqual((survivor.email, survivor.phone_number, survivor.address), ('asha@example.com', '0712345678', 'Arusha'))
+        self.assertEqual(survivor.phone_key, '255712345678')
+        invoice.refresh_from_db()
+        info.refresh_from_db()
+        self.assertEqual((invoice.customer_id, info.customer_id), (survivor.pk, survivor.pk))
+        self.assertTrue(Customer.objects.filter(pk=other.pk).exists())
+
+    def test_merge_by_phone_format(self):
+        survivor = Customer.objects.create(name='Juma', email='juma@example.com', phone_number='0712 345 678')
+        duplicate = Customer.objects.create(name='Juma', email='juma.work@example.com', phone_number='+255712345678')
+        invoice = self.invoice(duplicate)
+
+        # Phone merging is opt-in: the emails differ
+        self.assertEqual(merge_duplicate_customers('email_key'), 0)
+        self.assertEqual(merge_duplicate_customers('phone_key'), 1)
+
+        self.assertEqual(list(Customer.objects.values_list('pk', flat=True)), [survivor.pk])
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.customer_id, survivor.pk)
+
+    def test_link_guest_bookings(self):
+        known = Customer.objects.create(name='Known', email='known@example.com', phone_number='0711000000')
+        by_email = self.booking_info(email='KNOWN@example.com', phone='0799999999')
+        by_phone = self.booking_info(email='', phone='+255 711 000 000')
+        guest = self.booking_info(email='new@example.com', name='New Guest')
+        repeat = self.booking_info(email='New@Example.com', name='New Guest')
+
+        self.assertEqual(link_guest_bookings(), 4)
+
+        for info in (by_email, by_phone, guest, repeat):
+            info.refresh_from_db()
+        self.assertEqual((by_email.customer_id, by_phone.customer_id), (known.pk, known.pk))
+        # One customer is created per new guest, shared by their bookings
+        self.assertEqual(guest.customer_id, repeat.customer_id)
+        self.assertEqual(guest.customer.name, 'New Guest')
+        self.assertEqual(Customer.objects.count(), 2)
+        self.assertEqual(link_guest_bookings(), 0)
+
+    def test_upsert_customer_is_idempotent(self):
+        first = upsert_customer('Neema', 'Neema@Example.com', '')
+        self.assertEqual(upsert_customer('Neema', ' neema@example.com', '0712000001'), first)
+        self.assertEqual(upsert_customer('Neema', 'other@example.com', '+255 712 000 001'), first)
+        self.assertEqual(Customer.objects.count(), 1)
+        first.refresh_from_db()
+        # A missing phone is filled in from a later booking
+        self.assertEqual((first.phone_number, first.phone_key), ('0712000001', '255712000001'))
+
+    def test_migration_backfills_keys(self):
+        # Rows saved before 0010 have blank keys until 0013 runs
+        existing = Customer.objects.create(name='Asha', email='Asha@Example.com', phone_number='0712345678')
+        info = self.booking_info(email='Guest@Example.com')
+        Customer.objects.update(email_key='', phone_key='')
+        BookingCustomerInfo.objects.update(email_key='', phone_key='')
+
+        migration = importlib.import_module('backend.api.migrations.0013_backfill_customer_keys')
+        migration.backfill_customer_keys(apps, None)
+
+        info.refresh_from_db()
+        self.assertEqual((info.email_key, info.phone_key), ('guest@example.com', '255712345678'))
+        self.assertEqual(upsert_customer('Asha', 'asha@example.com', ''), existing)
+        self.assertEqual(Customer.objects.count(), 1)
+
+
+
+class SchedulingTests(TestCase):
+
+    def test_live_lease_blocks_other_owners(self):
+        self.assertTrue(acquire_lock('job', 'node-a'))
+        self.assertFalse(acquire_lock('job', 'node-b'))
+        # Renewing our own lease is allowed
+        self.assertTrue(acquire_lock('job', 'node-a'))
+
+    def test_expired_lease_is_taken_over(self):
+        self.assertTrue(acquire_lock('job', 'node-a', ttl=datetime.timedelta(seconds=-1)))
+        self.assertTrue(acquire_lock('job', 'node-b'))
+        self.assertEqual(JobLock.objects.get(name='job').owner, 'node-b')
+
+    def test_job_lock_releases(self):
+        with job_lock('job') as acquired:
+            self.assertTrue(acquired)
+            self.assertFalse(acquire_lock('job', 'someone-else'))
+        lock = JobLock.objects.get(name='job')
+        self.assertEqual(lock.owner, '')
+        self.assertIsNotNone(lock.last_run_at)
+        self.assertTrue(acquire_lock('job', 'someone-else'))
+
+    def test_transitions_skip_when_locked(self):
+        acquire_lock(TRANSITIONS_LOCK, 'other-node')
+        self.assertIsNone(run_status_transitions(datetime.date(2025, 3, 10)))
+
+    def test_status_transitions(self):
+        today = datetime.date(2025, 3, 10)
+        day = datetime.timedelta(days=1)
+
+        def car(name, status='available'):
+            return Car.objects.create(name=name, seats=5, location='Arusha', price_per_day=80, status=status)
+
+        def booking(car, start, end, status='approved'):
+            return Booking.objects.create(car=car, rental_start=start, rental_end=end, status=status)
+
+        renting, returned, idle, serviced = car('Renting'), car('Returned', 'booked'), car('Idle'), car('Serviced', 'maintenance')
+        finished = booking(returned, today - 5 * day, today - day)
+        ends_today = booking(renting, today - day, today)
+        unapproved = booking(idle, today - day, today + day, status='pending')
+        old_pending = booking(idle, today - 9 * day, today - 8 * day, status='pending')
+        cancelled = booking(idle, today - 9 * day, today - 8 * day, status='cancelled')
+        booking(serviced, today, today + day)
+
+        counts = run_status_transitions(today)
+        self.assertEqual(counts, {'bookings_completed': 1, 'cars_booked': 1, 'cars_released': 1})
+
+        statuses = dict(Booking.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[finished.pk], 'completed')
+        # Still running today, and never approved: untouched
+        self.assertEqual(statuses[ends_today.pk], 'approved')
+        self.assertEqual(
+            [statuses[b.pk] for b in (unapproved, old_pending, cancelled)], ['pending', 'pending', 'cancelled'],
+        )
+
+        cars = dict(Car.objects.values_list('name', 'status'))
+        self.assertEqual(cars, {'Renting': 'booked', 'Returned': 'available', 'Idle': 'available', 'Serviced': 'maintenance'})
+
+        # Idempotent
+        self.assertEqual(run_status_transitions(today), {'bookings_completed': 0, 'cars_booked': 0, 'cars_released': 0})
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    The test settings mirror a 'replica' alias onto the test database, so
+    routing is visible as queries on one alias or the other. Transactional
+    because the replica connection only sees committed rows.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user('admin', password='pass', is_staff=True, is_superuser=True)
+        self.car = Car.objects.create(name='Car', seats=5, location='Arusha', price_per_day=80)
+        CarImage.objects.create(car=self.car, image='cars/car.jpg', is_primary=True)
+        self.client = APIClient()
+
+    def test_public_get_reads_from_replica(self):
+        with self.assertNumQueries(0), self.assertNumQueries(2, using='replica'):
+            response = self.client.get(reverse('car-list'))
+        self.assertEqual(response.data[0]['name'], 'Car')
+
+    def test_write_pins_client_to_primary(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch(reverse('car-detail', args=[self.car.pk]), {'name': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(ReplicaRoutingMiddleware.cookie_name, response.cookies)
+
+        with self.assertNumQueries(0, using='replica'):
+            response = self.client.get(reverse('car-detail', args=[self.car.pk]))
+        self.assertEqual(response.data['name'], 'Renamed')
+
+    def test_failed_write_does_not_pin(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch(reverse('car-detail', args=[self.car.pk]), {'seats': 'many'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn(ReplicaRoutingMiddleware.cookie_name, response.cookies)
+
+    def test_token_authenticated_reads_use_primary(self):
+        # A cross-origin admin app sends its JWT but never the pin cookie
+        token = AccessToken.for_user(self.admin)
+        with self.assertNumQueries(0, using='replica'):
+            response = self.client.get(reverse('car-list'), HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_private_views_read_from_primary(self):
+        self.client.force_authenticate(self.admin)
+        with self.assertNumQueries(0, using='replica'):
+            self.client.get(reverse('dashboard-stats'))
+
+    def test_cached_documents_are_built_from_primary(self):
+        with self.assertNumQueries(0, using='replica'):
+            self.client.get(reverse('home'))
+
+    def test_router_defaults_to_primary(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Car), 'default')
+        self.assertEqual(router.db_for_write(Car), 'default')
+        with use_primary():
+            self.assertEqual(router.db_for_read(Car), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'api'))
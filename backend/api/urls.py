@@ -15,21 +15,39 @@ urlpatterns = [
     path('blogs/', BlogList.as_view(), name='blog-list'),
     path('blogs/<int:pk>/', BlogDetails.as_view(), name='blog-detail'),
 
+    # Home page (hero + featured blogs + car showcase)
+    path('home/', HomePageView.as_view(), name='home'),
+
+    # Search (cars + blogs)
+    path('search/', SearchView.as_view(), name='search'),
+
     # Hero Section (singleton)
     path('hero/', HeroSectionView.as_view(), name='hero-section'),
 
     # Customers
     path('customers/', CustomerList.as_view(), name='customer-list'),
     path('customers/<int:pk>/', CustomerDetail.as_view(), name='customer-detail'),
+    path('customers/<int:pk>/bookings/', CustomerBookings.as_view(), name='customer-bookings'),
 
    # Invoices
     path('invoices/', InvoiceList.as_view(), name='invoice-list'),
+    path('invoices/batch/', InvoiceBatch.as_view(), name='invoice-batch'),
+    path('invoices/export/', InvoiceExport.as_view(), name='invoice-export'),
     path('invoices/<int:pk>/', InvoiceDetail.as_view(), name='invoice-detail'),
+    path('invoices/<int:pk>/pdf/', InvoicePDF.as_view(), name='invoice-pdf'),
 
     # Bookings
     path('bookings/', BookingListCreate.as_view(), name='booking-list-create'),
+    path('bookings/batch/', BookingBatch.as_view(), name='booking-batch'),
+    path('bookings/export/', BookingExport.as_view(), name='booking-export'),
     path('bookings/<str:reference_code>/', BookingDetail.as_view(), name='booking-detail'),
 
+    # Bulk import (cars, customers, extras)
+    path('import/<str:kind>/', BulkImportView.as_view(), name='bulk-import'),
+
     # Dashboard
     path('dashboard/stats/', DashboardSummaryView.as_view(), name='dashboard-stats'),
+
+    # Request metrics (query counts, timings; staff only)
+    path('_metrics/', MetricsView.as_view(), name='metrics'),
 ]
@@ -0,0 +1,27 @@
+import re
+
+from django.conf import settings
+
+
+NON_DIGITS_RE = re.compile(r"\D")
+
+
+def normalize_email(value):
+    """
+    Lookup key for an email address: trimmed and lowercased.
+    """
+    return (value or '').strip().lower()
+
+
+def normalize_phone(value):
+    """
+    Lookup key for a phone number: digits only, in international form
+    without the leading '+' (the same shape WhatsApp uses for `from`).
+    Local numbers ("0712 345 678") get DEFAULT_PHONE_COUNTRY_CODE.
+    """
+    digits = NON_DIGITS_RE.sub('', value or '')
+    if digits.startswith('00'):
+        digits = digits[2:]
+    elif digits.startswith('0') and len(digits) == 10:
+        digits = settings.DEFAULT_PHONE_COUNTRY_CODE + digits[1:]
+    return digits[:20]
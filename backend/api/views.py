@@ -1,23 +1,97 @@
+from decimal import Decimal
+
+from django.conf import settings
 from .models import *
 from .serializers import *
-from django.http import Http404
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.http import FileResponse, Http404
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import serializers, status
 from django.shortcuts import get_object_or_404
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from .batch import apply_delete, apply_status_update
+from .caching import HERO_SINGLETON_PK, get_hero_section, get_home_document
+from .exports import EXPORT_FORMATS, iterate_batches, stream_export
+from .filters import filter_bookings, filter_invoices
+from .importers import IMPORT_SERIALIZERS, import_rows, parse_rows
+from .invoicing import cached_pdf_path, enqueue_pdf_render, generate_invoices_for_bookings
+from .metrics import registry as metrics_registry
+from .pagination import CreatedAtCursorPagination, SearchPagination
+from .search import SEARCH_FIELDS, search_queryset
 from .permissions import IsAdminFull, IsStaffOrAdmin, IsAdminOrReadOnly, BookingPermission
 
+
+def get_sparse_fields(request, serializer_class):
+    """
+    Parse the `?fields=a,b,c` sparse-fieldset query parameter for
+    `serializer_class`. Returns None when the client did not ask for a subset
+    (including an empty list such as `?fields=,`). Names the serializer does
+    not declare are a 400, not an empty object.
+    """
+    raw = request.query_params.get('fields') or ''
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    if not fields:
+        return None
+    unknown = set(fields) - set(serializer_class().fields)
+    if unknown:
+        raise serializers.ValidationError({'fields': [f"Unknown field(s): {', '.join(sorted(unknown))}."]})
+    return fields
+
+
+def only_fields(queryset, serializer_class, fields=None):
+    """
+    Restrict the SELECT to the concrete columns the serializer will render,
+    so list endpoints do not read heavy text columns they never ship.
+    """
+    wanted = fields if fields is not None else getattr(serializer_class.Meta, 'fields', '__all__')
+    if wanted == '__all__':
+        return queryset
+
+    model = queryset.model
+    concrete = {field.name for field in model._meta.concrete_fields}
+    columns = [name for name in wanted if name in concrete]
+    return queryset.only(model._meta.pk.name, *columns)
+
+def filter_by_amenities(cars, raw):
+    """
+    Apply `?amenity=4WD,A/C`: cars that have every listed amenity.
+    Names resolve against the small Amenity table, then each filter is a join
+    on the indexed (car_id, amenity_id) through table.
+    """
+    if not raw:
+        return cars
+    for name in filter(None, (part.strip() for part in raw.split(','))):
+        amenity = Amenity.objects.filter(name__iexact=name).only('pk').first()
+        if amenity is None:
+            return cars.none()
+        cars = cars.filter(amenities=amenity)
+    return cars
+
+
 # --- CARS ---
 # GET -> Public
 # POST/PUT/DELETE -> Admin Only
 
 class CarList(APIView):
     permission_classes = [IsAdminOrReadOnly]
+    read_from_replica = True
     
     def get(self, request, format=None):
-        cars = Car.objects.all()
-        serializer = CarSerializer(cars, many=True)
+        fields = get_sparse_fields(request, CarSerializer)
+        # Compact card representation unless the client picks its own fields
+        serializer_class = CarSerializer if fields else CarListSerializer
+
+        cars = only_fields(Car.objects.all(), serializer_class, fields)
+        cars = filter_by_amenities(cars, request.query_params.get('amenity'))
+        if fields is None or 'images' in fields:
+            cars = cars.prefetch_related('images')
+        if fields and 'amenities' in fields:
+            cars = cars.prefetch_related('amenities')
+
+        serializer = serializer_class(cars, many=True, fields=fields)
         return Response(serializer.data)
     
     def post(self, request, format=None):
@@ -30,6 +104,7 @@ class CarList(APIView):
 
 class CarDetails(APIView):
     permission_classes = [IsAdminOrReadOnly]
+    read_from_replica = True
 
     def get_object(self, pk):
         try:
@@ -38,8 +113,8 @@ class CarDetails(APIView):
             raise Http404
         
     def get(self, request, pk, format=None):
-        car = self.get_object(pk)
-        serializer = CarSerializer(car)
+        car = get_object_or_404(Car.objects.prefetch_related('images', 'amenities'), pk=pk)
+        serializer = CarSerializer(car, fields=get_sparse_fields(request, CarSerializer))
         return Response(serializer.data)
     
     def put(self, request, pk, format=None):
@@ -74,10 +149,14 @@ class CarDetails(APIView):
 
 class BlogList(APIView):
     permission_classes = [IsAdminOrReadOnly]
+    read_from_replica = True
 
     def get(self, request, format=None):
-        blogs = BlogPost.objects.all()
-        serializer = BlogPostSerializer(blogs, many=True, context={'request': request})
+        fields = get_sparse_fields(request, BlogPostSerializer)
+        serializer_class = BlogPostSerializer if fields else BlogPostListSerializer
+
+        blogs = only_fields(BlogPost.objects.all(), serializer_class, fields)
+        serializer = serializer_class(blogs, many=True, context={'request': request}, fields=fields)
         return Response(serializer.data)
     
     def post(self, request, format=None):
@@ -90,6 +169,7 @@ class BlogList(APIView):
 
 class BlogDetails(APIView):
     permission_classes = [IsAdminOrReadOnly]
+    read_from_replica = True
 
     def get_object(self, pk):
         try:
@@ -99,7 +179,7 @@ class BlogDetails(APIView):
         
     def get(self, request, pk, format=None):
         blog = self.get_object(pk)
-        serializer = BlogPostSerializer(blog, context={'request': request})
+        serializer = BlogPostSerializer(blog, context={'request': request}, fields=get_sparse_fields(request, BlogPostSerializer))
         return Response(serializer.data)
     
     def put(self, request, pk, format=None):
@@ -122,15 +202,17 @@ class BlogDetails(APIView):
 
 class HeroSectionView(APIView):
     permission_classes = [IsAdminOrReadOnly]
+    read_from_replica = True
 
     def get_object(self):
-        # Ensure at least one object exists
-        hero, created = HeroSection.objects.get_or_create(id=1) 
+        # Ensure at least one object exists (write path only)
+        hero, created = HeroSection.objects.get_or_create(id=HERO_SINGLETON_PK)
         return hero
     
     def get(self, request, format=None):
-        hero = self.get_object()
-        serializer = HeroSectionSerializer(hero)
+        # Memoized, read-only: no queries in the steady state
+        hero = get_hero_section()
+        serializer = HeroSectionSerializer(hero, fields=get_sparse_fields(request, HeroSectionSerializer))
         return Response(serializer.data)
     
     def patch(self, request, format=None):
@@ -142,17 +224,80 @@ class HeroSectionView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+# --- HOME PAGE ---
+# GET -> Public
+
+class HomePageView(APIView):
+    """
+    Hero, featured blogs and a car showcase in a single round trip.
+    Served from one precomputed cached document, invalidated by model signals.
+    """
+    permission_classes = [AllowAny]
+    read_from_replica = True
+
+    def get(self, request, format=None):
+        return Response(get_home_document())
+
+
+# --- SEARCH ---
+# GET -> Public
+
+class SearchView(APIView):
+    """
+    Ranked search over cars and blog posts: `?q=<text>&type=car|blog&page=N`.
+    Uses MySQL FULLTEXT indexes when available, the SearchTerm index otherwise.
+    """
+    permission_classes = [AllowAny]
+    read_from_replica = True
+
+    def get(self, request, format=None):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'q': ['This query parameter is required.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        kind = request.query_params.get('type')
+        if kind and kind not in SEARCH_FIELDS:
+            return Response({'type': [f'Must be one of: {", ".join(SEARCH_FIELDS)}.']}, status=status.HTTP_400_BAD_REQUEST)
+        kinds = [kind] if kind else list(SEARCH_FIELDS)
+
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(search_queryset(query, kinds), request, view=self)
+
+        # Hydrate only the rows on this page, one query per kind
+        ids = {k: [row['object_id'] for row in page if row['kind'] == k] for k in kinds}
+        objects = {
+            'car': Car.objects.only(*[f for f in CarListSerializer.Meta.fields if f != 'images'])
+                              .prefetch_related('images').in_bulk(ids.get('car', [])),
+            'blog': BlogPost.objects.only(*BlogPostListSerializer.Meta.fields).in_bulk(ids.get('blog', [])),
+        }
+        serializers_by_kind = {'car': CarListSerializer, 'blog': BlogPostListSerializer}
+
+        results = []
+        for row in page:
+            instance = objects[row['kind']].get(row['object_id'])
+            if instance is None:
+                continue  # deleted between the ranking and hydration queries
+            serializer = serializers_by_kind[row['kind']](instance, context={'request': request})
+            results.append({
+                'type': row['kind'],
+                'score': float(row['score']),
+                'object': serializer.data,
+            })
+        return paginator.get_paginated_response(results)
+
+
 # --- CAR IMAGES ---
 # GET -> Public
 # POST/PATCH/DELETE -> Admin Only
 
 class CarImageList(APIView):
     permission_classes = [IsAdminOrReadOnly]
+    read_from_replica = True
 
     def get(self, request, car_id):
         car = get_object_or_404(Car, pk=car_id)
         images = car.images.all()
-        serializer = CarImageSerializer(images, many=True)
+        serializer = CarImageSerializer(images, many=True, fields=get_sparse_fields(request, CarImageSerializer))
         return Response(serializer.data)
 
     def post(self, request, car_id):
@@ -165,13 +310,14 @@ class CarImageList(APIView):
         
 class CarImageDetail(APIView):
     permission_classes = [IsAdminOrReadOnly]
+    read_from_replica = True
 
     def get_object(self, pk):
         return get_object_or_404(CarImage, pk=pk)
 
     def get(self, request, pk):
         image = self.get_object(pk)
-        serializer = CarImageSerializer(image)
+        serializer = CarImageSerializer(image, fields=get_sparse_fields(request, CarImageSerializer))
         return Response(serializer.data)
 
     def patch(self, request, pk):
@@ -190,10 +336,12 @@ class CarImageDetail(APIView):
 
 class CarImageAllList(APIView):
     permission_classes = [IsAdminOrReadOnly]
+    read_from_replica = True
 
     def get(self, request):
-        images = CarImage.objects.all()
-        serializer = CarImageSerializer(images, many=True)
+        fields = get_sparse_fields(request, CarImageSerializer)
+        images = only_fields(CarImage.objects.all(), CarImageSerializer, fields)
+        serializer = CarImageSerializer(images, many=True, fields=fields)
         return Response(serializer.data)
 
 
@@ -204,8 +352,9 @@ class CustomerList(APIView):
     permission_classes = [IsStaffOrAdmin]
 
     def get(self, request):
-        customers = Customer.objects.all()
-        serializer = CustomerSerializer(customers, many=True)
+        fields = get_sparse_fields(request, CustomerSerializer)
+        customers = only_fields(Customer.objects.all(), CustomerSerializer, fields)
+        serializer = CustomerSerializer(customers, many=True, fields=fields)
         return Response(serializer.data)
 
     def post(self, request):
@@ -224,7 +373,7 @@ class CustomerDetail(APIView):
 
     def get(self, request, pk):
         customer = self.get_object(pk)
-        serializer = CustomerSerializer(customer)
+        serializer = CustomerSerializer(customer, fields=get_sparse_fields(request, CustomerSerializer))
         return Response(serializer.data)
 
     def patch(self, request, pk):
@@ -241,20 +390,48 @@ class CustomerDetail(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class CustomerBookings(APIView):
+    """
+    Every booking made by one customer (guest bookings are linked by
+    normalized email/phone), newest first, keyset-paginated.
+    """
+    permission_classes = [IsStaffOrAdmin]
+
+    def get(self, request, pk):
+        customer = get_object_or_404(Customer.objects.only('pk'), pk=pk)
+        bookings = (
+            Booking.objects.filter(customer_info__customer=customer)
+            .select_related('customer_info', 'car')
+            .prefetch_related('extras')
+        )
+
+        paginator = CreatedAtCursorPagination()
+        page = paginator.paginate_queryset(bookings, request, view=self)
+        serializer = BookingSerializer(page, many=True, fields=get_sparse_fields(request, BookingSerializer))
+        return paginator.get_paginated_response(serializer.data)
+
+
 # --- INVOICES ---
-# GET -> Public
-# POST/PATCH/DELETE -> Staff or Admin Only
+# All methods -> Staff or Admin Only (invoices name the customer, car and amount)
 
 class InvoiceList(APIView):
-    def get_permissions(self):
-        if self.request.method == 'GET':
-            return [AllowAny()]
-        return [IsStaffOrAdmin()]
+    permission_classes = [IsStaffOrAdmin]
 
     def get(self, request):
-        invoices = Invoice.objects.select_related('customer', 'car')
-        serializer = InvoiceSerializer(invoices, many=True)
-        return Response(serializer.data)
+        """
+        Keyset-paginated invoice list.
+        Filters: ?status=, ?customer=, ?car=, ?created_after=, ?created_before=
+        """
+        fields = get_sparse_fields(request, InvoiceSerializer)
+        invoices = filter_invoices(
+            Invoice.objects.select_related('customer', 'car'),
+            request.query_params,
+        )
+
+        paginator = CreatedAtCursorPagination()
+        page = paginator.paginate_queryset(invoices, request, view=self)
+        serializer = InvoiceSerializer(page, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         serializer = InvoiceSerializer(data=request.data)
@@ -265,17 +442,14 @@ class InvoiceList(APIView):
 
 
 class InvoiceDetail(APIView):
-    def get_permissions(self):
-        if self.request.method == 'GET':
-            return [AllowAny()]
-        return [IsStaffOrAdmin()]
+    permission_classes = [IsStaffOrAdmin]
 
     def get_object(self, pk):
-        return get_object_or_404(Invoice, pk=pk)
+        return get_object_or_404(Invoice.objects.select_related('customer', 'car'), pk=pk)
 
     def get(self, request, pk):
         invoice = self.get_object(pk)
-        serializer = InvoiceSerializer(invoice)
+        serializer = InvoiceSerializer(invoice, fields=get_sparse_fields(request, InvoiceSerializer))
         return Response(serializer.data)
 
     def patch(self, request, pk):
@@ -292,6 +466,110 @@ class InvoiceDetail(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class InvoiceBatch(APIView):
+    """
+    Batch create/update/delete for invoices, applied in one transaction:
+    {"action": "update", "ids": [1, 2], "status": "paid"}
+    {"action": "delete", "ids": [1, 2]}
+    {"action": "create", "items": [{...invoice fields...}, ...]}
+    Returns one result per item.
+    """
+    permission_classes = [IsStaffOrAdmin]
+
+    def post(self, request):
+        serializer = InvoiceBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if data['action'] == 'create':
+            return self.create_invoices(data['items'])
+        if data['action'] == 'delete':
+            results = apply_delete(Invoice.objects.all(), 'id', data['ids'])
+        else:
+            results, changed_ids = apply_status_update(
+                Invoice.objects.all(), 'id', data['ids'], data['status'],
+                version=F('version') + 1,
+            )
+            enqueue_pdf_render(changed_ids)
+        return Response({'results': results})
+
+    def create_invoices(self, items):
+        child = InvoiceSerializer()
+        validated, errors = [], []
+        for index, item in enumerate(items):
+            try:
+                validated.append(child.run_validation(item))
+            except serializers.ValidationError as exc:
+                errors.append({'index': index, 'errors': exc.detail})
+        if errors:
+            return Response({'results': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        invoices = [Invoice(**data) for data in validated]
+        with transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                Invoice.objects.bulk_create(invoices)
+            else:
+                # MySQL does not return ids from a multi-row INSERT
+                for invoice in invoices:
+                    invoice.save()
+        results = [{'index': index, 'result': 'created', 'id': invoice.pk} for index, invoice in enumerate(invoices)]
+        return Response({'results': results}, status=status.HTTP_201_CREATED)
+
+
+class InvoicePDF(APIView):
+    """
+    Download the rendered invoice PDF. PDFs are rendered in the background
+    after the invoice changes; if the current version is not on disk yet the
+    render is queued and the client is told to retry.
+    """
+    permission_classes = [IsStaffOrAdmin]
+
+    def get(self, request, pk):
+        invoice = get_object_or_404(Invoice.objects.only('id', 'version'), pk=pk)
+        path = cached_pdf_path(invoice)
+        if path is None:
+            enqueue_pdf_render([invoice.pk])
+            return Response(
+                {'detail': 'Invoice PDF is being generated.'},
+                status=status.HTTP_202_ACCEPTED,
+                headers={'Retry-After': '5'},
+            )
+        return FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=f"invoice-{invoice.pk}.pdf",
+            content_type='application/pdf',
+        )
+
+
+class InvoiceExport(APIView):
+    """
+    Streaming month-end export: ?output=csv|jsonl plus the invoice list filters.
+    Rows are read in keyset batches and written as they are produced, so
+    memory stays flat regardless of the number of invoices.
+    """
+    permission_classes = [IsStaffOrAdmin]
+
+    columns = [
+        'id', 'customer_id', 'customer_name', 'customer_email', 'car_id', 'car_name',
+        'rental_start', 'rental_end', 'amount', 'status', 'created_at',
+    ]
+
+    def get(self, request):
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response({'output': [f'Must be one of: {", ".join(EXPORT_FORMATS)}.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        invoices = filter_invoices(Invoice.objects.all(), request.query_params).values(
+            'id', 'customer_id', 'car_id', 'rental_start', 'rental_end', 'amount', 'status', 'created_at',
+            customer_name=F('customer__name'),
+            customer_email=F('customer__email'),
+            car_name=F('car__name'),
+        )
+        rows = (row for batch in iterate_batches(invoices) for row in batch)
+        return stream_export(rows, self.columns, export_format, 'invoices')
+
+
 # --- BOOKINGS ---
 # POST -> Public (create booking)
 # GET/PATCH/DELETE -> Staff or Admin Only
@@ -308,9 +586,20 @@ class BookingListCreate(APIView):
         return [IsStaffOrAdmin()]
 
     def get(self, request):
-        bookings = Booking.objects.all().order_by('-created_at')
-        serializer = BookingSerializer(bookings, many=True)
-        return Response(serializer.data)
+        """
+        Keyset-paginated staff booking table.
+        Filters: ?status=, ?car=, ?rental_start_after=, ?rental_start_before=
+        """
+        fields = get_sparse_fields(request, BookingSerializer)
+        bookings = filter_bookings(
+            Booking.objects.select_related('customer_info', 'car').prefetch_related('extras'),
+            request.query_params,
+        )
+
+        paginator = CreatedAtCursorPagination()
+        page = paginator.paginate_queryset(bookings, request, view=self)
+        serializer = BookingSerializer(page, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         """
@@ -343,13 +632,17 @@ class BookingDetail(APIView):
         return get_object_or_404(Booking, reference_code=reference_code)
 
     def get(self, request, reference_code):
-        booking = self.get_object(reference_code)
+        booking = get_object_or_404(
+            Booking.objects.select_related('customer_info', 'car').prefetch_related('extras'),
+            reference_code=reference_code,
+        )
         
         # Use Public serializer for anon users, full for staff/admin
         if request.user and (request.user.is_staff or request.user.is_superuser):
-            serializer = BookingSerializer(booking)
+            serializer_class = BookingSerializer
         else:
-            serializer = PublicBookingSerializer(booking)
+            serializer_class = PublicBookingSerializer
+        serializer = serializer_class(booking, fields=get_sparse_fields(request, serializer_class))
             
         return Response(serializer.data)
 
@@ -357,7 +650,11 @@ class BookingDetail(APIView):
         booking = self.get_object(reference_code)
         serializer = BookingSerializer(booking, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            # Approval and its invoice commit (or fail) together
+            with transaction.atomic():
+                booking = serializer.save()
+                if booking.status == 'approved':
+                    generate_invoices_for_bookings([booking.pk])
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -367,6 +664,135 @@ class BookingDetail(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class BookingBatch(APIView):
+    """
+    Batch status change or delete for bookings, e.g. after the daily review:
+    {"action": "update", "reference_codes": ["BOOK-...", ...], "status": "approved"}
+    {"action": "delete", "reference_codes": [...]}
+    One UPDATE ... WHERE id IN (...) in one transaction; pricing is untouched.
+    Returns one result per reference code.
+    """
+    permission_classes = [IsStaffOrAdmin]
+
+    def post(self, request):
+        serializer = BookingBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if data['action'] == 'delete':
+            results = apply_delete(Booking.objects.all(), 'reference_code', data['reference_codes'])
+        else:
+            # Approval and its invoices commit (or fail) together
+            with transaction.atomic():
+                results, changed_ids = apply_status_update(
+                    Booking.objects.all(), 'reference_code', data['reference_codes'], data['status'],
+                    updated_at=timezone.now(),
+                )
+                if data['status'] == 'approved':
+                    generate_invoices_for_bookings(changed_ids)
+        return Response({'results': results})
+
+
+class BookingExport(APIView):
+    """
+    Streaming reporting export of bookings joined with customer info, car and
+    aggregated extras: ?output=csv|jsonl plus the booking list filters.
+    Each keyset batch costs two queries (bookings + their extras).
+    """
+    permission_classes = [IsStaffOrAdmin]
+
+    columns = [
+        'id', 'reference_code', 'status', 'created_at', 'rental_start', 'rental_end',
+        'pickup_location', 'dropoff_location', 'car_id', 'car_name', 'price_per_day',
+        'customer_name', 'customer_email', 'customer_phone', 'extras', 'extras_total', 'total_price',
+    ]
+
+    def get(self, request):
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response({'output': [f'Must be one of: {", ".join(EXPORT_FORMATS)}.']}, status=status.HTTP_400_BAD_REQUEST)
+
+        bookings = filter_bookings(Booking.objects.all(), request.query_params).values(
+            'id', 'reference_code', 'status', 'created_at', 'rental_start', 'rental_end',
+            'pickup_location', 'dropoff_location', 'car_id', 'total_price',
+            car_name=F('car__name'),
+            price_per_day=F('car__price_per_day'),
+            customer_name=F('customer_info__full_name'),
+            customer_email=F('customer_info__email'),
+            customer_phone=F('customer_info__phone_number'),
+        )
+        return stream_export(self.iter_rows(bookings), self.columns, export_format, 'bookings')
+
+    def iter_rows(self, bookings):
+        for batch in iterate_batches(bookings):
+            extras = {}
+            selected = Booking.extras.through.objects.filter(
+                booking_id__in=[row['id'] for row in batch]
+            ).values_list('booking_id', 'extra__name', 'extra__price')
+            for booking_id, name, price in selected:
+                extras.setdefault(booking_id, []).append((name, price))
+
+            for row in batch:
+                chosen = extras.get(row['id'], [])
+                row['extras'] = '; '.join(name for name, _ in chosen)
+                row['extras_total'] = sum((price for _, price in chosen), Decimal('0'))
+                yield row
+
+
+# --- BULK IMPORT ---
+# POST -> Admin Only
+
+def is_truthy(value):
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+class BulkImportView(APIView):
+    """
+    Bulk import for cars, customers and extras:
+    POST /api/import/<kind>/ with a CSV/JSON `file` upload or a JSON list body.
+    - ?partial=1: insert the valid rows even if some rows fail
+    - ?dry_run=1: validate only
+    """
+    permission_classes = [IsAdminFull]
+
+    def post(self, request, kind):
+        if kind not in IMPORT_SERIALIZERS:
+            raise Http404
+
+        upload = request.FILES.get('file')
+        try:
+            if upload:
+                file_format = 'json' if upload.name.lower().endswith('.json') else 'csv'
+                rows = parse_rows(upload.read().decode('utf-8-sig'), file_format)
+            elif isinstance(request.data, list) and all(isinstance(row, dict) for row in request.data):
+                rows = request.data
+            else:
+                return Response(
+                    {'detail': 'Upload a CSV/JSON `file` or send a JSON list of rows.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        except (ValueError, UnicodeDecodeError) as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        partial = is_truthy(request.query_params.get('partial'))
+        try:
+            result = import_rows(
+                kind, rows,
+                partial=partial,
+                dry_run=is_truthy(request.query_params.get('dry_run')),
+            )
+        except IntegrityError:
+            # A row created since validation (e.g. a concurrent import); nothing was written
+            return Response(
+                {'detail': 'Some rows conflict with records created during the import; retry it.'},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        if result['errors'] and not partial:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK)
+
+
 class DashboardSummaryView(APIView):
     """
     API View to return counts for Car, Booking, Invoice, and Customer models.
@@ -382,3 +808,24 @@ class DashboardSummaryView(APIView):
             "customers": Customer.objects.count(),
         }
         return Response(data, status=status.HTTP_200_OK)
+
+
+# --- METRICS ---
+
+class MetricsView(APIView):
+    """
+    Per-view request metrics collected by QueryMetricsMiddleware in this
+    worker process: p50/p95/p99/max of latency, DB time, view and render
+    time, query count and response size. DELETE clears the samples.
+    """
+    permission_classes = [IsStaffOrAdmin]
+
+    def get(self, request):
+        return Response({
+            'enabled': settings.API_METRICS_ENABLED,
+            'views': metrics_registry.snapshot(),
+        })
+
+    def delete(self, request):
+        metrics_registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -11,6 +11,8 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings.prod")
+# Under ASGI the WhatsApp webhook awaits the Graph API instead of blocking a thread
+os.environ.setdefault("WHATSAPP_ASYNC_WEBHOOK", "1")
 
 application = get_asgi_application()
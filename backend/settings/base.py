@@ -33,6 +33,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "backend.api.middleware.QueryMetricsMiddleware",
+    "backend.api.middleware.ReplicaRoutingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -78,9 +80,55 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
+        # Persistent connections: reuse each thread's MySQL connection for up
+        # to DB_CONN_MAX_AGE seconds instead of reconnecting on every request,
+        # and ping it before reuse so a server-side timeout costs one retry,
+        # not a failed request. Every gunicorn thread keeps one connection
+        # open, so WEB_CONCURRENCY x GUNICORN_THREADS must stay below MySQL's
+        # max_connections. Set DB_CONN_MAX_AGE=0 under ASGI (connections are
+        # per request there; pool with ProxySQL/MySQL Router instead).
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True').lower() in ('1', 'true', 'yes'),
     }
 }
 
+# Optional read replica for the public catalog/blog/hero GETs (api.routers,
+# api.middleware.ReplicaRoutingMiddleware). Unset values fall back to the
+# primary's; tests mirror it onto the primary.
+if os.getenv('DB_REPLICA_HOST') or os.getenv('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'USER': os.getenv('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.getenv('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['backend.api.routers.ReplicaRouter']
+
+# After a write, the client reads from the primary for this many seconds
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
+
+# Shared cache for precomputed API documents (home page, etc.).
+# LocMemCache is per-process, fine for development only; production settings
+# default to FileBasedCache and reject LocMemCache (see settings/prod.py).
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+HOME_CACHE_TIMEOUT = int(os.getenv("HOME_CACHE_TIMEOUT", 60 * 60))
+# Lifetime of the hero version stamp: the longest a worker serves its memoized
+# hero after a save it did not see
+HERO_VERSION_TTL = int(os.getenv("HERO_VERSION_TTL", 60))
+
+# Per-view query count / timing instrumentation (Server-Timing + /api/_metrics/)
+API_METRICS_ENABLED = os.getenv("API_METRICS_ENABLED", "False").lower() in ("1", "true", "yes")
+
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "UTC"
 USE_I18N = True
@@ -90,10 +138,53 @@ STATIC_URL = "/static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Invoice PDFs are rendered by a background thread pool and cached on disk.
+# Kept outside MEDIA_ROOT: they hold customer details and are served by a staff-only view.
+INVOICE_PDF_DIR = os.getenv("INVOICE_PDF_DIR", os.path.join(BASE_DIR, "var", "invoices"))
+INVOICE_PDF_WORKERS = int(os.getenv("INVOICE_PDF_WORKERS", 2))
+
 
 
 WHATSAPP_VERIFY_TOKEN = os.getenv("WHATSAPP_VERIFY_TOKEN")
 
+# Serve /webhooks/whatsapp/ with the async view and httpx Graph client.
+# Only worth it under ASGI (backend/asgi.py turns it on); under WSGI each
+# request would spin up its own event loop.
+WHATSAPP_ASYNC_WEBHOOK = os.getenv("WHATSAPP_ASYNC_WEBHOOK", "False").lower() in ("1", "true", "yes")
+
+# Outbound send rate per business number, shared by all workers on the host
+# (see vemacars/ratelimit.py). 80 msg/s is the Cloud API default tier; raise
+# WHATSAPP_SEND_RATE when Meta upgrades the number.
+WHATSAPP_RATE_LIMIT_DIR = os.getenv("WHATSAPP_RATE_LIMIT_DIR", os.path.join(BASE_DIR, "var", "whatsapp"))
+WHATSAPP_SEND_RATE = float(os.getenv("WHATSAPP_SEND_RATE", 80))
+# Short bursts only: a full second's worth at once overshoots the limit when
+# the Graph API counts per wall-clock second
+WHATSAPP_SEND_BURST = float(os.getenv("WHATSAPP_SEND_BURST", WHATSAPP_SEND_RATE / 4))
+# Tokens only replies may use, so broadcasts never delay an answer
+WHATSAPP_REPLY_RESERVE = float(os.getenv("WHATSAPP_REPLY_RESERVE", WHATSAPP_SEND_BURST / 4))
+WHATSAPP_SEND_RETRIES = int(os.getenv("WHATSAPP_SEND_RETRIES", 6))
+WHATSAPP_SEND_BACKOFF = float(os.getenv("WHATSAPP_SEND_BACKOFF", 0.5))
+WHATSAPP_SEND_BACKOFF_MAX = float(os.getenv("WHATSAPP_SEND_BACKOFF_MAX", 30))
+# Longest a webhook request may wait (tokens + retries) to send a reply;
+# keep well under GUNICORN_TIMEOUT. What is left goes to a background sender
+# that polls every WHATSAPP_DEFERRED_SEND_INTERVAL seconds (0: send inline).
+WHATSAPP_REPLY_BUDGET = float(os.getenv("WHATSAPP_REPLY_BUDGET", 10))
+WHATSAPP_DEFERRED_SEND_INTERVAL = float(os.getenv("WHATSAPP_DEFERRED_SEND_INTERVAL", 1))
+
+# Delivery status webhooks are buffered per worker and bulk-inserted into
+# MessageStatus every interval seconds, or once BATCH_SIZE are waiting
+# (vemacars/delivery.py). 0 writes them during the request.
+WHATSAPP_STATUS_FLUSH_INTERVAL = float(os.getenv("WHATSAPP_STATUS_FLUSH_INTERVAL", 1))
+WHATSAPP_STATUS_BATCH_SIZE = int(os.getenv("WHATSAPP_STATUS_BATCH_SIZE", 500))
+# prune_message_statuses deletes older rows
+WHATSAPP_STATUS_RETENTION_DAYS = int(os.getenv("WHATSAPP_STATUS_RETENTION_DAYS", 30))
+# Same write-behind for the conversation transcript (vemacars/transcripts.py)
+WHATSAPP_TRANSCRIPT_FLUSH_INTERVAL = float(os.getenv("WHATSAPP_TRANSCRIPT_FLUSH_INTERVAL", 1))
+WHATSAPP_TRANSCRIPT_BATCH_SIZE = int(os.getenv("WHATSAPP_TRANSCRIPT_BATCH_SIZE", 500))
+
+# Used to turn local phone numbers (07xx...) into international customer keys
+DEFAULT_PHONE_COUNTRY_CODE = os.getenv("DEFAULT_PHONE_COUNTRY_CODE", "255")
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
@@ -0,0 +1,22 @@
+from .dev import *
+
+# Try replica routing locally with two SQLite files:
+#   python manage.py migrate --settings=backend.settings.local_replica
+#   cp db.sqlite3 db-replica.sqlite3      # "replicate"; repeat to catch up
+#   python manage.py runserver --settings=backend.settings.local_replica
+# Public GETs read db-replica.sqlite3 until the client writes, after which it
+# is pinned to db.sqlite3 for REPLICA_PIN_SECONDS.
+
+SECRET_KEY = os.getenv("DJANGO_SECRET_KEY", "local-replica-dev-key")
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.sqlite3",
+    },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db-replica.sqlite3",
+        "TEST": {"MIRROR": "default"},
+    },
+}
@@ -1,3 +1,5 @@
+from django.core.exceptions import ImproperlyConfigured
+
 from .base import *
 
 DEBUG = False
@@ -16,3 +18,17 @@ CORS_ALLOWED_ORIGINS = [
 CSRF_TRUSTED_ORIGINS = [
     "https://vemacars.deploy.tz",
 ]
+
+# gunicorn runs several workers: the home document and the hero version stamp
+# must be invalidated in a cache they all share. The file cache covers one
+# host; set CACHE_BACKEND/CACHE_LOCATION to Redis or Memcached across hosts.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "/var/tmp/vemacars-cache"),
+    }
+}
+if CACHES["default"]["BACKEND"] == "django.core.cache.backends.locmem.LocMemCache":
+    raise ImproperlyConfigured(
+        "LocMemCache is per-process; production needs a shared CACHE_BACKEND (file, Redis or Memcached)."
+    )
@@ -0,0 +1,42 @@
+import tempfile
+
+from .base import *
+
+# python manage.py test --settings=backend.settings.test
+# Runs without MySQL; search uses the SearchTerm fallback index on SQLite.
+
+SECRET_KEY = "test-secret-key"
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.MD5PasswordHasher",
+]
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix="vemacars-media-")
+INVOICE_PDF_DIR = tempfile.mkdtemp(prefix="vemacars-invoices-")
+WHATSAPP_RATE_LIMIT_DIR = tempfile.mkdtemp(prefix="vemacars-whatsapp-")
+# No background writer threads: rows are stored within the test's transaction
+WHATSAPP_STATUS_FLUSH_INTERVAL = 0
+WHATSAPP_TRANSCRIPT_FLUSH_INTERVAL = 0
+WHATSAPP_DEFERRED_SEND_INTERVAL = 0
+
+API_METRICS_ENABLED = False
+
+# Exercise replica routing: the replica alias mirrors the test database
+DATABASES["replica"] = {
+    "ENGINE": "django.db.backends.sqlite3",
+    "NAME": ":memory:",
+    "TEST": {"MIRROR": "default"},
+}
@@ -0,0 +1,26 @@
+from django.contrib import admin
+
+from .campaigns import status_breakdown
+from .models import Campaign
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'total', 'sent_count', 'failed_count', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = (
+        'total', 'sent_count', 'failed_count', 'delivery', 'loaded_at', 'started_at', 'finished_at',
+    )
+    actions = ['queue', 'pause']
+
+    @admin.display(description='Recipients by status')
+    def delivery(self, obj):
+        return ", ".join(f"{status}: {count}" for status, count in status_breakdown(obj).items()) or '-'
+
+    @admin.action(description='Queue for sending (run_campaigns picks it up)')
+    def queue(self, request, queryset):
+        queryset.filter(status__in=['draft', 'paused']).update(status='queued')
+
+    @admin.action(description='Pause after the current chunk')
+    def pause(self, request, queryset):
+        queryset.filter(status__in=['queued', 'running']).update(status='paused')
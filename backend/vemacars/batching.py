@@ -0,0 +1,106 @@
+"""
+Write-behind buffers for the WhatsApp webhook.
+
+Each worker process keeps a BatchWriter per kind of row. Callers hand it items
+and return straight away; a background thread writes what has accumulated
+every `interval` seconds, or as soon as `batch_size` items are waiting, with
+one bulk statement. An interval of 0 writes in the caller instead (tests,
+single-process debugging).
+
+Items still buffered when a worker is killed are lost; a graceful exit
+flushes them.
+"""
+import abc
+import atexit
+import logging
+import os
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter(abc.ABC):
+    """
+    Subclasses name their settings and implement write(items).
+    """
+    name = 'batch-writer'
+    interval_setting = None
+    batch_size_setting = None
+
+    def __init__(self, interval=None, batch_size=None):
+        # None: follow settings (read on use, so override_settings applies)
+        self._interval = interval
+        self._batch_size = batch_size
+        self._items = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+
+    @property
+    def interval(self):
+        return getattr(settings, self.interval_setting) if self._interval is None else self._interval
+
+    @property
+    def batch_size(self):
+        return getattr(settings, self.batch_size_setting) if self._batch_size is None else self._batch_size
+
+    @property
+    def pending(self):
+        return len(self._items)
+
+    def enqueue(self, items):
+        if self.interval <= 0:
+            self.write(items)
+            return
+        with self._lock:
+            self._items.extend(items)
+            full = len(self._items) >= self.batch_size
+        self.start()
+        if full:
+            self._wake.set()
+
+    async def aenqueue(self, items):
+        if self.interval <= 0:
+            return await sync_to_async(self.write)(items)
+        # Buffered: no database work, safe on the event loop
+        self.enqueue(items)
+
+    def flush(self):
+        with self._lock:
+            items, self._items = self._items, []
+        if items:
+            self.write(items)
+        return len(items)
+
+    @abc.abstractmethod
+    def write(self, items):
+        """
+        Store (or send) one batch of items.
+        """
+
+    def start(self):
+        # Started lazily in each worker: threads do not survive a fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self.run, name=self.name, daemon=True).start()
+        atexit.register(self.flush)
+
+    def run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as error:
+                logger.error(f"{self.name} failed to write a batch: {error}")
+            finally:
+                # This thread owns its DB connection; honour CONN_MAX_AGE and health checks
+                close_old_connections()
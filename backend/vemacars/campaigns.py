@@ -0,0 +1,247 @@
+"""
+WhatsApp broadcast campaigns.
+
+run_campaign() copies the audience into CampaignRecipient rows once, then
+walks the pending rows in pk order, `chunk_size` at a time. Each chunk is
+sent concurrently on an asyncio loop through AsyncWhatsAppService at
+BROADCAST priority, so the shared send rate (vemacars.ratelimit) holds and
+replies to customers go first. Results are written back per chunk: a crash
+loses at most the chunk in flight, which is sent again on resume. Recipients
+whose send was throttled past its retries stay pending for the next pass.
+
+Delivery webhooks update recipients (through vemacars.delivery, in batches)
+by the biz_opaque_callback_data attached to every campaign message, so a
+receipt that arrives before its chunk is checkpointed is not lost.
+"""
+import asyncio
+import logging
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from backend.api.models import BookingCustomerInfo, Customer
+from backend.api.scheduling import acquire_lock, job_lock, lock_owner
+from .models import Campaign, CampaignRecipient
+from .ratelimit import BROADCAST, PAIR_RATE_LIMIT, THROTTLING_CODES, graph_error
+from .whatsapp_cloud import AsyncWhatsAppService
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 200
+CONCURRENCY = 16
+CALLBACK_PREFIX = 'campaign-recipient:'
+RETRYABLE_CODES = THROTTLING_CODES | {PAIR_RATE_LIMIT}
+
+# Statuses a delivery webhook may move a recipient out of; receipts can
+# arrive out of order and must never move a recipient backwards
+EARLIER_STATUSES = {
+    'sent': ['pending'],
+    'delivered': ['pending', 'sent'],
+    'read': ['pending', 'sent', 'delivered'],
+    'failed': ['pending', 'sent'],
+}
+
+
+# --- Audience ---
+
+def audience(campaign, chunk_size=CHUNK_SIZE):
+    """
+    (phone_key, name) for every contact in the campaign's audience, streamed
+    from the database. Customers come first so their names win on duplicates.
+    """
+    if campaign.audience in ('all', 'customers'):
+        yield from Customer.objects.exclude(phone_key='').values_list('phone_key', 'name').iterator(chunk_size)
+    if campaign.audience in ('all', 'booking_contacts'):
+        yield from (
+            BookingCustomerInfo.objects.exclude(phone_key='')
+            .values_list('phone_key', 'full_name').iterator(chunk_size)
+        )
+
+
+def load_recipients(campaign, chunk_size=CHUNK_SIZE):
+    """
+    Copy the audience into CampaignRecipient rows. Idempotent: the unique
+    (campaign, phone) constraint drops duplicates, so an interrupted load is
+    simply run again.
+    """
+    batch = []
+    for phone, name in audience(campaign, chunk_size):
+        batch.append(CampaignRecipient(campaign=campaign, phone=phone, name=(name or '')[:255]))
+        if len(batch) >= chunk_size:
+            CampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        CampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+
+    campaign.total = campaign.recipients.count()
+    campaign.loaded_at = timezone.now()
+    campaign.save(update_fields=['total', 'loaded_at'])
+    return campaign.total
+
+
+# --- Sending ---
+
+async def send_chunk(service, campaign, recipients, concurrency=CONCURRENCY):
+    """
+    Send one chunk concurrently; returns the send results in recipient order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    parameters = [campaign.message] if campaign.message else []
+
+    async def send(recipient):
+        callback_data = f'{CALLBACK_PREFIX}{recipient.pk}'
+        async with semaphore:
+            if campaign.template_name:
+                return await service.send_template_message(
+                    recipient.phone, campaign.template_name, campaign.template_language, parameters,
+                    priority=BROADCAST, callback_data=callback_data,
+                )
+            return await service.send_text_message(
+                recipient.phone, campaign.message, priority=BROADCAST, callback_data=callback_data,
+            )
+
+    return await asyncio.gather(*(send(recipient) for recipient in recipients))
+
+
+def is_rejected(result):
+    """
+    True when the Graph API refused the message itself (bad number, template
+    problem). Throttling or network trouble that outlasted the retries is not
+    a rejection: the recipient stays pending for the next pass.
+    """
+    error = graph_error(result.get('error'))
+    code = error.get('code')
+    return code is not None and not error.get('is_transient') and code not in RETRYABLE_CODES
+
+
+def checkpoint(campaign, recipients, results):
+    """
+    Record a sent chunk in a few statements. Status only moves forward from
+    'pending', so a delivery receipt that already arrived is kept.
+    Returns (sent, failed, deferred) counts.
+    """
+    now = timezone.now()
+    sent, failed, deferred = [], [], 0
+    for recipient, result in zip(recipients, results):
+        recipient.message_id = result.get('messageId') or ''
+        recipient.error = '' if result.get('success') else str(result.get('error'))[:1000]
+        recipient.sent_at = now if result.get('success') else None
+        if result.get('success'):
+            sent.append(recipient.pk)
+        elif is_rejected(result):
+            failed.append(recipient.pk)
+        else:
+            deferred += 1
+
+    with transaction.atomic():
+        CampaignRecipient.objects.bulk_update(recipients, ['message_id', 'error', 'sent_at'])
+        if sent:
+            CampaignRecipient.objects.filter(pk__in=sent, status='pending').update(status='sent', updated_at=now)
+        if failed:
+            CampaignRecipient.objects.filter(pk__in=failed, status='pending').update(status='failed', updated_at=now)
+        Campaign.objects.filter(pk=campaign.pk).update(
+            sent_count=F('sent_count') + len(sent), failed_count=F('failed_count') + len(failed),
+        )
+    return len(sent), len(failed), deferred
+
+
+def run_campaign(campaign, chunk_size=CHUNK_SIZE, concurrency=CONCURRENCY, service=None):
+    """
+    Send a campaign until every recipient is done or it is paused. Safe to
+    call again after a crash or a pause: only pending recipients are sent.
+    Returns a dict of counts, or None if another process is running it.
+    """
+    lock_name = f'campaign-{campaign.pk}'
+    with job_lock(lock_name) as acquired:
+        if not acquired:
+            return None
+
+        if campaign.loaded_at is None:
+            load_recipients(campaign, chunk_size)
+        campaign.status = 'running'
+        campaign.started_at = campaign.started_at or timezone.now()
+        campaign.save(update_fields=['status', 'started_at'])
+
+        service = service or AsyncWhatsAppService()
+        counts = {'sent': 0, 'failed': 0, 'deferred': 0}
+        last_pk = 0
+        with asyncio.Runner() as runner:
+            while True:
+                # Paused from the admin between chunks
+                if Campaign.objects.filter(pk=campaign.pk, status='paused').exists():
+                    logger.info(f"Campaign {campaign.pk} paused")
+                    break
+
+                # Not campaign.recipients: the related manager would load the
+                # deferred campaign_id of every row to attach the campaign
+                chunk = list(
+                    CampaignRecipient.objects.filter(campaign=campaign, status='pending', pk__gt=last_pk)
+                    .order_by('pk').only('pk', 'phone')[:chunk_size]
+                )
+                if not chunk:
+                    # Deferred recipients keep the campaign running for the next pass
+                    if not counts['deferred']:
+                        Campaign.objects.filter(pk=campaign.pk).update(status='completed', finished_at=timezone.now())
+                    break
+
+                results = runner.run(send_chunk(service, campaign, chunk, concurrency))
+                for key, value in zip(('sent', 'failed', 'deferred'), checkpoint(campaign, chunk, results)):
+                    counts[key] += value
+                last_pk = chunk[-1].pk
+                # Renew the lease; a long campaign outlives the default TTL
+                acquire_lock(lock_name, lock_owner())
+            runner.run(service.aclose())
+
+    logger.info(f"Campaign {campaign.pk}: {counts}")
+    return counts
+
+
+# --- Delivery receipts ---
+
+def record_statuses(statuses):
+    """
+    Apply Graph API status webhooks to campaign recipients, one UPDATE per
+    status (plus one per failure, which carries its own error). Statuses for
+    other messages (bot replies) carry no callback data and are skipped.
+    Returns the number of recipients updated.
+    """
+    recipients = {status: [] for status in EARLIER_STATUSES}
+    failures = []
+    for status in statuses:
+        callback_data = status.get('biz_opaque_callback_data') or ''
+        if not callback_data.startswith(CALLBACK_PREFIX) or status.get('status') not in EARLIER_STATUSES:
+            continue
+        try:
+            recipient_id = int(callback_data[len(CALLBACK_PREFIX):])
+        except ValueError:
+            continue
+        if status['status'] == 'failed':
+            error = '; '.join(
+                f"{error.get('code')}: {error.get('title')}" for error in status.get('errors') or []
+            )[:1000]
+            failures.append((recipient_id, error))
+        else:
+            recipients[status['status']].append(recipient_id)
+
+    updated = 0
+    now = timezone.now()
+    # In order, so a batch holding 'delivered' and 'read' for one recipient ends at 'read'
+    for status in ('sent', 'delivered', 'read'):
+        if recipients[status]:
+            updated += CampaignRecipient.objects.filter(
+                pk__in=recipients[status], status__in=EARLIER_STATUSES[status],
+            ).update(status=status, updated_at=now)
+    for recipient_id, error in failures:
+        updated += CampaignRecipient.objects.filter(
+            pk=recipient_id, status__in=EARLIER_STATUSES['failed'],
+        ).update(status='failed', error=error, updated_at=now)
+    return updated
+
+
+def status_breakdown(campaign):
+    """
+    {status: recipients} for a campaign, from the (campaign, status) index.
+    """
+    rows = campaign.recipients.order_by().values('status').annotate(count=Count('pk'))
+    return {row['status']: row['count'] for row in rows}
@@ -2,11 +2,16 @@ import logging
 import datetime
 from typing import Dict, List, Optional, Any
 
+from .reply_templates import Reply, ReplyTemplates, Slot, SlotRecord
+
 logger = logging.getLogger(__name__)
 
 class CarRentalBotService:
     def __init__(self):
         self.cars = self.initialize_car_catalog()
+        # Bumped whenever self.cars changes; compiled replies are rebuilt then
+        self.catalog_version = 0
+        self.templates = ReplyTemplates(self)
         self.bookings: Dict[str, Any] = {} # In-memory storage for demo
         self.customer_sessions: Dict[str, Any] = {} # Track customer conversation state
 
@@ -147,6 +152,7 @@ class CarRentalBotService:
             buttons = None
             list_items = None
             images = []
+            reply = None  # compiled reply, when the answer comes from self.templates
 
             # Handle button clicks and interactive responses
             if self.is_button_click(message):
@@ -154,49 +160,40 @@ class CarRentalBotService:
 
             # Greeting and welcome
             if self.is_greeting(lower_message):
-                response = self.generate_welcome_message(customer_name)
-                buttons = self.get_main_menu_buttons()
-                message_type = 'interactive_buttons'
+                reply = self.templates.get('welcome')
+                response = reply.render(customer_name=customer_name)
+                buttons = reply.buttons
+                message_type = reply.message_type
                 session['state'] = 'main_menu'
             
             # Car catalog requests
             elif self.is_car_catalog_request(lower_message):
                 category = self.extract_car_category(lower_message)
                 if category:
-                    response = self.generate_car_catalog(category, customer_name)
-                    buttons = self.get_car_category_buttons(category)
-                    
-                    # Extract images for the cars in this category
-                    cars = self.cars.get(category, [])[:3] # Limit to top 3
-                    images = [
-                        {'url': c['image'], 'caption': f"{c['name']} - TZS {c['price']:,}/day"} 
-                        for c in cars if c.get('image')
-                    ]
-                    
-                    message_type = 'interactive_buttons'
+                    reply = self.templates.get('car_catalog', category)
+                    response = reply.render(customer_name=customer_name)
+                    buttons = reply.buttons
+                    images = reply.images
+                    message_type = reply.message_type
                     session['state'] = 'browsing_cars'
                     session['selectedCategory'] = category
                 else:
-                    response = self.generate_category_selection(customer_name)
-                    list_items = self.get_category_list_items()
-                    message_type = 'interactive_list'
+                    reply = self.templates.get('category_selection')
+                    response = reply.render(customer_name=customer_name)
+                    list_items = reply.list_items
+                    message_type = reply.message_type
                     session['state'] = 'selecting_category'
             
             # Specific car selection
             elif self.is_car_selection(lower_message):
                 car_id = self.extract_car_id(lower_message, session.get('selectedCategory'))
-                if car_id:
-                    car = self.get_car_by_id(car_id)
-                    response = self.generate_car_details(car, customer_name)
-                    buttons = self.get_car_action_buttons(car_id)
-                    
-                    # Add image for the selected car
-                    if car.get('image'):
-                        images = [{'url': car['image'], 'caption': car['name']}]
-                    else:
-                        images = []
-
-                    message_type = 'interactive_buttons'
+                # Only catalog cars are compiled: car ids come from the customer
+                if car_id and self.get_car_by_id(car_id):
+                    reply = self.templates.get('car_details', car_id)
+                    response = reply.render(customer_name=customer_name)
+                    buttons = reply.buttons
+                    images = reply.images
+                    message_type = reply.message_type
                     session['state'] = 'viewing_car'
                     session['selectedCar'] = car_id
                 else:
@@ -205,21 +202,23 @@ class CarRentalBotService:
             # Booking requests
             elif self.is_booking_request(lower_message):
                 if session.get('selectedCar'):
-                    response = self.generate_booking_form(session['selectedCar'], customer_name)
-                    buttons = self.get_booking_form_buttons()
-                    message_type = 'interactive_buttons'
+                    reply = self.booking_form_reply(session['selectedCar'])
+                    response = reply.render(customer_name=customer_name)
+                    buttons = reply.buttons
+                    message_type = reply.message_type
                     session['state'] = 'booking_form'
                 else:
-                    response = self.generate_select_car_first(customer_name)
-                    buttons = self.get_main_menu_buttons()
-                    message_type = 'interactive_buttons'
+                    reply = self.templates.get('select_car_first')
+                    response = reply.render(customer_name=customer_name)
+                    buttons = reply.buttons
+                    message_type = reply.message_type
 
             # Booking form processing
             elif session.get('state') == 'booking_form' and self.is_booking_details(lower_message):
                 booking_details = self.extract_booking_details(message)
                 if booking_details['isValid']:
                     booking = self.create_booking(phone_number, session['selectedCar'], booking_details, customer_name)
-                    response = self.generate_booking_confirmation(booking, customer_name)
+                    response = self.templates.get('booking_confirmation').render(customer_name=customer_name, **booking)
                     buttons = self.get_payment_buttons(booking['id'])
                     message_type = 'interactive_buttons'
                     session['state'] = 'payment_pending'
@@ -233,7 +232,7 @@ class CarRentalBotService:
             elif session.get('state') == 'payment_pending' and self.is_payment_request(lower_message):
                 booking = self.bookings.get(session.get('currentBooking'))
                 if booking:
-                    response = self.generate_payment_instructions(booking, customer_name)
+                    response = self.templates.get('payment_instructions').render(customer_name=customer_name, **booking)
                     buttons = self.get_payment_confirmation_buttons(booking['id'])
                     message_type = 'interactive_buttons'
                     session['state'] = 'payment_instructions'
@@ -252,21 +251,24 @@ class CarRentalBotService:
 
             # Price inquiries
             elif self.is_price_inquiry(lower_message):
-                response = self.generate_pricing_info(customer_name)
-                buttons = self.get_category_buttons()
-                message_type = 'interactive_buttons'
+                reply = self.templates.get('pricing')
+                response = reply.render(customer_name=customer_name)
+                buttons = reply.buttons
+                message_type = reply.message_type
 
             # Location and availability
             elif self.is_location_inquiry(lower_message):
-                response = self.generate_location_info(customer_name)
-                buttons = self.get_main_menu_buttons()
-                message_type = 'interactive_buttons'
+                reply = self.templates.get('location')
+                response = reply.render(customer_name=customer_name)
+                buttons = reply.buttons
+                message_type = reply.message_type
 
             # Help and support
             elif self.is_help_request(lower_message):
-                response = self.generate_help_message(customer_name)
-                buttons = self.get_help_buttons()
-                message_type = 'interactive_buttons'
+                reply = self.templates.get('help')
+                response = reply.render(customer_name=customer_name)
+                buttons = reply.buttons
+                message_type = reply.message_type
 
             # Check existing bookings
             elif self.is_booking_check(lower_message):
@@ -300,7 +302,9 @@ class CarRentalBotService:
                 'customerName': customer_name,
                 'phoneNumber': phone_number,
                 'sessionState': session.get('state'),
-                'images': images
+                'images': images,
+                # Prebuilt Graph API interactive object for the buttons/list
+                'interactive': reply.interactive if reply else None
             }
 
         except Exception as error:
@@ -506,6 +510,7 @@ class CarRentalBotService:
         
         # Mark car as temporarily unavailable
         car['available'] = False
+        self.catalog_version += 1
         
         return booking
 
@@ -568,16 +573,19 @@ class CarRentalBotService:
         message_type = 'interactive_buttons'
         list_items = None
         images = []
+        reply = None
 
         if button_id in ['🚗 Browse Cars', 'browse_cars']:
-            response = self.generate_category_selection(customer_name)
-            list_items = self.get_category_list_items()
-            message_type = 'interactive_list'
+            reply = self.templates.get('category_selection')
+            response = reply.render(customer_name=customer_name)
+            list_items = reply.list_items
+            message_type = reply.message_type
             session['state'] = 'selecting_category'
 
         elif button_id in ['💰 Check Prices', 'check_prices']:
-             response = self.generate_pricing_info(customer_name)
-             buttons = self.get_category_buttons()
+             reply = self.templates.get('pricing')
+             response = reply.render(customer_name=customer_name)
+             buttons = reply.buttons
              session['state'] = 'checking_prices'
 
         elif button_id in ['📋 My Bookings', 'my_bookings']:
@@ -587,37 +595,29 @@ class CarRentalBotService:
             session['state'] = 'viewing_bookings'
 
         elif button_id in ['🆘 Get Help', 'get_help']:
-            response = self.generate_help_message(customer_name)
-            buttons = self.get_help_buttons()
+            reply = self.templates.get('help')
+            response = reply.render(customer_name=customer_name)
+            buttons = reply.buttons
             session['state'] = 'getting_help'
 
         # Category selections
         elif button_id in ['economy', 'suv', 'luxury', 'van']:
             category = button_id
-            response = self.generate_car_catalog(category, customer_name)
-            buttons = self.get_car_category_buttons(category)
-            
-            # Extract images for the cars in this category
-            cars = self.cars.get(category, [])[:3] 
-            images = [
-                {'url': c['image'], 'caption': f"{c['name']} - TZS {c['price']:,}/day"} 
-                for c in cars if c.get('image')
-            ]
-            
+            reply = self.templates.get('car_catalog', category)
+            response = reply.render(customer_name=customer_name)
+            buttons = reply.buttons
+            images = reply.images
             session['state'] = 'browsing_cars'
             session['selectedCategory'] = category
 
         else:
             if button_id.startswith('car_'):
                 car_id = button_id.replace('car_', '')
-                car = self.get_car_by_id(car_id)
-                if car:
-                    response = self.generate_car_details(car, customer_name)
-                    buttons = self.get_car_action_buttons(car_id)
-                    
-                    if car.get('image'):
-                        images = [{'url': car['image'], 'caption': car['name']}]
-                        
+                if self.get_car_by_id(car_id):
+                    reply = self.templates.get('car_details', car_id)
+                    response = reply.render(customer_name=customer_name)
+                    buttons = reply.buttons
+                    images = reply.images
                     session['state'] = 'viewing_car'
                     session['selectedCar'] = car_id
                 else:
@@ -626,8 +626,9 @@ class CarRentalBotService:
 
             elif button_id.startswith('book_'):
                 car_id = button_id.replace('book_', '')
-                response = self.generate_booking_form(car_id, customer_name)
-                buttons = self.get_booking_form_buttons()
+                reply = self.booking_form_reply(car_id)
+                response = reply.render(customer_name=customer_name)
+                buttons = reply.buttons
                 session['state'] = 'booking_form'
                 session['selectedCar'] = car_id
             
@@ -635,7 +636,7 @@ class CarRentalBotService:
                 booking_id = button_id.replace('pay_', '')
                 booking = self.bookings.get(booking_id)
                 if booking:
-                    response = self.generate_payment_instructions(booking, customer_name)
+                    response = self.templates.get('payment_instructions').render(customer_name=customer_name, **booking)
                     buttons = self.get_payment_confirmation_buttons(booking_id)
                     session['state'] = 'payment_instructions'
 
@@ -663,7 +664,8 @@ class CarRentalBotService:
             'customerName': customer_name,
             'phoneNumber': phone_number,
             'sessionState': session['state'],
-            'images': images
+            'images': images,
+            'interactive': reply.interactive if reply else None
         }
 
     def is_button_click(self, message):
@@ -710,6 +712,62 @@ class CarRentalBotService:
             f"After payment, click \"Payment Sent\" below."
         )
 
+    ## Precompiled replies (see reply_templates)
+
+    def compile_reply(self, name, *args):
+        """
+        Build reply `name` from the generate_* methods, with slots for the
+        customer's name and booking fields. Called by self.templates, once
+        per reply and catalog version.
+        """
+        customer_name = Slot('customer_name')
+        if name == 'welcome':
+            return Reply(self.generate_welcome_message(customer_name), buttons=self.get_main_menu_buttons())
+        if name == 'category_selection':
+            return Reply(self.generate_category_selection(customer_name), list_items=self.get_category_list_items())
+        if name == 'car_catalog':
+            category, = args
+            return Reply(
+                self.generate_car_catalog(category, customer_name),
+                buttons=self.get_car_category_buttons(category),
+                images=self.get_category_images(category),
+            )
+        if name == 'car_details':
+            car = self.get_car_by_id(args[0])
+            return Reply(
+                self.generate_car_details(car, customer_name),
+                buttons=self.get_car_action_buttons(car['id']),
+                images=[{'url': car['image'], 'caption': car['name']}] if car.get('image') else [],
+            )
+        if name == 'booking_form':
+            return Reply(self.generate_booking_form(args[0], customer_name), buttons=self.get_booking_form_buttons())
+        if name == 'booking_confirmation':
+            return Reply(self.generate_booking_confirmation(SlotRecord(), customer_name))
+        if name == 'payment_instructions':
+            return Reply(self.generate_payment_instructions(SlotRecord(), customer_name))
+        if name == 'pricing':
+            return Reply(self.generate_pricing_info(customer_name), buttons=self.get_category_buttons())
+        if name == 'location':
+            return Reply(self.generate_location_info(customer_name), buttons=self.get_main_menu_buttons())
+        if name == 'help':
+            return Reply(self.generate_help_message(customer_name), buttons=self.get_help_buttons())
+        if name == 'select_car_first':
+            return Reply(self.generate_select_car_first(customer_name), buttons=self.get_main_menu_buttons())
+        raise ValueError(f"Unknown reply: {name}")
+
+    def booking_form_reply(self, car_id):
+        # Car ids come from the customer: only catalog cars get a compiled form
+        if self.get_car_by_id(car_id):
+            return self.templates.get('booking_form', car_id)
+        return Reply(self.generate_booking_form(car_id, Slot('customer_name')), buttons=self.get_booking_form_buttons())
+
+    def get_category_images(self, category):
+        # Top 3 cars of the category, as sent before the catalog text
+        return [
+            {'url': c['image'], 'caption': f"{c['name']} - TZS {c['price']:,}/day"}
+            for c in self.cars.get(category, [])[:3] if c.get('image')
+        ]
+
     ## Helper methods for parsing and state (implementing others briefly)
     
     def get_customer_session(self, phone_number):
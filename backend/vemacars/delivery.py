@@ -0,0 +1,153 @@
+"""
+Delivery statuses for the WhatsApp messages we send.
+
+Status webhooks (sent / delivered / read / failed) arrive about three times as
+often as inbound messages, so the webhook only hands them to `status_writer`:
+no bot, no database. Its background thread (vemacars.batching) bulk-inserts
+them into MessageStatus every WHATSAPP_STATUS_FLUSH_INTERVAL seconds, or as
+soon as WHATSAPP_STATUS_BATCH_SIZE are waiting, and applies campaign receipts
+in the same pass. A status lost with a killed worker costs the metrics a
+sample and leaves a campaign recipient at an earlier status.
+"""
+import datetime
+
+from django.conf import settings
+from django.db.models import Count, OuterRef, Subquery
+from django.utils import timezone
+
+from backend.api.metrics import PERCENTILES, percentile
+from .batching import BatchWriter
+from .campaigns import CALLBACK_PREFIX, record_statuses
+from .models import MessageStatus
+
+STATUS_CODES = {label.lower(): code for code, label in MessageStatus.STATUS_CHOICES}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+PRUNE_BATCH_SIZE = 5000
+LATENCY_SAMPLE_SIZE = 10000
+
+
+def tracked(statuses):
+    """
+    The `statuses` entries of a webhook that we store.
+    """
+    return [status for status in statuses if status.get('status') in STATUS_CODES and status.get('id')]
+
+
+def status_row(status):
+    """
+    MessageStatus for one tracked `statuses` entry of a webhook.
+    """
+    code = STATUS_CODES[status['status']]
+    try:
+        timestamp = datetime.datetime.fromtimestamp(int(status['timestamp']), tz=datetime.timezone.utc)
+    except (KeyError, TypeError, ValueError):
+        timestamp = timezone.now()
+    error_code = None
+    if code == MessageStatus.FAILED:
+        error_code = ((status.get('errors') or [{}])[0]).get('code')
+    return MessageStatus(
+        message_id=status['id'][:128],
+        status=code,
+        timestamp=timestamp,
+        recipient=(status.get('recipient_id') or '')[:20],
+        error_code=error_code if isinstance(error_code, int) else None,
+    )
+
+
+# --- Ingestion ---
+
+class StatusWriter(BatchWriter):
+    """
+    Buffers webhook statuses; each batch becomes one MessageStatus bulk
+    insert plus the campaign receipt updates.
+    """
+    name = 'whatsapp-status-writer'
+    interval_setting = 'WHATSAPP_STATUS_FLUSH_INTERVAL'
+    batch_size_setting = 'WHATSAPP_STATUS_BATCH_SIZE'
+
+    def add(self, statuses):
+        """
+        Queue webhook statuses; returns how many will be stored.
+        """
+        statuses = tracked(statuses)
+        self.enqueue(statuses)
+        return len(statuses)
+
+    async def aadd(self, statuses):
+        statuses = tracked(statuses)
+        await self.aenqueue(statuses)
+        return len(statuses)
+
+    def write(self, statuses):
+        rows = [status_row(status) for status in statuses]
+        # Redelivered webhooks hit the (message_id, status) constraint and are dropped
+        MessageStatus.objects.bulk_create(rows, batch_size=self.batch_size, ignore_conflicts=True)
+        receipts = [s for s in statuses if (s.get('biz_opaque_callback_data') or '').startswith(CALLBACK_PREFIX)]
+        if receipts:
+            record_statuses(receipts)
+
+
+status_writer = StatusWriter()
+
+
+# --- Metrics ---
+
+def latency_summary(seconds):
+    ordered = sorted(seconds)
+    data = {'count': len(ordered)}
+    if ordered:
+        data.update({f'p{pct}': percentile(ordered, pct) for pct in PERCENTILES})
+        data['max'] = percentile(ordered, 100)
+    return data
+
+
+def delivery_metrics(since, sample_size=LATENCY_SAMPLE_SIZE):
+    """
+    Status counts, failure codes, and sent→delivered / delivered→read latency
+    in seconds for statuses since `since`. Latencies come from the newest
+    `sample_size` pairs; the earlier status is looked up through the
+    (message_id, status) constraint's index.
+    """
+    recent = MessageStatus.objects.filter(timestamp__gte=since).order_by()
+    counts = dict.fromkeys(STATUS_CODES, 0)
+    for row in recent.values('status').annotate(count=Count('pk')):
+        counts[STATUS_NAMES[row['status']]] = row['count']
+    data = {
+        'statuses': counts,
+        'failure_codes': {
+            str(row['error_code']): row['count']
+            for row in recent.filter(status=MessageStatus.FAILED)
+            .values('error_code').annotate(count=Count('pk')).order_by('-count')[:10]
+        },
+    }
+
+    for key, earlier, later in (
+        ('sent_to_delivered', MessageStatus.SENT, MessageStatus.DELIVERED),
+        ('delivered_to_read', MessageStatus.DELIVERED, MessageStatus.READ),
+    ):
+        previous = MessageStatus.objects.filter(message_id=OuterRef('message_id'), status=earlier).values('timestamp')[:1]
+        pairs = (
+            recent.filter(status=later).annotate(previous=Subquery(previous)).exclude(previous=None)
+            .order_by('-timestamp').values_list('timestamp', 'previous')[:sample_size]
+        )
+        data[key] = latency_summary((later_at - earlier_at).total_seconds() for later_at, earlier_at in pairs)
+    return data
+
+
+# --- Retention ---
+
+def prune_statuses(days=None, batch_size=PRUNE_BATCH_SIZE):
+    """
+    Delete statuses older than `days` (WHATSAPP_STATUS_RETENTION_DAYS) in
+    batches, so no single statement holds locks for long. Returns the count.
+    """
+    days = settings.WHATSAPP_STATUS_RETENTION_DAYS if days is None else days
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    deleted = 0
+    while True:
+        ids = list(
+            MessageStatus.objects.filter(timestamp__lt=cutoff).order_by().values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += MessageStatus.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from backend.vemacars.delivery import PRUNE_BATCH_SIZE, prune_statuses
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete WhatsApp delivery statuses older than the retention period, in batches. "
+        "Safe to run from cron on several nodes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help="Keep this many days (default: WHATSAPP_STATUS_RETENTION_DAYS).",
+        )
+        parser.add_argument('--batch-size', type=int, default=PRUNE_BATCH_SIZE)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep running, once every --interval seconds, instead of exiting after one pass.",
+        )
+        parser.add_argument('--interval', type=int, default=3600)
+
+    def handle(self, *args, **options):
+        days = settings.WHATSAPP_STATUS_RETENTION_DAYS if options['days'] is None else options['days']
+        while True:
+            deleted = prune_statuses(days, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} statuses older than {days} days"))
+
+            if not options['loop']:
+                return
+            # Long-running process: don't hold on to a dead or stale connection
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from backend.vemacars.campaigns import CHUNK_SIZE, CONCURRENCY, run_campaign, status_breakdown
+from backend.vemacars.models import Campaign
+
+
+class Command(BaseCommand):
+    help = (
+        "Send queued WhatsApp campaigns, resuming running ones where they stopped. "
+        "Safe to run from cron on several nodes; each campaign is sent by one process at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--campaign', type=int, help="Send this campaign only, whatever its status.")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--concurrency', type=int, default=CONCURRENCY, help="Sends in flight per chunk.")
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep polling for queued campaigns every --interval seconds.",
+        )
+        parser.add_argument('--interval', type=int, default=60)
+
+    def handle(self, *args, **options):
+        while True:
+            if options['campaign']:
+                try:
+                    campaigns = [Campaign.objects.get(pk=options['campaign'])]
+                except Campaign.DoesNotExist:
+                    raise CommandError(f"Campaign {options['campaign']} does not exist")
+            else:
+                campaigns = Campaign.objects.filter(status__in=['queued', 'running']).order_by('created_at')
+
+            for campaign in campaigns:
+                counts = run_campaign(campaign, options['chunk_size'], options['concurrency'])
+                if counts is None:
+                    self.stdout.write(f"{campaign}: another process is sending it; skipped.")
+                    continue
+                campaign.refresh_from_db()
+                summary = ", ".join(f"{key}={value}" for key, value in status_breakdown(campaign).items())
+                self.stdout.write(self.style.SUCCESS(f"{campaign}: this run {counts}; recipients {summary}"))
+
+            if not options['loop'] or options['campaign']:
+                return
+            # Long-running process: don't hold on to a dead or stale connection
+            close_old_connections()
+            time.sleep(options['interval'])
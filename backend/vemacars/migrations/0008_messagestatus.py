@@ -0,0 +1,53 @@
+# Generated by Django 5.1.7 on 2026-10-19 14:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vemacars", "0007_campaign"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MessageStatus",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("message_id", models.CharField(max_length=128)),
+                (
+                    "status",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (1, "Sent"),
+                            (2, "Delivered"),
+                            (3, "Read"),
+                            (4, "Failed"),
+                        ]
+                    ),
+                ),
+                ("timestamp", models.DateTimeField()),
+                ("recipient", models.CharField(blank=True, max_length=20)),
+                ("error_code", models.PositiveIntegerField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["timestamp"], name="vemacars_status_time_idx")
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("message_id", "status"),
+                        name="vemacars_status_unique_message",
+                    )
+                ],
+            },
+        ),
+    ]
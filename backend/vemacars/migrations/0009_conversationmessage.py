@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-19 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vemacars", "0008_messagestatus"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConversationMessage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("phone", models.CharField(max_length=20)),
+                (
+                    "direction",
+                    models.CharField(
+                        choices=[("in", "Inbound"), ("out", "Outbound")], max_length=3
+                    ),
+                ),
+                ("kind", models.CharField(max_length=20)),
+                ("body", models.TextField(blank=True)),
+                ("message_id", models.CharField(blank=True, max_length=128)),
+                ("created_at", models.DateTimeField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["phone", "created_at"], name="vemacars_conversation_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,153 @@
+from django.db import models
+
+
+class Campaign(models.Model):
+    """
+    A WhatsApp broadcast to past customers. Recipients are materialised into
+    CampaignRecipient rows once, then sent in chunks by the run_campaigns
+    command (see vemacars.campaigns); progress lives in those rows, so a
+    stopped or crashed run resumes where it left off.
+    """
+    STATUS_CHOICES = [
+        ('draft', 'Draft'),
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('paused', 'Paused'),
+        ('completed', 'Completed'),
+    ]
+    AUDIENCE_CHOICES = [
+        ('all', 'Customers and booking contacts'),
+        ('customers', 'Customers'),
+        ('booking_contacts', 'Booking contacts'),
+    ]
+
+    name = models.CharField(max_length=100)
+    audience = models.CharField(max_length=20, choices=AUDIENCE_CHOICES, default='all')
+    # Business-initiated messages outside the 24h window must use an approved
+    # template; without one the message is sent as plain text
+    template_name = models.CharField(max_length=100, blank=True)
+    template_language = models.CharField(max_length=10, default='en')
+    message = models.TextField(blank=True, help_text="Text body, or the {{1}} parameter when a template is set.")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
+
+    total = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Set once the audience has been copied into CampaignRecipient rows
+    loaded_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class CampaignRecipient(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('delivered', 'Delivered'),
+        ('read', 'Read'),
+        ('failed', 'Failed'),
+    ]
+
+    campaign = models.ForeignKey(Campaign, related_name='recipients', on_delete=models.CASCADE)
+    # Normalised like Customer.phone_key (api.utils.normalize_phone)
+    phone = models.CharField(max_length=20)
+    name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # wamid returned by the Graph API; joins to MessageStatus.message_id
+    message_id = models.CharField(max_length=128, blank=True, db_index=True)
+    error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'phone'], name='vemacars_recipient_unique_phone'),
+        ]
+        indexes = [
+            # The runner walks pending rows in pk order; counts by status
+            models.Index(fields=['campaign', 'status', 'id'], name='vemacars_recipient_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.phone} ({self.status})"
+
+
+class MessageStatus(models.Model):
+    """
+    One Graph API delivery status (sent / delivered / read / failed) for a
+    message we sent. Kept narrow because status webhooks outnumber inbound
+    messages: no payload, the status as a small integer, the Graph
+    timestamp. Rows are written in batches by vemacars.delivery and pruned
+    after WHATSAPP_STATUS_RETENTION_DAYS by prune_message_statuses.
+    """
+    SENT = 1
+    DELIVERED = 2
+    READ = 3
+    FAILED = 4
+    STATUS_CHOICES = [
+        (SENT, 'Sent'),
+        (DELIVERED, 'Delivered'),
+        (READ, 'Read'),
+        (FAILED, 'Failed'),
+    ]
+
+    # wamid of the outbound message
+    message_id = models.CharField(max_length=128)
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICES)
+    # When the Graph API says the status changed, not when we heard about it
+    timestamp = models.DateTimeField()
+    recipient = models.CharField(max_length=20, blank=True)
+    error_code = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # The Graph API redelivers webhooks it did not get a 200 for
+            models.UniqueConstraint(fields=['message_id', 'status'], name='vemacars_status_unique_message'),
+        ]
+        indexes = [
+            # Metrics windows and retention pruning
+            models.Index(fields=['timestamp'], name='vemacars_status_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.message_id} {self.get_status_display()}"
+
+
+class ConversationMessage(models.Model):
+    """
+    Append-only WhatsApp transcript: what customers sent the bot and what
+    was sent back. Written in batches off the request path by
+    vemacars.transcripts; read a conversation at a time, newest first.
+    """
+    DIRECTION_CHOICES = [
+        ('in', 'Inbound'),
+        ('out', 'Outbound'),
+    ]
+
+    # WhatsApp `from` / `to`: international digits, like Customer.phone_key
+    phone = models.CharField(max_length=20)
+    direction = models.CharField(max_length=3, choices=DIRECTION_CHOICES)
+    # text, interactive, image, template...
+    kind = models.CharField(max_length=20)
+    body = models.TextField(blank=True)
+    # wamid; blank for replies the Graph API did not accept
+    message_id = models.CharField(max_length=128, blank=True)
+    # When the message was received or sent, not when the row was written
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # One conversation, newest first, keyset-paginated (the pk breaks ties)
+            models.Index(fields=['phone', 'created_at'], name='vemacars_conversation_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.phone} {self.direction}: {self.body[:50]}"
@@ -0,0 +1,175 @@
+"""
+Outbound throughput control for the WhatsApp Cloud API.
+
+The Graph API limits messages per second per business phone number. Every
+worker process on the host draws from one token bucket per phone number,
+kept in a small JSON file under WHATSAPP_RATE_LIMIT_DIR and guarded by a
+filelock. A take costs one lock/read/write, tens of microseconds.
+
+Replies to customers outrank broadcasts: broadcasts may only take a token
+while more than WHATSAPP_REPLY_RESERVE tokens are left, so a campaign
+running flat out never makes a customer wait for an answer.
+
+Throttled and transient failures are retried with full jitter exponential
+backoff. When the number itself is throttled (HTTP 429 or a throttling error
+code) the bucket is paused for that long so the other workers back off too.
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import time
+
+from django.conf import settings
+from filelock import FileLock
+
+
+REPLY = 0
+BROADCAST = 1
+
+# Graph API error codes that mean "slow down" for the whole number
+# 4: app request limit, 80007: WABA rate limit, 130429: throughput limit
+THROTTLING_CODES = {4, 80007, 130429}
+# Too many messages to one customer; only that conversation has to wait
+PAIR_RATE_LIMIT = 131056
+
+
+class TokenBucket:
+    """
+    `rate` tokens per second up to `capacity`, shared through `path`.
+    """
+
+    def __init__(self, path, rate, capacity, reserve=0, clock=time.time):
+        self.path = path
+        self.rate = rate
+        self.capacity = capacity
+        self.reserve = min(reserve, capacity - 1)
+        self.clock = clock
+        self.lock = FileLock(f'{path}.lock')
+
+    def locked(self):
+        # filelock polls every 50 ms by default; the lock is held for
+        # microseconds, so poll fast or waiting senders add latency
+        return self.lock.acquire(poll_interval=0.001)
+
+    def _read(self, now):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {'tokens': self.capacity, 'updated': now, 'paused_until': 0}
+        # Refill for the time since the last take
+        state['tokens'] = min(self.capacity, state['tokens'] + max(now - state['updated'], 0) * self.rate)
+        state['updated'] = max(now, state['updated'])
+        return state
+
+    def _write(self, state):
+        with open(self.path, 'w') as f:
+            json.dump(state, f)
+
+    def take(self, priority=REPLY):
+        """
+        Take a token if one is available to `priority`. Returns 0 on success,
+        otherwise the number of seconds to wait before asking again.
+        """
+        floor = 0 if priority == REPLY else self.reserve
+        with self.locked():
+            now = self.clock()
+            state = self._read(now)
+            if state['paused_until'] > now:
+                wait = state['paused_until'] - now
+            elif state['tokens'] >= floor + 1:
+                state['tokens'] -= 1
+                wait = 0
+            else:
+                wait = (floor + 1 - state['tokens']) / self.rate
+            self._write(state)
+        return wait
+
+    def acquire(self, priority=REPLY, deadline=math.inf):
+        """
+        Wait for a token. Returns False, without waiting, once getting one
+        would run past `deadline` (a time.monotonic() value).
+        """
+        while wait := self.take(priority):
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, priority=REPLY, deadline=math.inf):
+        # The file lock is held for microseconds, so taking it on the loop is fine
+        while wait := self.take(priority):
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+        return True
+
+    def pause(self, seconds):
+        """
+        Stop every worker from sending for `seconds` and drain the bucket, so
+        sending resumes at the steady rate rather than with a burst.
+        """
+        with self.locked():
+            now = self.clock()
+            state = self._read(now)
+            state['paused_until'] = max(state['paused_until'], now + seconds)
+            # Refill starts when the pause ends
+            state['tokens'] = 0
+            state['updated'] = state['paused_until']
+            self._write(state)
+
+
+_buckets = {}
+
+
+def bucket_for(phone_number_id):
+    directory = settings.WHATSAPP_RATE_LIMIT_DIR
+    rate = settings.WHATSAPP_SEND_RATE
+    key = (directory, rate, settings.WHATSAPP_SEND_BURST, phone_number_id)
+    if key not in _buckets:
+        os.makedirs(directory, exist_ok=True)
+        _buckets[key] = TokenBucket(
+            os.path.join(directory, f'{phone_number_id}.bucket'),
+            rate=rate,
+            capacity=settings.WHATSAPP_SEND_BURST,
+            reserve=settings.WHATSAPP_REPLY_RESERVE,
+        )
+    return _buckets[key]
+
+
+def graph_error(body):
+    if isinstance(body, dict) and isinstance(body.get('error'), dict):
+        return body['error']
+    return {}
+
+
+def is_throttled(status, body):
+    return status == 429 or graph_error(body).get('code') in THROTTLING_CODES
+
+
+def retry_delay(attempt, status, body, retry_after=None):
+    """
+    Seconds to wait before retrying a failed send, or None when it should not
+    be retried (the message itself was rejected, or attempts are used up).
+    """
+    if attempt + 1 >= settings.WHATSAPP_SEND_RETRIES:
+        return None
+    error = graph_error(body)
+    retryable = (
+        is_throttled(status, body)
+        or error.get('code') == PAIR_RATE_LIMIT
+        or error.get('is_transient')
+        or status in (502, 503)
+    )
+    if not retryable:
+        return None
+
+    # Full jitter: spreads retries from many workers instead of synchronising them
+    delay = random.uniform(0, min(settings.WHATSAPP_SEND_BACKOFF_MAX, settings.WHATSAPP_SEND_BACKOFF * 2 ** attempt))
+    try:
+        # Honour Retry-After, within the same cap as our own backoff
+        return max(delay, min(float(retry_after), settings.WHATSAPP_SEND_BACKOFF_MAX))
+    except (TypeError, ValueError):
+        return delay
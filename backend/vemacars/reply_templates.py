@@ -0,0 +1,159 @@
+"""
+Precompiled bot replies.
+
+Most of what the bot sends depends only on its car catalog: the welcome text,
+category lists, car details, booking options, and the buttons, lists and
+images that go with them. ReplyTemplates builds each reply once per catalog
+version. The customer's name and booking fields stay as slots, so answering
+a message fills a few slots instead of rebuilding the f-strings, button
+dicts and Graph API action objects.
+
+Replies are compiled from the bot's own generate_* methods: they are called
+once with Slot placeholders instead of real values, and the text they return
+becomes the template. The wording stays in one place.
+"""
+
+SLOT_MARK = '\x00'
+
+# Shown on the list message's menu button (plan_reply uses it too)
+LIST_BUTTON_TEXT = 'Select Option'
+
+
+class Slot:
+    """
+    Stands in for a value while a reply is compiled. Formats to a marker that
+    Template turns back into a slot, keeping the format spec.
+    """
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __format__(self, spec):
+        return f'{SLOT_MARK}{self.name}:{spec}{SLOT_MARK}' if spec else f'{SLOT_MARK}{self.name}{SLOT_MARK}'
+
+    def __str__(self):
+        return format(self, '')
+
+
+class SlotRecord:
+    """
+    A booking (or any dict) whose every field is a Slot of the same name.
+    """
+
+    def __getitem__(self, key):
+        return Slot(key)
+
+
+class Template:
+    """
+    Reply text split once into literal pieces and slots; render() joins the
+    pieces with the formatted slot values.
+    """
+    __slots__ = ('head', 'fields')
+
+    def __init__(self, text):
+        pieces = text.split(SLOT_MARK)
+        # Even pieces are literal text, odd ones are "name" or "name:spec"
+        self.head = pieces[0]
+        self.fields = tuple(
+            (*field.partition(':')[::2], literal)
+            for field, literal in zip(pieces[1::2], pieces[2::2])
+        )
+
+    def render(self, values):
+        parts = [self.head]
+        for name, spec, literal in self.fields:
+            parts.append(format(values[name], spec))
+            parts.append(literal)
+        return ''.join(parts)
+
+
+# --- Graph API interactive objects (shared with WhatsAppResponseService) ---
+
+def button_action(buttons):
+    return {
+        "buttons": [
+            {
+                "type": "reply",
+                "reply": {
+                    "id": button.get('id', f'btn_{index}'),
+                    "title": button['title'][:20]
+                }
+            }
+            for index, button in enumerate(buttons[:3])
+        ]
+    }
+
+
+def list_action(button_text, sections):
+    # Check if 'sections' is just a list of items or already formatted sections
+    formatted_sections = sections
+    if isinstance(sections, list) and len(sections) > 0 and 'rows' not in sections[0]:
+        # It's likely a simple list of items (title, description), wrap in one section
+        formatted_sections = [{
+            "title": "Options",
+            "rows": [
+                {
+                    "id": item.get('id', f"section_row_{index}"),
+                    "title": item['title'][:24],
+                    "description": item.get('description', '')[:72]
+                }
+                for index, item in enumerate(sections)
+            ]
+        }]
+    return {
+        "button": button_text,
+        "sections": formatted_sections
+    }
+
+
+class Reply:
+    """
+    One compiled reply: its text template and everything sent with it.
+    The buttons, list items, images and interactive object are shared by
+    every message that uses the reply; treat them as read-only.
+    """
+    __slots__ = ('text', 'buttons', 'list_items', 'images', 'interactive', 'message_type')
+
+    def __init__(self, text, buttons=None, list_items=None, images=None):
+        self.text = Template(text)
+        self.buttons = buttons
+        self.list_items = list_items
+        self.images = images or []
+        if buttons:
+            self.message_type = 'interactive_buttons'
+            self.interactive = {'type': 'button', 'action': button_action(buttons)}
+        elif list_items:
+            self.message_type = 'interactive_list'
+            self.interactive = {'type': 'list', 'action': list_action(LIST_BUTTON_TEXT, list_items)}
+        else:
+            self.message_type = 'text'
+            self.interactive = None
+
+    def render(self, **values):
+        return self.text.render(values)
+
+
+class ReplyTemplates:
+    """
+    A bot's compiled replies, keyed by (name, *args). Each reply is compiled
+    by bot.compile_reply() the first time it is used, and everything is
+    dropped when bot.catalog_version changes.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.compiled = (None, {})
+
+    def get(self, name, *args):
+        version, replies = self.compiled
+        if version != self.bot.catalog_version:
+            # Swapped as one tuple: a compile racing a version bump lands in the old dict
+            version, replies = self.bot.catalog_version, {}
+            self.compiled = (version, replies)
+        key = (name, *args)
+        reply = replies.get(key)
+        if reply is None:
+            reply = replies[key] = self.bot.compile_reply(name, *args)
+        return reply
@@ -0,0 +1,9 @@
+from rest_framework import serializers
+
+from .models import ConversationMessage
+
+
+class ConversationMessageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ConversationMessage
+        fields = ['id', 'direction', 'kind', 'body', 'message_id', 'created_at']
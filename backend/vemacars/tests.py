@@ -1,3 +1,718 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import io
+import json
+import os
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import path
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+import requests
+from backend.api.middleware import ReplicaRoutingMiddleware
+from backend.api.models import Booking, BookingCustomerInfo, Car, Customer
+from .car_rental_bot import CarRentalBotService
+from .campaigns import checkpoint, load_recipients, record_statuses, run_campaign, status_breakdown
+from .delivery import StatusWriter, delivery_metrics, prune_statuses, status_writer
+from .models import Campaign, CampaignRecipient, ConversationMessage, MessageStatus
+from .ratelimit import BROADCAST, REPLY, TokenBucket, bucket_for, retry_delay
+from .reply_templates import LIST_BUTTON_TEXT
+from .transcripts import transcript_writer
+from .views import whatsapp_webhook_async
+from .whatsapp_cloud import AsyncWhatsAppService, DeferredSender, WhatsAppResponseService, async_whatsapp_service
+
+
+@override_settings(WHATSAPP_VERIFY_TOKEN='verify-me')
+class WebhookQueryCountTests(TestCase):
+    """
+    The WhatsApp webhook is hit for every inbound message and status update;
+    it must not touch the database. Statuses are written later, in batches.
+    """
+
+    def test_verification_challenge(self):
+        params = {'hub.mode': 'subscribe', 'hub.verify_token': 'verify-me', 'hub.challenge': '42'}
+        with self.assertNumQueries(0):
+            response = self.client.get('/webhooks/whatsapp/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'42')
+
+    def test_ignored_payload(self):
+        with self.assertNumQueries(0):
+            response = self.client.post('/webhooks/whatsapp/', {'object': 'whatsapp_business_account'}, content_type='application/json')
+        self.assertEqual(response.json(), {'status': 'ignored_bad_format'})
+
+    def test_status_update_without_message(self):
+        payload = {
+            'object': 'whatsapp_business_account',
+            'entry': [{'changes': [{'value': {'statuses': [{'id': 'wamid.1', 'status': 'delivered'}]}}]}],
+        }
+        with override_settings(WHATSAPP_STATUS_FLUSH_INTERVAL=60), mock.patch.object(status_writer, 'start'):
+            with self.assertNumQueries(0):
+                response = self.client.post('/webhooks/whatsapp/', payload, content_type='application/json')
+            self.assertEqual(response.json(), {'status': 'statuses_received', 'count': 1})
+            # What the writer thread does a moment later; not a campaign message, so one INSERT
+            with self.assertNumQueries(1):
+                status_writer.flush()
+        self.assertTrue(MessageStatus.objects.filter(message_id='wamid.1', status=MessageStatus.DELIVERED).exists())
+
+
+# --- ASYNC WEBHOOK ---
+
+urlpatterns = [path('webhooks/whatsapp/', whatsapp_webhook_async)]
+
+
+def inbound(phone, text='hi'):
+    return {
+        'object': 'whatsapp_business_account',
+        'entry': [{'changes': [{'value': {
+            'contacts': [{'profile': {'name': 'Test User'}, 'wa_id': phone}],
+            'messages': [{'from': phone, 'id': f'wamid.in{phone}', 'timestamp': '0', 'type': 'text', 'text': {'body': text}}],
+        }}]}],
+    }
+
+
+class GraphStub:
+    """
+    httpx transport standing in for the Graph API: records what was sent and
+    answers after `latency` seconds without blocking the event loop.
+    """
+
+    def __init__(self, latency=0, status=200, throttle=0, errors=None):
+        self.latency = latency
+        self.status = status
+        self.throttle = throttle
+        self.errors = errors or {}  # recipient phone -> Graph error body
+        self.sent = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.transport = httpx.MockTransport(self.handle)
+
+    async def handle(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        payload = json.loads(request.content)
+        self.sent.append(payload)
+        if payload['to'] in self.errors:
+            return httpx.Response(400, json=self.errors[payload['to']])
+        if len(self.sent) <= self.throttle:
+            return httpx.Response(400, json={'error': {'code': 130429, 'message': 'Rate limit hit'}})
+        if self.status != 200:
+            return httpx.Response(self.status, json={'error': {'message': 'Invalid parameter'}})
+        return httpx.Response(200, json={'messages': [{'id': f'wamid.out{len(self.sent)}'}]})
+
+
+@override_settings(ROOT_URLCONF='backend.vemacars.tests')
+class AsyncWebhookTests(SimpleTestCase):
+    """
+    whatsapp_webhook_async replies through the httpx client; nothing touches
+    the database. The transcript stays in the writer's buffer.
+    """
+
+    def setUp(self):
+        # A fresh, full send bucket per test
+        settings_override = override_settings(
+            WHATSAPP_RATE_LIMIT_DIR=tempfile.mkdtemp(), WHATSAPP_SEND_BACKOFF=0.001,
+            WHATSAPP_TRANSCRIPT_FLUSH_INTERVAL=60,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for patcher in (mock.patch.object(transcript_writer, 'start'), mock.patch.object(transcript_writer, '_items', [])):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.service = async_whatsapp_service
+        saved = (self.service.access_token, self.service.phone_number_id, self.service.enabled)
+        self.service.access_token, self.service.phone_number_id, self.service.enabled = 'token', '1', True
+        self.addCleanup(self.restore, saved)
+
+    def restore(self, saved):
+        self.service.access_token, self.service.phone_number_id, self.service.enabled = saved
+        self.service.use_transport(None)
+
+    def stub(self, **kwargs):
+        stub = GraphStub(**kwargs)
+        self.service.use_transport(stub.transport)
+        return stub
+
+    async def post(self, payload):
+        return await self.async_client.post('/webhooks/whatsapp/', payload, content_type='application/json')
+
+    async def test_reply_sent_to_graph_api(self):
+        stub = self.stub()
+        response = await self.post(inbound('255700000001'))
+        self.assertEqual(response.json(), {'status': 'processed'})
+        [sent] = stub.sent
+        self.assertEqual(sent['to'], '255700000001')
+        self.assertEqual(sent['type'], 'interactive')
+        self.assertEqual(sent['interactive']['action']['buttons'][0]['reply']['id'], 'browse_cars')
+
+        inbound_row, reply_row = transcript_writer._items
+        self.assertEqual((inbound_row.direction, inbound_row.body), ('in', 'hi'))
+        self.assertEqual((reply_row.direction, reply_row.kind, reply_row.message_id), ('out', 'interactive', 'wamid.out1'))
+        self.assertIn('[', reply_row.body)
+
+    async def test_graph_error_is_reported(self):
+        self.stub(status=400)
+        response = await self.post(inbound('255700000002'))
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['error'], {'error': {'message': 'Invalid parameter'}})
+
+    async def test_throttled_send_is_retried(self):
+        stub = self.stub(throttle=2)
+        response = await self.post(inbound('255700000003'))
+        self.assertEqual(response.json(), {'status': 'processed'})
+        self.assertEqual(len(stub.sent), 3)
+
+    async def test_reply_over_budget_is_deferred(self):
+        stub = self.stub(throttle=5)
+        with override_settings(WHATSAPP_REPLY_BUDGET=0), \
+                mock.patch('backend.vemacars.whatsapp_cloud.deferred_sender', spec=DeferredSender) as sender:
+            response = await self.post(inbound('255700000004'))
+        self.assertEqual(response.json(), {'status': 'processed'})
+        self.assertEqual(len(stub.sent), 1)
+        [(kind, payload)], = sender.aenqueue.call_args.args
+        self.assertEqual((kind, payload['to']), ('interactive buttons', '255700000004'))
+        # The sender logs the reply once it is out
+        [inbound_row] = transcript_writer._items
+        self.assertEqual(inbound_row.direction, 'in')
+
+    async def test_deferred_reply_keeps_its_order(self):
+        stub = self.stub(throttle=5)
+        image = ('image', self.service.image_payload('255700000005', 'https://example.com/car.jpg'))
+        text = ('message', self.service.text_payload('255700000005', 'Hello'))
+        with override_settings(WHATSAPP_REPLY_BUDGET=0), \
+                mock.patch.object(self.service, 'plan_reply', return_value=({'success': True}, [image, text])), \
+                mock.patch('backend.vemacars.whatsapp_cloud.deferred_sender', spec=DeferredSender) as sender:
+            await self.service.process_incoming_message({'from': '255700000005', 'message': 'hi', 'name': 'Asha'})
+        self.assertEqual(len(stub.sent), 1)
+        self.assertEqual([call.args[0] for call in sender.aenqueue.call_args_list], [[image], [text]])
+
+    async def test_ignored_payload(self):
+        stub = self.stub()
+        response = await self.post({'object': 'whatsapp_business_account'})
+        self.assertEqual(response.json(), {'status': 'ignored_bad_format'})
+        self.assertEqual(stub.sent, [])
+
+    async def test_concurrent_conversations_overlap(self):
+        # With a thread (or a sync middleware) per request these would queue
+        # behind each other: 50 x 0.2s. On the event loop they overlap.
+        stub = self.stub(latency=0.2)
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(self.post(inbound(f'2557{i:08d}')) for i in range(50)))
+        elapsed = time.perf_counter() - start
+        self.assertTrue(all(r.json() == {'status': 'processed'} for r in responses))
+        self.assertEqual(len(stub.sent), 50)
+        self.assertGreater(stub.max_in_flight, 10)
+        self.assertLess(elapsed, 5)
+
+
+# --- SEND RATE LIMITING ---
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TokenBucketTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.path = os.path.join(tempfile.mkdtemp(), 'number.bucket')
+        self.bucket = TokenBucket(self.path, rate=2, capacity=3, reserve=1, clock=self.clock)
+
+    def test_burst_then_steady_rate(self):
+        self.assertEqual([self.bucket.take() for _ in range(3)], [0, 0, 0])
+        self.assertEqual(self.bucket.take(), 0.5)
+        self.clock.now += 0.5
+        self.assertEqual(self.bucket.take(), 0)
+
+    def test_broadcasts_leave_reserve_for_replies(self):
+        self.assertEqual([self.bucket.take(BROADCAST) for _ in range(2)], [0, 0])
+        self.assertGreater(self.bucket.take(BROADCAST), 0)
+        self.assertEqual(self.bucket.take(REPLY), 0)
+
+    def test_state_is_shared_through_the_file(self):
+        other = TokenBucket(self.path, rate=2, capacity=3, clock=self.clock)
+        self.bucket.take()
+        other.take()
+        self.bucket.take()
+        self.assertGreater(other.take(), 0)
+
+    def test_pause_stops_every_sender(self):
+        self.bucket.pause(5)
+        self.assertEqual(self.bucket.take(REPLY), 5)
+        self.clock.now += 5
+        # Drained: sending resumes at the steady rate, not with a burst
+        self.assertEqual(self.bucket.take(REPLY), 0.5)
+
+
+class RetryDelayTests(SimpleTestCase):
+
+    def test_rejected_message_is_final(self):
+        self.assertIsNone(retry_delay(0, 400, {'error': {'code': 131026, 'message': 'Undeliverable'}}))
+
+    def test_throttled_backoff_grows_with_jitter(self):
+        throttled = {'error': {'code': 130429}}
+        with override_settings(WHATSAPP_SEND_BACKOFF=1, WHATSAPP_SEND_BACKOFF_MAX=30, WHATSAPP_SEND_RETRIES=6):
+            for attempt, ceiling in enumerate([1, 2, 4, 8, 16]):
+                self.assertTrue(0 <= retry_delay(attempt, 400, throttled) <= ceiling)
+            self.assertIsNone(retry_delay(5, 400, throttled))
+
+    def test_retry_after_is_honoured(self):
+        with override_settings(WHATSAPP_SEND_BACKOFF=0.001):
+            self.assertEqual(retry_delay(0, 429, None, '3'), 3)
+
+    def test_retry_after_is_capped(self):
+        with override_settings(WHATSAPP_SEND_BACKOFF=0.001, WHATSAPP_SEND_BACKOFF_MAX=5):
+            self.assertEqual(retry_delay(0, 429, None, '120'), 5)
+
+
+@override_settings(WHATSAPP_SEND_BACKOFF=0.001)
+class SyncSendRetryTests(SimpleTestCase):
+
+    def setUp(self):
+        settings_override = override_settings(WHATSAPP_RATE_LIMIT_DIR=tempfile.mkdtemp())
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.service = WhatsAppResponseService()
+        self.service.access_token, self.service.phone_number_id, self.service.enabled = 'token', '1', True
+
+    def response(self, status, body):
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        return response
+
+    def test_throttled_then_sent(self):
+        replies = [
+            self.response(429, {'error': {'code': 130429}}),
+            self.response(200, {'messages': [{'id': 'wamid.1'}]}),
+        ]
+        with mock.patch('backend.vemacars.whatsapp_cloud.requests.post', side_effect=replies) as post:
+            result = self.service.send_text_message('255700000001', 'Hello')
+        self.assertEqual(result['messageId'], 'wamid.1')
+        self.assertEqual(post.call_count, 2)
+        # The pause was shared with every other sender of the number
+        self.assertGreater(bucket_for('1').take(), 0)
+
+    def test_reply_over_budget_is_deferred(self):
+        throttled = self.response(429, {'error': {'code': 130429}})
+        throttled.headers['Retry-After'] = '20'
+        with mock.patch('backend.vemacars.whatsapp_cloud.requests.post', return_value=throttled) as post, \
+                mock.patch('backend.vemacars.whatsapp_cloud.deferred_sender') as sender, \
+                mock.patch('backend.vemacars.whatsapp_cloud.time.sleep') as sleep:
+            result = self.service.send_text_message('255700000001', 'Hello')
+        self.assertTrue(result['deferred'])
+        self.assertEqual(post.call_count, 1)
+        sleep.assert_not_called()
+        [(kind, payload)], = sender.enqueue.call_args.args
+        self.assertEqual((kind, payload['text']['body']), ('message', 'Hello'))
+
+    def test_deferred_reply_keeps_its_order(self):
+        throttled = self.response(429, {'error': {'code': 130429}})
+        throttled.headers['Retry-After'] = '20'
+        image = ('image', self.service.image_payload('255700000001', 'https://example.com/car.jpg'))
+        text = ('message', self.service.text_payload('255700000001', 'Hello'))
+        with mock.patch.object(self.service, 'plan_reply', return_value=({'success': True}, [image, text])), \
+                mock.patch('backend.vemacars.whatsapp_cloud.requests.post', return_value=throttled) as post, \
+                mock.patch('backend.vemacars.whatsapp_cloud.deferred_sender') as sender, \
+                mock.patch.object(self.service, 'log_transcript'):
+            self.service.process_incoming_message({'from': '255700000001', 'message': 'hi', 'name': 'Asha'})
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual([call.args[0] for call in sender.enqueue.call_args_list], [[image], [text]])
+
+    def test_frontend_send_over_budget_is_queued(self):
+        throttled = self.response(429, {'error': {'code': 130429}})
+        throttled.headers['Retry-After'] = '20'
+        with mock.patch('backend.vemacars.views.whatsapp_service', self.service), \
+                mock.patch('backend.vemacars.whatsapp_cloud.requests.post', return_value=throttled), \
+                mock.patch('backend.vemacars.whatsapp_cloud.deferred_sender') as sender, \
+                mock.patch.object(self.service, 'log_transcript') as log_transcript:
+            response = self.client.post(
+                '/api/send-whatsapp/', {'phone': '255700000001', 'message': 'Hello'}, content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {'status': 'queued'})
+        sender.enqueue.assert_called_once()
+        # deferred_sender logs it once it is sent
+        log_transcript.assert_not_called()
+
+    def test_deferred_sender_retries_without_budget(self):
+        replies = [
+            self.response(429, {'error': {'code': 130429}}),
+            self.response(200, {'messages': [{'id': 'wamid.2'}]}),
+        ]
+        payload = self.service.text_payload('255700000001', 'Hello')
+        with override_settings(WHATSAPP_REPLY_BUDGET=0), \
+                mock.patch('backend.vemacars.whatsapp_cloud.whatsapp_service', self.service), \
+                mock.patch('backend.vemacars.whatsapp_cloud.requests.post', side_effect=replies) as post, \
+                mock.patch.object(self.service, 'log_transcript') as log_transcript:
+            DeferredSender(batch_size=1).write([('message', payload)])
+        self.assertEqual(post.call_count, 2)
+        [message], = log_transcript.call_args.args
+        self.assertEqual(message.message_id, 'wamid.2')
+
+    def test_rejected_message_is_not_retried(self):
+        rejected = self.response(400, {'error': {'code': 131026}})
+        with mock.patch('backend.vemacars.whatsapp_cloud.requests.post', return_value=rejected) as post:
+            result = self.service.send_text_message('255700000001', 'Hello')
+        self.assertFalse(result['success'])
+        self.assertEqual(post.call_count, 1)
+
+
+# --- CAMPAIGNS ---
+
+def status_webhook(status, callback_data, message_id='wamid.out1', errors=None):
+    value = {'id': message_id, 'status': status, 'timestamp': '0', 'recipient_id': '255712000000'}
+    if callback_data:
+        value['biz_opaque_callback_data'] = callback_data
+    if errors:
+        value['errors'] = errors
+    return {'object': 'whatsapp_business_account', 'entry': [{'changes': [{'value': {'statuses': [value]}}]}]}
+
+
+@override_settings(WHATSAPP_SEND_BACKOFF=0.001)
+class CampaignTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            Customer.objects.create(name=f'Customer {i}', email=f'c{i}@example.com', phone_number=f'07120000{i:02d}')
+        Customer.objects.create(name='No phone', email='nophone@example.com')
+
+        car = Car.objects.create(name='Car', seats=5, location='Arusha', price_per_day=80)
+        # One repeat customer and two guests
+        for i, phone in enumerate(['0712000000', '0754000001', '0754000002']):
+            booking = Booking.objects.create(
+                car=car, rental_start=datetime.date(2025, 3, 1), rental_end=datetime.date(2025, 3, 4),
+            )
+            BookingCustomerInfo.objects.create(
+                booking=booking, full_name=f'Guest {i}', email=f'g{i}@example.com', phone_number=phone,
+            )
+
+    def setUp(self):
+        settings_override = override_settings(WHATSAPP_RATE_LIMIT_DIR=tempfile.mkdtemp())
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.campaign = Campaign.objects.create(name='Weekend offer', message='20% off SUVs this weekend')
+
+    def service(self, **stub_options):
+        self.stub = GraphStub(**stub_options)
+        service = AsyncWhatsAppService(transport=self.stub.transport)
+        service.access_token, service.phone_number_id, service.enabled = 'token', '1', True
+        return service
+
+    def test_audience_is_deduplicated_by_phone(self):
+        self.assertEqual(load_recipients(self.campaign, chunk_size=2), 7)
+        self.assertEqual(self.campaign.recipients.get(phone='255712000000').name, 'Customer 0')
+        # Loading again adds nothing
+        self.assertEqual(load_recipients(self.campaign), 7)
+
+    def test_run_sends_every_recipient_in_chunks(self):
+        counts = run_campaign(self.campaign, chunk_size=3, concurrency=2, service=self.service())
+        self.assertEqual(counts, {'sent': 7, 'failed': 0, 'deferred': 0})
+
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.status, self.campaign.total, self.campaign.sent_count), ('completed', 7, 7))
+        self.assertEqual(status_breakdown(self.campaign), {'sent': 7})
+        self.assertFalse(self.campaign.recipients.filter(message_id='').exists())
+
+        recipient = self.campaign.recipients.get(phone='255754000001')
+        [payload] = [p for p in self.stub.sent if p['to'] == '255754000001']
+        self.assertEqual(payload['text']['body'], '20% off SUVs this weekend')
+        self.assertEqual(payload['biz_opaque_callback_data'], f'campaign-recipient:{recipient.pk}')
+
+    def test_resume_skips_recipients_already_sent(self):
+        load_recipients(self.campaign)
+        done = list(self.campaign.recipients.order_by('pk')[:3])
+        CampaignRecipient.objects.filter(pk__in=[r.pk for r in done]).update(status='sent')
+
+        counts = run_campaign(self.campaign, chunk_size=2, service=self.service())
+        self.assertEqual(counts['sent'], 4)
+        self.assertNotIn(done[0].phone, [p['to'] for p in self.stub.sent])
+
+    def test_template_campaign(self):
+        self.campaign.template_name = 'weekend_offer'
+        self.campaign.save()
+        run_campaign(self.campaign, service=self.service())
+        template = self.stub.sent[0]['template']
+        self.assertEqual(template['name'], 'weekend_offer')
+        self.assertEqual(template['components'][0]['parameters'], [{'type': 'text', 'text': '20% off SUVs this weekend'}])
+
+    @override_settings(WHATSAPP_SEND_RETRIES=1)
+    def test_rejected_fail_and_throttled_stay_pending(self):
+        service = self.service(errors={
+            '255712000001': {'error': {'code': 131026, 'message': 'Message undeliverable'}},
+            '255712000002': {'error': {'code': 130429, 'message': 'Rate limit hit'}},
+        })
+        counts = run_campaign(self.campaign, service=service)
+        self.assertEqual(counts, {'sent': 5, 'failed': 1, 'deferred': 1})
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, 'running')
+        self.assertEqual(self.campaign.recipients.get(phone='255712000001').status, 'failed')
+        self.assertEqual(self.campaign.recipients.get(phone='255712000002').status, 'pending')
+
+        # The next pass sends the deferred recipient and completes
+        counts = run_campaign(self.campaign, service=self.service())
+        self.assertEqual(counts, {'sent': 1, 'failed': 0, 'deferred': 0})
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, 'completed')
+
+    def test_delivery_webhooks_move_status_forward(self):
+        run_campaign(self.campaign, service=self.service())
+        recipient = self.campaign.recipients.order_by('pk').first()
+        callback = f'campaign-recipient:{recipient.pk}'
+
+        for status, expected in [('delivered', 'delivered'), ('sent', 'delivered'), ('read', 'read'), ('delivered', 'read')]:
+            # MessageStatus insert and recipient update
+            with self.assertNumQueries(2):
+                self.client.post('/webhooks/whatsapp/', status_webhook(status, callback), content_type='application/json')
+            recipient.refresh_from_db()
+            self.assertEqual(recipient.status, expected)
+
+    def test_failed_receipt_records_error(self):
+        run_campaign(self.campaign, service=self.service())
+        recipient = self.campaign.recipients.order_by('pk').first()
+        errors = [{'code': 131049, 'title': 'Message not delivered to maintain healthy ecosystem engagement'}]
+        response = self.client.post(
+            '/webhooks/whatsapp/', status_webhook('failed', f'campaign-recipient:{recipient.pk}', errors=errors),
+            content_type='application/json',
+        )
+        self.assertEqual(response.json(), {'status': 'statuses_received', 'count': 1})
+        recipient.refresh_from_db()
+        self.assertEqual(recipient.status, 'failed')
+        self.assertIn('131049', recipient.error)
+
+    def test_receipt_before_checkpoint_is_kept(self):
+        load_recipients(self.campaign)
+        recipient = self.campaign.recipients.order_by('pk').first()
+        record_statuses([{'id': 'wamid.early', 'status': 'delivered', 'biz_opaque_callback_data': f'campaign-recipient:{recipient.pk}'}])
+
+        checkpoint(self.campaign, [recipient], [{'success': True, 'messageId': 'wamid.early'}])
+        recipient.refresh_from_db()
+        self.assertEqual((recipient.status, recipient.message_id), ('delivered', 'wamid.early'))
+
+    def test_receipts_are_applied_per_status(self):
+        load_recipients(self.campaign)
+        ids = list(self.campaign.recipients.order_by('pk').values_list('pk', flat=True))
+        statuses = [
+            {'id': f'wamid.{pk}', 'status': 'delivered', 'biz_opaque_callback_data': f'campaign-recipient:{pk}'}
+            for pk in ids
+        ] + [{'id': f'wamid.{ids[0]}', 'status': 'read', 'biz_opaque_callback_data': f'campaign-recipient:{ids[0]}'}]
+        with self.assertNumQueries(2):
+            self.assertEqual(record_statuses(statuses), 8)
+        self.assertEqual(status_breakdown(self.campaign), {'delivered': 6, 'read': 1})
+
+
+# --- DELIVERY STATUSES ---
+
+def status_at(message_id, status, seconds, **fields):
+    return MessageStatus(
+        message_id=message_id, status=status,
+        timestamp=datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(seconds=seconds),
+        **fields,
+    )
+
+
+class DeliveryStatusTests(TestCase):
+
+    def statuses(self, *entries):
+        return [
+            {'id': message_id, 'status': status, 'timestamp': str(1767225600 + seconds), 'recipient_id': '255712000000'}
+            for message_id, status, seconds in entries
+        ]
+
+    def test_buffered_statuses_are_written_in_one_batch(self):
+        writer = StatusWriter(interval=60, batch_size=3)
+        with mock.patch.object(writer, 'start'):
+            with self.assertNumQueries(0):
+                writer.add(self.statuses(('wamid.1', 'sent', 0), ('wamid.1', 'delivered', 2)))
+            self.assertFalse(writer._wake.is_set())
+            # Redelivered by the Graph API, plus a status we don't track
+            writer.add(self.statuses(('wamid.1', 'delivered', 2), ('wamid.1', 'deleted', 5)))
+            self.assertTrue(writer._wake.is_set())
+            self.assertEqual(writer.pending, 3)
+
+            with self.assertNumQueries(1):
+                self.assertEqual(writer.flush(), 3)
+        self.assertEqual(writer.pending, 0)
+        self.assertEqual(
+            list(MessageStatus.objects.order_by('status').values_list('status', 'timestamp__second')),
+            [(MessageStatus.SENT, 0), (MessageStatus.DELIVERED, 2)],
+        )
+
+    def test_failed_status_keeps_error_code(self):
+        [failed] = self.statuses(('wamid.2', 'failed', 0))
+        failed['errors'] = [{'code': 131049, 'title': 'Not delivered'}]
+        status_writer.add([failed])
+        self.assertEqual(MessageStatus.objects.get(message_id='wamid.2').error_code, 131049)
+
+    def test_delivery_metrics(self):
+        rows = []
+        for i in range(10):
+            rows += [status_at(f'wamid.{i}', MessageStatus.SENT, 0), status_at(f'wamid.{i}', MessageStatus.DELIVERED, i + 1)]
+        rows += [status_at('wamid.0', MessageStatus.READ, 61), status_at('wamid.x', MessageStatus.FAILED, 0, error_code=131026)]
+        MessageStatus.objects.bulk_create(rows)
+
+        since = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        with self.assertNumQueries(4):
+            metrics = delivery_metrics(since)
+        self.assertEqual(metrics['statuses'], {'sent': 10, 'delivered': 10, 'read': 1, 'failed': 1})
+        self.assertEqual(metrics['failure_codes'], {'131026': 1})
+        self.assertEqual(metrics['sent_to_delivered'], {'count': 10, 'p50': 6.0, 'p95': 10.0, 'p99': 10.0, 'max': 10.0})
+        self.assertEqual(metrics['delivered_to_read'], {'count': 1, 'p50': 60.0, 'p95': 60.0, 'p99': 60.0, 'max': 60.0})
+
+    def test_metrics_view_is_staff_only(self):
+        client = APIClient()
+        client.cookies[ReplicaRoutingMiddleware.cookie_name] = '1'
+        self.assertEqual(client.get('/api/_metrics/whatsapp-delivery/').status_code, 401)
+
+        status_writer.add([{'id': 'wamid.3', 'status': 'sent', 'timestamp': str(int(time.time()))}])
+        client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+        response = client.get('/api/_metrics/whatsapp-delivery/', {'hours': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['statuses']['sent'], 1)
+        self.assertEqual(client.get('/api/_metrics/whatsapp-delivery/', {'hours': 'x'}).status_code, 400)
+
+    def test_prune_deletes_old_statuses_in_batches(self):
+        now = timezone.now()
+        MessageStatus.objects.bulk_create([
+            MessageStatus(message_id=f'wamid.{i}', status=MessageStatus.SENT, timestamp=now - datetime.timedelta(days=i * 10))
+            for i in range(6)
+        ])
+        self.assertEqual(prune_statuses(days=30, batch_size=2), 3)
+        self.assertEqual(MessageStatus.objects.count(), 3)
+
+        out = io.StringIO()
+        call_command('prune_message_statuses', days=15, stdout=out)
+        self.assertIn('Deleted 1 statuses older than 15 days', out.getvalue())
+
+
+# --- TRANSCRIPTS ---
+
+@override_settings(WHATSAPP_VERIFY_TOKEN='verify-me')
+class TranscriptTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', is_staff=True)
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.cookies[ReplicaRoutingMiddleware.cookie_name] = '1'
+        self.api.force_authenticate(self.staff)
+
+    def test_bot_exchange_is_logged(self):
+        # No Graph API credentials in tests: the reply is attempted and fails
+        self.client.post('/webhooks/whatsapp/', inbound('255700000001', 'hello'), content_type='application/json')
+
+        inbound_row, reply = ConversationMessage.objects.order_by('pk')
+        self.assertEqual((inbound_row.phone, inbound_row.direction, inbound_row.kind, inbound_row.body), ('255700000001', 'in', 'text', 'hello'))
+        self.assertEqual((reply.phone, reply.direction, reply.kind), ('255700000001', 'out', 'interactive'))
+        # Not accepted by the Graph API: logged without a wamid
+        self.assertEqual(reply.message_id, '')
+
+    def test_buffered_transcript_is_one_insert(self):
+        with override_settings(WHATSAPP_TRANSCRIPT_FLUSH_INTERVAL=60), mock.patch.object(transcript_writer, 'start'):
+            service = WhatsAppResponseService()
+            with self.assertNumQueries(0):
+                for i in range(3):
+                    service.log_transcript([ConversationMessage(
+                        phone='255700000001', direction='in', kind='text', body=f'm{i}', created_at=timezone.now(),
+                    )])
+            with self.assertNumQueries(1):
+                self.assertEqual(transcript_writer.flush(), 3)
+        self.assertEqual(ConversationMessage.objects.count(), 3)
+
+    def test_history_is_keyset_paginated(self):
+        start = timezone.now() - datetime.timedelta(days=1)
+        ConversationMessage.objects.bulk_create([
+            ConversationMessage(
+                phone='255700000001', direction='in' if i % 2 else 'out', kind='text', body=f'm{i}',
+                created_at=start + datetime.timedelta(minutes=i),
+            )
+            for i in range(25)
+        ] + [ConversationMessage(phone='255700000002', direction='in', kind='text', body='other', created_at=start)])
+
+        # Any phone form normalize_phone accepts
+        url = '/api/whatsapp/conversations/0700000001/'
+        bodies = []
+        while url:
+            with self.assertNumQueries(1):
+                response = self.api.get(url, {'page_size': 10} if not bodies else None)
+            self.assertEqual(response.status_code, 200)
+            bodies += [row['body'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(bodies, [f'm{i}' for i in reversed(range(25))])
+
+    def test_history_is_staff_only(self):
+        self.assertEqual(APIClient().get('/api/whatsapp/conversations/255700000001/').status_code, 401)
+
+
+# --- BOT REPLIES ---
+
+class ReplyTemplateTests(SimpleTestCase):
+
+    def setUp(self):
+        self.bot = CarRentalBotService()
+
+    def test_rendered_replies_match_the_generators(self):
+        car = self.bot.get_car_by_id('suv_001')
+        for name in ['Asha', 'J{0}hn }{', '100%']:
+            self.assertEqual(self.bot.templates.get('welcome').render(customer_name=name), self.bot.generate_welcome_message(name))
+            self.assertEqual(
+                self.bot.templates.get('car_catalog', 'suv').render(customer_name=name),
+                self.bot.generate_car_catalog('suv', name),
+            )
+            self.assertEqual(
+                self.bot.templates.get('car_details', 'suv_001').render(customer_name=name),
+                self.bot.generate_car_details(car, name),
+            )
+
+        booking = {
+            'id': 'BK{1}', 'carName': 'Toyota', 'pickupDate': 'Today', 'returnDate': 'Tomorrow', 'totalDays': 1,
+            'pickupLocation': 'Main Office', 'dailyRate': 120000, 'totalAmount': 1234567, 'deposit': 370370,
+        }
+        self.assertEqual(
+            self.bot.templates.get('booking_confirmation').render(customer_name='Asha', **booking),
+            self.bot.generate_booking_confirmation(booking, 'Asha'),
+        )
+
+    def test_prebuilt_interactive_matches_payload_builders(self):
+        service = WhatsAppResponseService()
+        for message, payload in [
+            ('hi', lambda r: service.buttons_payload('2557', r['response'], r['buttons'], None, 'CarRental Pro - Your Premium Car Rental Service')),
+            ('browse_cars', lambda r: service.list_payload('2557', r['response'], LIST_BUTTON_TEXT, r['listItems'], None, 'CarRental Pro')),
+        ]:
+            response = self.bot.process_message('2557', message, 'Asha')
+            with mock.patch('backend.vemacars.whatsapp_cloud.car_rental_bot_service', self.bot):
+                _, outgoing = service.plan_reply({'from': '2557', 'message': message, 'name': 'Asha'})
+            self.assertIsNotNone(response['interactive'])
+            self.assertEqual(outgoing[-1][1], payload(response))
+
+    def test_replies_are_rebuilt_when_the_catalog_changes(self):
+        welcome = self.bot.templates.get('welcome')
+        self.assertIs(self.bot.templates.get('welcome'), welcome)
+
+        car_details = self.bot.templates.get('car_details', 'eco_001')
+        details = {'pickupDate': 'Today', 'returnDate': 'Tomorrow', 'pickupLocation': 'Office', 'totalDays': 1, 'customerInfo': {}}
+        self.bot.create_booking('2557', 'eco_001', details, 'Asha')
+        self.assertIsNot(self.bot.templates.get('car_details', 'eco_001'), car_details)
+
+    def test_unknown_cars_are_not_compiled(self):
+        response = self.bot.process_message('2557', 'book_nope_1', 'Asha')
+        self.assertEqual(response['response'], self.bot.generate_booking_form('nope_1', 'Asha'))
+        self.assertEqual(self.bot.templates.compiled[1], {})
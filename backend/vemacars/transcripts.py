@@ -0,0 +1,74 @@
+"""
+WhatsApp conversation transcripts.
+
+The webhook hands every customer message and every reply it sends to
+`transcript_writer`, which bulk-inserts ConversationMessage rows from a
+background thread (vemacars.batching), so answering a customer gains no
+queries. Staff read a conversation through ConversationHistory, a page at a
+time, off the (phone, created_at) index.
+"""
+from django.utils import timezone
+
+from backend.api.utils import normalize_phone
+from .batching import BatchWriter
+from .models import ConversationMessage
+
+
+def payload_text(payload):
+    """
+    What a customer sees of an outbound Graph API payload, as plain text.
+    """
+    kind = payload.get('type')
+    if kind == 'text':
+        return payload['text']['body']
+    if kind == 'interactive':
+        interactive = payload['interactive']
+        action = interactive.get('action') or {}
+        options = [button['reply']['title'] for button in action.get('buttons') or []]
+        options += [row['title'] for section in action.get('sections') or [] for row in section.get('rows') or []]
+        text = interactive['body']['text']
+        if not options:
+            return text
+        return text + "\n" + " | ".join(f"[{option}]" for option in options)
+    if kind == 'image':
+        return payload['image'].get('caption') or payload['image']['link']
+    if kind == 'template':
+        return payload['template']['name']
+    return ''
+
+
+def inbound_message(message_data):
+    return ConversationMessage(
+        phone=normalize_phone(message_data['from']),
+        direction='in',
+        kind=(message_data.get('messageType') or '')[:20],
+        body=message_data.get('message') or '',
+        message_id=(message_data.get('messageId') or '')[:128],
+        created_at=timezone.now(),
+    )
+
+
+def outbound_message(payload, result):
+    return ConversationMessage(
+        phone=normalize_phone(payload['to']),
+        direction='out',
+        kind=payload.get('type', '')[:20],
+        body=payload_text(payload),
+        message_id=(result.get('messageId') or '')[:128],
+        created_at=timezone.now(),
+    )
+
+
+class TranscriptWriter(BatchWriter):
+    """
+    Buffers ConversationMessage rows; each batch is one bulk insert.
+    """
+    name = 'whatsapp-transcript-writer'
+    interval_setting = 'WHATSAPP_TRANSCRIPT_FLUSH_INTERVAL'
+    batch_size_setting = 'WHATSAPP_TRANSCRIPT_BATCH_SIZE'
+
+    def write(self, rows):
+        ConversationMessage.objects.bulk_create(rows, batch_size=self.batch_size)
+
+
+transcript_writer = TranscriptWriter()
@@ -1,11 +1,16 @@
+from django.conf import settings
 from django.urls import path
-from .views import whatsapp_webhook, send_message_from_frontend
+from .views import ConversationHistory, DeliveryMetricsView, whatsapp_webhook, whatsapp_webhook_async, send_message_from_frontend
 
 
 
 urlpatterns = [
     # path("test-whatsapp/", test_whatsapp, name="test_whatsapp"),
-    path("webhooks/whatsapp/", whatsapp_webhook),
+    path("webhooks/whatsapp/", whatsapp_webhook_async if settings.WHATSAPP_ASYNC_WEBHOOK else whatsapp_webhook),
     path("api/send-whatsapp/", send_message_from_frontend),
+    # Conversation transcripts (staff only)
+    path("api/whatsapp/conversations/<str:phone>/", ConversationHistory.as_view(), name="whatsapp_conversation"),
+    # Delivery status metrics (staff only)
+    path("api/_metrics/whatsapp-delivery/", DeliveryMetricsView.as_view(), name="whatsapp_delivery_metrics"),
 
 ]
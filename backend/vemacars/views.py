@@ -1,70 +1,175 @@
+import datetime
 from django.http import JsonResponse, HttpResponse
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 import json
 import logging
 from django.conf import settings
-from .whatsapp_cloud import whatsapp_service
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from backend.api.pagination import CreatedAtCursorPagination
+from backend.api.permissions import IsStaffOrAdmin
+from backend.api.utils import normalize_phone
+from .delivery import delivery_metrics, status_writer
+from .models import ConversationMessage
+from .serializers import ConversationMessageSerializer
+from .transcripts import outbound_message, transcript_writer
+from .whatsapp_cloud import whatsapp_service, async_whatsapp_service
 
 logger = logging.getLogger(__name__)
 
+def verify_subscription(request):
+    """
+    1. Verification Challenge (GET)
+    """
+    mode = request.GET.get('hub.mode')
+    token = request.GET.get('hub.verify_token')
+    challenge = request.GET.get('hub.challenge')
+
+    # You should define WHATSAPP_VERIFY_TOKEN in env/settings. 
+    # For now, I'll default to a simple check or 'vemacars_verify_token'
+    verify_token = getattr(settings, 'WHATSAPP_VERIFY_TOKEN', 'vemacars_secret')
+
+    if mode == 'subscribe' and token == verify_token:
+        logger.info("Webhook verified successfully")
+        return HttpResponse(challenge, status=200)
+    else:
+        logger.warning(f"Webhook Verification Failed. Received: {token}, Expected: {verify_token}")
+        return HttpResponse('Forbidden', status=403)
+
+
+def parse_event(request):
+    """
+    2. Event Notifications (POST)
+    Returns (message_data, statuses, None) for an event to handle, or
+    (None, [], response) when it is ignored.
+    """
+    body_unicode = request.body.decode('utf-8')
+    data = json.loads(body_unicode)
+
+    # Extract basic info first
+    entry = data.get('entry', [])
+    if not entry:
+        logger.warning("Ignored webhook: No 'entry' field found.")
+        return None, [], JsonResponse({"status": "ignored_bad_format"})
+
+    # Delivery receipts for messages we sent; most webhooks are only these
+    statuses = whatsapp_service.extract_statuses(data)
+    has_messages = any(
+        (change.get('value') or {}).get('messages') for item in entry for change in item.get('changes') or []
+    )
+    if statuses and not has_messages:
+        # Fast path: nothing for the bot, and too frequent to log in full
+        logger.debug(f"Received {len(statuses)} WhatsApp statuses")
+        return None, statuses, None
+
+    # Enhanced Logging for Debugging
+    logger.info(f"Received Webhook Payload: {body_unicode}")
+    # Use the service to extract standardized message data
+    message_data = whatsapp_service.extract_message_data(data)
+    if not message_data and not statuses:
+        logger.info("Ignored webhook: No valid message data extracted.")
+        return None, [], JsonResponse({"status": "ignored_no_message"})
+    return message_data, statuses, None
+
+
+def statuses_response(count):
+    return JsonResponse({"status": "statuses_received", "count": count})
+
+
+def processed_response(result):
+    if result.get('success'):
+        return JsonResponse({"status": "processed"})
+    logger.error(f"Processing failed: {result.get('error')}")
+    return JsonResponse({"status": "error", "error": result.get('error')}, status=500)
+
+
 @csrf_exempt
 def whatsapp_webhook(request):
-    # 1. Verification Challenge (GET)
     if request.method == "GET":
-        mode = request.GET.get('hub.mode')
-        token = request.GET.get('hub.verify_token')
-        challenge = request.GET.get('hub.challenge')
-
-        # You should define WHATSAPP_VERIFY_TOKEN in env/settings. 
-        # For now, I'll default to a simple check or 'vemacars_verify_token'
-        verify_token = getattr(settings, 'WHATSAPP_VERIFY_TOKEN', 'vemacars_secret')
-
-        if mode == 'subscribe' and token == verify_token:
-            logger.info("Webhook verified successfully")
-            return HttpResponse(challenge, status=200)
-        else:
-            logger.warning(f"Webhook Verification Failed. Received: {token}, Expected: {verify_token}")
-            return HttpResponse('Forbidden', status=403)
-
-    # 2. Event Notifications (POST)
+        return verify_subscription(request)
+
     if request.method == "POST":
         try:
-            # Enhanced Logging for Debugging
-            body_unicode = request.body.decode('utf-8')
-            logger.info(f"Received Webhook Payload: {body_unicode}")
-            
-            data = json.loads(body_unicode)
-            
-            # Extract basic info first
-            entry = data.get('entry', [])
-            if not entry:
-                logger.warning("Ignored webhook: No 'entry' field found.")
-                return JsonResponse({"status": "ignored_bad_format"})
-            
-            # Use the service to extract standardized message data
-            message_data = whatsapp_service.extract_message_data(data)
-            
-            if message_data:
-                # Direct synchronous call since we removed async from service
-                result = whatsapp_service.process_incoming_message(message_data)
-                
-                if result.get('success'):
-                    return JsonResponse({"status": "processed"})
-                else:
-                    logger.error(f"Processing failed: {result.get('error')}")
-                    return JsonResponse({"status": "error", "error": result.get('error')}, status=500)
-            
-            logger.info("Ignored webhook: No valid message data extracted.")
-            return JsonResponse({"status": "ignored_no_message"})
-            
-            return JsonResponse({"status": "ignored_no_message"})
+            message_data, statuses, ignored = parse_event(request)
+            if ignored:
+                return ignored
+            count = status_writer.add(statuses) if statuses else 0
+            if not message_data:
+                return statuses_response(count)
+            return processed_response(whatsapp_service.process_incoming_message(message_data))
+        except Exception as e:
+            logger.error(f"Webhook Error: {e}")
+            return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
+    return HttpResponse(status=405)
+
+
+@csrf_exempt
+async def whatsapp_webhook_async(request):
+    """
+    Same contract as whatsapp_webhook, for ASGI: Graph API replies are awaited,
+    so a worker keeps serving other conversations while they are in flight.
+    Selected in urls.py by WHATSAPP_ASYNC_WEBHOOK (on by default in asgi.py).
+    """
+    if request.method == "GET":
+        return verify_subscription(request)
+
+    if request.method == "POST":
+        try:
+            message_data, statuses, ignored = parse_event(request)
+            if ignored:
+                return ignored
+            count = await status_writer.aadd(statuses) if statuses else 0
+            if not message_data:
+                return statuses_response(count)
+            return processed_response(await async_whatsapp_service.process_incoming_message(message_data))
         except Exception as e:
             logger.error(f"Webhook Error: {e}")
             return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
     return HttpResponse(status=405)
 
+class DeliveryMetricsView(APIView):
+    """
+    Delivery status counts, failure codes and sent→delivered / delivered→read
+    latency percentiles over the last ?hours= (default 24), from MessageStatus.
+    """
+    permission_classes = [IsStaffOrAdmin]
+    # Aggregates over a large table; a few seconds of replica lag don't matter
+    read_from_replica = True
+
+    def get(self, request):
+        try:
+            hours = max(1, min(int(request.query_params.get('hours', 24)), 24 * settings.WHATSAPP_STATUS_RETENTION_DAYS))
+        except ValueError:
+            return Response({'error': 'hours must be an integer'}, status=400)
+        since = timezone.now() - datetime.timedelta(hours=hours)
+        return Response({
+            'since': since,
+            'hours': hours,
+            # Buffered in this worker, not yet written
+            'pending_writes': status_writer.pending,
+            **delivery_metrics(since),
+        })
+
+
+class ConversationHistory(APIView):
+    """
+    One customer's WhatsApp conversation with the bot, newest first,
+    keyset-paginated: every page is a range scan of the (phone, created_at)
+    index, however long the conversation. The phone may be in any form
+    normalize_phone accepts.
+    """
+    permission_classes = [IsStaffOrAdmin]
+
+    def get(self, request, phone):
+        messages = ConversationMessage.objects.filter(phone=normalize_phone(phone))
+        paginator = CreatedAtCursorPagination()
+        page = paginator.paginate_queryset(messages, request, view=self)
+        return paginator.get_paginated_response(ConversationMessageSerializer(page, many=True).data)
+
+
 @csrf_exempt
 def send_message_from_frontend(request):
     """
@@ -81,9 +186,13 @@ def send_message_from_frontend(request):
 
             # Use new service
             result = whatsapp_service.send_text_message(to=phone, message=message)
-            
+            if result.get('deferred'):
+                # Sent (and logged) by deferred_sender; the caller must not retry
+                return JsonResponse({"status": "queued"}, status=202)
+            whatsapp_service.log_transcript([outbound_message(whatsapp_service.text_payload(phone, message), result)])
+
             if result['success']:
-                return JsonResponse({"status": "processed", "api_response": result['data']})
+                return JsonResponse({"status": "processed", "api_response": result.get('data')})
             else:
                  return JsonResponse({"status": "error", "error": result['error']}, status=500)
 
@@ -1,8 +1,18 @@
+import asyncio
+import itertools
 import requests
+import httpx
 import json
 import logging
+import math
 import os
+import time
+from django.conf import settings
+from .batching import BatchWriter
 from .car_rental_bot import car_rental_bot_service
+from .ratelimit import REPLY, bucket_for, is_throttled, retry_delay
+from .reply_templates import LIST_BUTTON_TEXT, button_action, list_action
+from .transcripts import inbound_message, outbound_message, transcript_writer
 
 logger = logging.getLogger(__name__)
 
@@ -10,112 +20,159 @@ class WhatsAppResponseService:
     def __init__(self):
         self.access_token = os.environ.get('WHATSAPP_ACCESS_TOKEN')
         self.phone_number_id = os.environ.get('WHATSAPP_PHONE_NUMBER_ID')
-        self.base_url = 'https://graph.facebook.com/v18.0'
+        # Overridable so load tests can point at a local stub (benchmarks/stub_graph.py)
+        self.base_url = os.environ.get('WHATSAPP_GRAPH_URL', 'https://graph.facebook.com/v18.0')
         self.enabled = bool(self.access_token and self.phone_number_id)
         
         if not self.enabled:
             logger.warning('WhatsApp Response Service not configured - missing access token or phone number ID')
 
-    def send_text_message(self, to, message):
-        """
-        Send text message via WhatsApp Business API
-        """
-        try:
-            if not self.enabled:
-                logger.warning('WhatsApp Response Service not enabled')
-                return {'success': False, 'error': 'Service not configured'}
+    @property
+    def messages_url(self):
+        return f"{self.base_url}/{self.phone_number_id}/messages"
 
-            payload = {
-                "messaging_product": "whatsapp",
-                "to": to,
-                "type": "text",
-                "text": {
-                    "body": message
-                }
-            }
+    @property
+    def headers(self):
+        return {
+            'Authorization': f'Bearer {self.access_token}',
+            'Content-Type': 'application/json'
+        }
 
-            response = requests.post(
-                f"{self.base_url}/{self.phone_number_id}/messages",
-                json=payload,
-                headers={
-                    'Authorization': f'Bearer {self.access_token}',
-                    'Content-Type': 'application/json'
-                }
-            )
+    # --- PAYLOADS (shared with AsyncWhatsAppService) ---
 
-            # Raise for status to catch HTTP errors
-            response.raise_for_status()
-            
-            data = response.json()
-            logger.info(f"WhatsApp message sent to {to}: {data}")
-            
-            return {
-                'success': True,
-                'messageId': data['messages'][0]['id'],
-                'data': data
+    def text_payload(self, to, message, callback_data=None):
+        payload = {
+            "messaging_product": "whatsapp",
+            "to": to,
+            "type": "text",
+            "text": {
+                "body": message
             }
-        except requests.exceptions.RequestException as e:
-            error_msg = e.response.json() if e.response else str(e)
-            logger.error(f'Error sending WhatsApp message: {error_msg}')
-            return {
-                'success': False,
-                'error': error_msg
+        }
+        if callback_data:
+            # Echoed back in the status webhooks for this message
+            payload['biz_opaque_callback_data'] = callback_data
+        return payload
+
+    def template_payload(self, to, name, language, parameters=(), callback_data=None):
+        template = {"name": name, "language": {"code": language}}
+        if parameters:
+            template['components'] = [{
+                "type": "body",
+                "parameters": [{"type": "text", "text": value} for value in parameters]
+            }]
+        payload = {
+            "messaging_product": "whatsapp",
+            "to": to,
+            "type": "template",
+            "template": template
+        }
+        if callback_data:
+            payload['biz_opaque_callback_data'] = callback_data
+        return payload
+
+    def interactive_payload(self, to, kind, text, action, header=None, footer=None):
+        interactive_obj = {
+            "type": kind,
+            "body": {"text": text},
+            "action": action
+        }
+
+        if header:
+            interactive_obj['header'] = {"type": "text", "text": header}
+        if footer:
+            interactive_obj['footer'] = {"text": footer}
+
+        return {
+            "messaging_product": "whatsapp",
+            "to": to,
+            "type": "interactive",
+            "interactive": interactive_obj
+        }
+
+    def buttons_payload(self, to, text, buttons, header=None, footer=None, action=None):
+        # action: the buttons already formatted, as compiled replies carry them
+        return self.interactive_payload(to, "button", text, action or button_action(buttons), header, footer)
+
+    def list_payload(self, to, text, button_text, sections, header=None, footer=None, action=None):
+        return self.interactive_payload(to, "list", text, action or list_action(button_text, sections), header, footer)
+
+    def image_payload(self, to, image_url, caption=None):
+        payload = {
+            "messaging_product": "whatsapp",
+            "to": to,
+            "type": "image",
+            "image": {
+                "link": image_url
             }
+        }
+
+        if caption:
+            payload['image']['caption'] = caption
+        return payload
+
+    # --- SENDING ---
+
+    @staticmethod
+    def _body(response):
+        try:
+            return response.json()
+        except ValueError:
+            return None
 
-    def send_interactive_buttons(self, to, text, buttons, header=None, footer=None):
+    def _backoff(self, bucket, kind, attempt, response):
         """
-        Send interactive buttons via WhatsApp Business API
+        Seconds to sleep before resending after `response`, or None to give up.
+        """
+        body = self._body(response)
+        delay = retry_delay(attempt, response.status_code, body, response.headers.get('Retry-After'))
+        if delay is not None:
+            logger.warning(f'WhatsApp {kind} got HTTP {response.status_code}, retry {attempt + 1} in {delay:.2f}s: {body}')
+            if is_throttled(response.status_code, body):
+                bucket.pause(delay)
+        return delay
+
+    def _defer(self, kind, payload):
+        logger.warning(f"WhatsApp {kind} to {payload['to']} is over the reply budget; handing it to the background sender")
+        deferred_sender.enqueue([(kind, payload)])
+        return {'success': True, 'deferred': True, 'messageId': None}
+
+    def _send(self, kind, payload, priority=REPLY, deadline=None):
+        """
+        POST one message to the Graph API, within the shared send rate and
+        retrying throttled attempts. `kind` is only used for logging.
+
+        REPLY sends run inside a request: they wait (for a token or between
+        retries) until `deadline`, by default WHATSAPP_REPLY_BUDGET seconds
+        from now. Past it the payload goes to deferred_sender and a
+        {'deferred': True} result is returned, so a throttled reply never
+        outlives the worker timeout.
         """
         try:
             if not self.enabled:
                 logger.warning('WhatsApp Response Service not enabled')
                 return {'success': False, 'error': 'Service not configured'}
 
-            # Format buttons for WhatsApp API
-            formatted_buttons = []
-            for index, button in enumerate(buttons[:3]):
-                formatted_buttons.append({
-                    "type": "reply",
-                    "reply": {
-                        "id": button.get('id', f'btn_{index}'),
-                        "title": button['title'][:20]
-                    }
-                })
-
-            interactive_obj = {
-                "type": "button",
-                "body": {"text": text},
-                "action": {
-                    "buttons": formatted_buttons
-                }
-            }
-            
-            if header:
-                interactive_obj['header'] = {"type": "text", "text": header}
-            if footer:
-                interactive_obj['footer'] = {"text": footer}
-
-            payload = {
-                "messaging_product": "whatsapp",
-                "to": to,
-                "type": "interactive",
-                "interactive": interactive_obj
-            }
-
-            response = requests.post(
-                f"{self.base_url}/{self.phone_number_id}/messages",
-                json=payload,
-                headers={
-                    'Authorization': f'Bearer {self.access_token}',
-                    'Content-Type': 'application/json'
-                }
-            )
+            if deadline is None:
+                deadline = time.monotonic() + settings.WHATSAPP_REPLY_BUDGET if priority == REPLY else math.inf
+            bucket = bucket_for(self.phone_number_id)
+            for attempt in itertools.count():
+                if not bucket.acquire(priority, deadline):
+                    return self._defer(kind, payload)
+                response = requests.post(self.messages_url, json=payload, headers=self.headers)
+                delay = self._backoff(bucket, kind, attempt, response)
+                if delay is None:
+                    break
+                if time.monotonic() + delay > deadline:
+                    return self._defer(kind, payload)
+                time.sleep(delay)
 
+            # Raise for status to catch HTTP errors
             response.raise_for_status()
+
             data = response.json()
-            
-            logger.info(f"WhatsApp interactive buttons sent to {to}: {data}")
-            
+            logger.info(f"WhatsApp {kind} sent to {payload['to']}: {data}")
+
             return {
                 'success': True,
                 'messageId': data['messages'][0]['id'],
@@ -123,138 +180,114 @@ class WhatsAppResponseService:
             }
         except requests.exceptions.RequestException as e:
             error_msg = e.response.json() if e.response else str(e)
-            logger.error(f'Error sending WhatsApp interactive buttons: {error_msg}')
+            logger.error(f'Error sending WhatsApp {kind}: {error_msg}')
             return {
                 'success': False,
                 'error': error_msg
             }
 
-    def send_interactive_list(self, to, text, button_text, sections, header=None, footer=None):
+    def send_text_message(self, to, message, priority=REPLY, callback_data=None):
         """
-        Send interactive list via WhatsApp Business API
+        Send text message via WhatsApp Business API
         """
-        try:
-            if not self.enabled:
-                logger.warning('WhatsApp Response Service not enabled')
-                return {'success': False, 'error': 'Service not configured'}
+        return self._send('message', self.text_payload(to, message, callback_data), priority)
 
-            # Convert sections format if needed, but assuming calling code provides correct format
-            # In JS: sections was passed directly. 
-            # In Python port of Bot Logic: get_category_list_items returns a simple list of dicts.
-            # We need to wrap it in a section structure for WhatsApp API if it's not already.
-            
-            # Check if 'sections' is just a list of items or already formatted sections
-            formatted_sections = sections
-            if isinstance(sections, list) and len(sections) > 0 and 'rows' not in sections[0]:
-                # It's likely a simple list of items (title, description), wrap in one section
-                rows = []
-                for index, item in enumerate(sections):
-                    row = {
-                        "id": item.get('id', f"section_row_{index}"),
-                        "title": item['title'][:24],
-                        "description": item.get('description', '')[:72]
-                    }
-                    rows.append(row)
-                
-                formatted_sections = [{
-                    "title": "Options",
-                    "rows": rows
-                }]
-
-            interactive_obj = {
-                "type": "list",
-                "body": {"text": text},
-                "action": {
-                    "button": button_text,
-                    "sections": formatted_sections
-                }
-            }
+    def send_template_message(self, to, name, language, parameters=(), priority=REPLY, callback_data=None):
+        """
+        Send an approved message template via WhatsApp Business API
+        """
+        return self._send('template', self.template_payload(to, name, language, parameters, callback_data), priority)
 
-            if header:
-                interactive_obj['header'] = {"type": "text", "text": header}
-            if footer:
-                interactive_obj['footer'] = {"text": footer}
+    def send_interactive_buttons(self, to, text, buttons, header=None, footer=None, priority=REPLY):
+        """
+        Send interactive buttons via WhatsApp Business API
+        """
+        return self._send('interactive buttons', self.buttons_payload(to, text, buttons, header, footer), priority)
 
-            payload = {
-                "messaging_product": "whatsapp",
-                "to": to,
-                "type": "interactive",
-                "interactive": interactive_obj
-            }
+    def send_interactive_list(self, to, text, button_text, sections, header=None, footer=None, priority=REPLY):
+        """
+        Send interactive list via WhatsApp Business API
+        """
+        return self._send('interactive list', self.list_payload(to, text, button_text, sections, header, footer), priority)
 
-            response = requests.post(
-                f"{self.base_url}/{self.phone_number_id}/messages",
-                json=payload,
-                headers={
-                    'Authorization': f'Bearer {self.access_token}',
-                    'Content-Type': 'application/json'
-                }
-            )
+    def send_image_message(self, to, image_url, caption=None, priority=REPLY):
+        """
+        Send image message via WhatsApp Business API
+        """
+        return self._send('image', self.image_payload(to, image_url, caption), priority)
 
-            response.raise_for_status()
-            data = response.json()
-            
-            logger.info(f"WhatsApp interactive list sent to {to}: {data}")
-            
-            return {
-                'success': True,
-                'messageId': data['messages'][0]['id'],
-                'data': data
-            }
-        except requests.exceptions.RequestException as e:
-            error_msg = e.response.json() if e.response else str(e)
-            logger.error(f'Error sending WhatsApp interactive list: {error_msg}')
-            return {
-                'success': False,
-                'error': error_msg
-            }
+    # --- INCOMING ---
 
-    def send_image_message(self, to, image_url, caption=None):
+    def plan_reply(self, message_data):
         """
-        Send image message via WhatsApp Business API
+        Run the bot on an incoming message and build what to send back:
+        a list of (kind, payload), images first and the reply last.
+        Returns (bot_response, None) when the bot failed.
         """
-        try:
-            if not self.enabled:
-                logger.warning('WhatsApp Response Service not enabled')
-                return {'success': False, 'error': 'Service not configured'}
+        message_from = message_data.get('from')
+        message_body = message_data.get('message')
+        name = message_data.get('name')
 
-            payload = {
-                "messaging_product": "whatsapp",
-                "to": to,
-                "type": "image",
-                "image": {
-                    "link": image_url
-                }
-            }
-            
-            if caption:
-                payload['image']['caption'] = caption
-
-            response = requests.post(
-                f"{self.base_url}/{self.phone_number_id}/messages",
-                json=payload,
-                headers={
-                    'Authorization': f'Bearer {self.access_token}',
-                    'Content-Type': 'application/json'
-                }
-            )
+        logger.info(f'Processing WhatsApp message from {name} (+{message_from}): "{message_body}"')
+
+        # Process through advanced car rental bot
+        bot_response = car_rental_bot_service.process_message(message_from, message_body, name)
+
+        if not bot_response['success']:
+            logger.error(f"Bot processing failed for {name} (+{message_from}): {bot_response.get('error')}")
+            return bot_response, None
+
+        # 1. Images if present
+        outgoing = [
+            ('image', self.image_payload(message_from, img['url'], img.get('caption')))
+            for img in bot_response.get('images') or []
+        ]
+
+        # 2. Appropriate response based on message type; compiled replies
+        # come with their buttons/list already formatted
+        interactive = bot_response.get('interactive') or {}
+        if bot_response['messageType'] == 'interactive_buttons' and bot_response.get('buttons'):
+            outgoing.append(('interactive buttons', self.buttons_payload(
+                message_from,
+                bot_response['response'],
+                bot_response['buttons'],
+                None,
+                'CarRental Pro - Your Premium Car Rental Service',
+                action=interactive.get('action') if interactive.get('type') == 'button' else None
+            )))
+        elif bot_response['messageType'] == 'interactive_list' and bot_response.get('listItems'):
+            outgoing.append(('interactive list', self.list_payload(
+                message_from,
+                bot_response['response'],
+                LIST_BUTTON_TEXT,
+                bot_response['listItems'],
+                None,
+                'CarRental Pro',
+                action=interactive.get('action') if interactive.get('type') == 'list' else None
+            )))
+        else:
+            outgoing.append(('message', self.text_payload(message_from, bot_response['response'])))
+        return bot_response, outgoing
+
+    def reply_outcome(self, message_data, bot_response, result):
+        message_from = message_data.get('from')
+        name = message_data.get('name')
+
+        if result.get('success'):
+            logger.info(f"Advanced response sent successfully to {name} (+{message_from})")
 
-            response.raise_for_status()
-            data = response.json()
-            
-            logger.info(f"WhatsApp image sent to {to}: {data}")
-            
             return {
                 'success': True,
-                'messageId': data['messages'][0]['id'],
-                'data': data
+                'message': 'Advanced car rental response sent successfully',
+                'messageId': result.get('messageId'),
+                'sessionState': bot_response.get('sessionState'),
+                'messageType': bot_response.get('messageType')
             }
-        except requests.exceptions.RequestException as e:
-            error_msg = e.response.json() if e.response else str(e)
-            logger.error(f'Error sending WhatsApp image: {error_msg}')
+        else:
+            logger.error(f"Failed to send response to {name} (+{message_from}): {result.get('error')}")
             return {
                 'success': False,
-                'error': error_msg
+                'error': result.get('error')
             }
 
     def process_incoming_message(self, message_data):
@@ -262,66 +295,28 @@ class WhatsAppResponseService:
         Process incoming WhatsApp message with advanced car rental bot
         """
         try:
-            message_from = message_data.get('from')
-            message_body = message_data.get('message')
-            name = message_data.get('name')
-            
-            logger.info(f'Processing WhatsApp message from {name} (+{message_from}): "{message_body}"')
-            
-            # Process through advanced car rental bot
-            bot_response = car_rental_bot_service.process_message(message_from, message_body, name)
-            
-            if not bot_response['success']:
-                logger.error(f"Bot processing failed for {name} (+{message_from}): {bot_response.get('error')}")
+            bot_response, outgoing = self.plan_reply(message_data)
+            transcript = [inbound_message(message_data)]
+            if outgoing is None:
+                self.log_transcript(transcript)
                 return {
                     'success': False,
                     'error': bot_response.get('error')
                 }
 
-            # 1. Send Images if present
-            if bot_response.get('images'):
-                for img in bot_response['images']:
-                    self.send_image_message(message_from, img['url'], img.get('caption'))
-
-            # 2. Send appropriate response based on message type
-            result = None
-            
-            if bot_response['messageType'] == 'interactive_buttons' and bot_response.get('buttons'):
-                result = self.send_interactive_buttons(
-                    message_from, 
-                    bot_response['response'], 
-                    bot_response['buttons'],
-                    None,
-                    'CarRental Pro - Your Premium Car Rental Service'
-                )
-            elif bot_response['messageType'] == 'interactive_list' and bot_response.get('listItems'):
-                result = self.send_interactive_list(
-                    message_from,
-                    bot_response['response'],
-                    'Select Option',
-                    bot_response['listItems'],
-                    None,
-                    'CarRental Pro'
-                )
-            else:
-                result = self.send_text_message(message_from, bot_response['response'])
-            
-            if result.get('success'):
-                logger.info(f"Advanced response sent successfully to {name} (+{message_from})")
-                
-                return {
-                    'success': True,
-                    'message': 'Advanced car rental response sent successfully',
-                    'messageId': result.get('messageId'),
-                    'sessionState': bot_response.get('sessionState'),
-                    'messageType': bot_response.get('messageType')
-                }
-            else:
-                logger.error(f"Failed to send response to {name} (+{message_from}): {result.get('error')}")
-                return {
-                    'success': False,
-                    'error': result.get('error')
-                }
+            # One budget for the whole reply (images and text)
+            deadline = time.monotonic() + settings.WHATSAPP_REPLY_BUDGET
+            for index, (kind, payload) in enumerate(outgoing):
+                result = self._send(kind, payload, deadline=deadline)
+                if result.get('deferred'):
+                    # The rest follows it, in order; the sender logs their transcript
+                    if outgoing[index + 1:]:
+                        deferred_sender.enqueue(outgoing[index + 1:])
+                    break
+                transcript.append(outbound_message(payload, result))
+            self.log_transcript(transcript)
+            # `result` is the reply's: images go first
+            return self.reply_outcome(message_data, bot_response, result)
         except Exception as error:
             logger.error(f'Error processing incoming WhatsApp message: {error}')
             return {
@@ -329,6 +324,23 @@ class WhatsAppResponseService:
                 'error': str(error)
             }
 
+    def log_transcript(self, messages):
+        # The transcript is for staff; never let it break a reply
+        try:
+            transcript_writer.enqueue(messages)
+        except Exception as error:
+            logger.error(f'Error logging WhatsApp transcript: {error}')
+
+    def extract_statuses(self, webhook_payload):
+        """
+        Delivery status updates (sent / delivered / read / failed) in a webhook payload
+        """
+        statuses = []
+        for entry in webhook_payload.get('entry') or []:
+            for change in entry.get('changes') or []:
+                statuses.extend((change.get('value') or {}).get('statuses') or [])
+        return statuses
+
     def extract_message_data(self, webhook_payload):
         """
         Extract message data from WhatsApp webhook payload
@@ -409,3 +421,166 @@ class WhatsAppResponseService:
             return None
 
 whatsapp_service = WhatsAppResponseService()
+
+
+class DeferredSender(BatchWriter):
+    """
+    Sends replies that ran out of WHATSAPP_REPLY_BUDGET in the request, from
+    a background thread, with every retry. Items are (kind, payload) and go
+    out in the order they were queued.
+    """
+    name = 'whatsapp-deferred-sender'
+    interval_setting = 'WHATSAPP_DEFERRED_SEND_INTERVAL'
+
+    def write(self, items):
+        transcript = []
+        for kind, payload in items:
+            result = whatsapp_service._send(kind, payload, deadline=math.inf)
+            transcript.append(outbound_message(payload, result))
+        whatsapp_service.log_transcript(transcript)
+
+
+# Woken by every item: a deferred reply is already late
+deferred_sender = DeferredSender(batch_size=1)
+
+
+class AsyncWhatsAppService(WhatsAppResponseService):
+    """
+    Non-blocking Graph API client for the ASGI webhook (views.whatsapp_webhook_async).
+
+    While a reply is in flight the event loop serves other conversations, so one
+    worker handles many concurrent chats without a thread per Graph API call.
+    Payloads, bot handling and results are the same as WhatsAppResponseService.
+
+    The httpx client pools up to WHATSAPP_GRAPH_MAX_CONNECTIONS keep-alive
+    connections. It belongs to the event loop that created it, so a new one
+    is made if the loop changes (e.g. one loop per test).
+    """
+
+    def __init__(self, transport=None):
+        super().__init__()
+        self.timeout = float(os.environ.get('WHATSAPP_GRAPH_TIMEOUT', 10))
+        self.max_connections = int(os.environ.get('WHATSAPP_GRAPH_MAX_CONNECTIONS', 100))
+        self.transport = transport
+        self._client = None
+        self._client_loop = None
+
+    def use_transport(self, transport):
+        """
+        Route requests through an httpx transport, e.g. httpx.MockTransport in tests.
+        """
+        self.transport = transport
+        self._client = None
+
+    def get_client(self):
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections),
+                transport=self.transport,
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _defer(self, kind, payload):
+        logger.warning(f"WhatsApp {kind} to {payload['to']} is over the reply budget; handing it to the background sender")
+        await deferred_sender.aenqueue([(kind, payload)])
+        return {'success': True, 'deferred': True, 'messageId': None}
+
+    async def _send(self, kind, payload, priority=REPLY, deadline=None):
+        try:
+            if not self.enabled:
+                logger.warning('WhatsApp Response Service not enabled')
+                return {'success': False, 'error': 'Service not configured'}
+
+            if deadline is None:
+                deadline = time.monotonic() + settings.WHATSAPP_REPLY_BUDGET if priority == REPLY else math.inf
+            bucket = bucket_for(self.phone_number_id)
+            for attempt in itertools.count():
+                if not await bucket.aacquire(priority, deadline):
+                    return await self._defer(kind, payload)
+                response = await self.get_client().post(self.messages_url, json=payload, headers=self.headers)
+                delay = self._backoff(bucket, kind, attempt, response)
+                if delay is None:
+                    break
+                if time.monotonic() + delay > deadline:
+                    return await self._defer(kind, payload)
+                await asyncio.sleep(delay)
+            response.raise_for_status()
+
+            data = response.json()
+            logger.info(f"WhatsApp {kind} sent to {payload['to']}: {data}")
+
+            return {
+                'success': True,
+                'messageId': data['messages'][0]['id'],
+                'data': data
+            }
+        except httpx.HTTPStatusError as e:
+            error_msg = self._body(e.response) or str(e)
+            logger.error(f'Error sending WhatsApp {kind}: {error_msg}')
+            return {'success': False, 'error': error_msg}
+        except httpx.HTTPError as e:
+            logger.error(f'Error sending WhatsApp {kind}: {e}')
+            return {'success': False, 'error': str(e)}
+
+    async def send_text_message(self, to, message, priority=REPLY, callback_data=None):
+        return await self._send('message', self.text_payload(to, message, callback_data), priority)
+
+    async def send_template_message(self, to, name, language, parameters=(), priority=REPLY, callback_data=None):
+        return await self._send('template', self.template_payload(to, name, language, parameters, callback_data), priority)
+
+    async def send_interactive_buttons(self, to, text, buttons, header=None, footer=None, priority=REPLY):
+        return await self._send('interactive buttons', self.buttons_payload(to, text, buttons, header, footer), priority)
+
+    async def send_interactive_list(self, to, text, button_text, sections, header=None, footer=None, priority=REPLY):
+        return await self._send('interactive list', self.list_payload(to, text, button_text, sections, header, footer), priority)
+
+    async def send_image_message(self, to, image_url, caption=None, priority=REPLY):
+        return await self._send('image', self.image_payload(to, image_url, caption), priority)
+
+    async def log_transcript(self, messages):
+        try:
+            await transcript_writer.aenqueue(messages)
+        except Exception as error:
+            logger.error(f'Error logging WhatsApp transcript: {error}')
+
+    async def process_incoming_message(self, message_data):
+        try:
+            # The bot keeps its state in memory and never blocks, so it runs on the loop
+            bot_response, outgoing = self.plan_reply(message_data)
+            transcript = [inbound_message(message_data)]
+            if outgoing is None:
+                await self.log_transcript(transcript)
+                return {
+                    'success': False,
+                    'error': bot_response.get('error')
+                }
+
+            # Sequential on purpose: WhatsApp shows messages in the order they are sent.
+            # One budget for the whole reply, as in the sync service
+            deadline = time.monotonic() + settings.WHATSAPP_REPLY_BUDGET
+            for index, (kind, payload) in enumerate(outgoing):
+                result = await self._send(kind, payload, deadline=deadline)
+                if result.get('deferred'):
+                    if outgoing[index + 1:]:
+                        await deferred_sender.aenqueue(outgoing[index + 1:])
+                    break
+                transcript.append(outbound_message(payload, result))
+            await self.log_transcript(transcript)
+            return self.reply_outcome(message_data, bot_response, result)
+        except Exception as error:
+            logger.error(f'Error processing incoming WhatsApp message: {error}')
+            return {
+                'success': False,
+                'error': str(error)
+            }
+
+
+async_whatsapp_service = AsyncWhatsAppService()
@@ -0,0 +1,268 @@
+"""
+Load test: concurrent clients against the REST API and the WhatsApp webhook.
+
+    python benchmarks/bench_api.py --settings backend.settings.test \\
+        --cars 5000 --images-per-car 10 --bookings 1000000 \\
+        --concurrency 16 --requests 2000 --output results.json
+
+By default a throwaway test database is created from --settings, seeded
+(see seed.py) and served in-process by a threaded WSGI server with the
+metrics middleware on, so queries per request come from its Server-Timing
+header. Outbound WhatsApp replies go to a local Graph API stub.
+
+With --url the same scenarios run against an already running server
+(e.g. gunicorn); pass --token for the staff endpoints and start it with
+API_METRICS_ENABLED=1 to get query counts. Nothing is seeded in that mode.
+
+The report is JSON (stdout, or --output) so runs can be diffed over time.
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import requests
+
+from seed import add_dataset_arguments, seed_dataset
+from stub_graph import start_stub
+from support import REPO_ROOT, setup_django, test_database
+
+QUERIES_RE = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def webhook_payload(phone):
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [{
+            "id": "bench",
+            "changes": [{
+                "field": "messages",
+                "value": {
+                    "messaging_product": "whatsapp",
+                    "contacts": [{"profile": {"name": "Bench User"}, "wa_id": phone}],
+                    "messages": [{
+                        "from": phone, "id": f"wamid.in{phone}", "timestamp": str(int(time.time())),
+                        "type": "text", "text": {"body": "hi"},
+                    }],
+                },
+            }],
+        }],
+    }
+
+
+# name -> (method, path, needs staff token, body factory)
+SCENARIOS = {
+    "cars": ("GET", "/api/cars/", False, None),
+    "bookings": ("GET", "/api/bookings/", True, None),
+    "dashboard": ("GET", "/api/dashboard/stats/", True, None),
+    "webhook": ("POST", "/webhooks/whatsapp/", False, lambda i: webhook_payload(f"2557{i % 500:08d}")),
+}
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return None
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return round(ordered[index], 2)
+
+
+def run_scenario(base_url, name, total, concurrency, token=None, warmup=20):
+    """
+    Fire `total` requests from `concurrency` threads (one keep-alive session
+    each) and summarise latency, throughput and queries per request.
+    """
+    method, path, needs_token, body = SCENARIOS[name]
+    headers = {"Authorization": f"Bearer {token}"} if needs_token and token else {}
+    url = base_url.rstrip("/") + path
+
+    def call(session, i):
+        kwargs = {"headers": headers, "timeout": 60}
+        if body:
+            kwargs["json"] = body(i)
+        start = time.perf_counter()
+        response = session.request(method, url, **kwargs)
+        elapsed = (time.perf_counter() - start) * 1000
+        match = QUERIES_RE.search(response.headers.get("Server-Timing", ""))
+        return elapsed, response.status_code, int(match.group(1)) if match else None
+
+    with requests.Session() as session:
+        for i in range(warmup):
+            call(session, i)
+
+    tickets = itertools.count()
+    samples, lock = [], threading.Lock()
+
+    def worker():
+        local = []
+        with requests.Session() as session:
+            while (i := next(tickets)) < total:
+                try:
+                    local.append(call(session, i))
+                except requests.RequestException:
+                    local.append((None, "error", None))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies = sorted(s[0] for s in samples if s[0] is not None)
+    queries = [s[2] for s in samples if s[2] is not None]
+    statuses = Counter(str(s[1]) for s in samples)
+    return {
+        "method": method,
+        "path": path,
+        "requests": len(samples),
+        "errors": sum(count for code, count in statuses.items() if not code.startswith("2")),
+        "status_codes": dict(statuses),
+        "seconds": round(wall, 3),
+        "rps": round(len(samples) / wall, 1),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": percentile(latencies, 100),
+        },
+        "queries_per_request": {
+            "mean": round(sum(queries) / len(queries), 2) if queries else None,
+            "max": max(queries) if queries else None,
+        },
+    }
+
+
+def serve_in_process(graph_url):
+    """
+    Serve the Django app on an ephemeral port; returns (server, base_url).
+    """
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+
+    from backend.vemacars.whatsapp_cloud import whatsapp_service
+
+    settings.ALLOWED_HOSTS = ["*"]
+    settings.API_METRICS_ENABLED = True  # read before the handler loads middleware
+
+    whatsapp_service.base_url = graph_url
+    whatsapp_service.access_token = "bench-token"
+    whatsapp_service.phone_number_id = "100000000000000"
+    whatsapp_service.enabled = True
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadedWSGIServer(("127.0.0.1", 0), QuietHandler, allow_reuse_address=False)
+    server.set_app(WSGIHandler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.set_defaults(cars=500, bookings=20000, customers=2000)
+    parser.add_argument("--settings", default="backend.settings.dev")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per scenario.")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--graph-latency-ms", type=int, default=0, help="Delay added by the Graph API stub.")
+    parser.add_argument("--keepdb", action="store_true", help="Reuse (and don't reseed) an existing test database.")
+    parser.add_argument("--url", help="Benchmark a running server instead of an in-process one.")
+    parser.add_argument("--token", help="Staff JWT access token for --url mode.")
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout.")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "graph_latency_ms": args.graph_latency_ms,
+        },
+        "dataset": None,
+        "scenarios": {},
+    }
+
+    if args.url:
+        report["meta"]["server"] = args.url
+        for name in scenarios:
+            report["scenarios"][name] = run_scenario(args.url, name, args.requests, args.concurrency, args.token, args.warmup)
+    else:
+        setup_django(args.settings)
+        from django.contrib.auth.models import User
+        from django.db import connection
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from backend.api.models import Car
+
+        if connection.vendor == "sqlite":
+            # A file, not :memory:, so every server thread sees the same data
+            test_name = os.path.join(tempfile.gettempdir(), "vemacars-bench.sqlite3")
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = test_name
+
+        stub, graph_url = start_stub(latency_ms=args.graph_latency_ms)
+        with test_database(keepdb=args.keepdb):
+            report["meta"]["database"] = connection.vendor
+            report["meta"]["settings"] = args.settings
+            if args.keepdb and Car.objects.exists():
+                report["dataset"] = {"reused": True, "cars": Car.objects.count()}
+            else:
+                report["dataset"] = seed_dataset(
+                    args.cars, args.images_per_car, args.customers, args.bookings, args.extras,
+                )
+
+            staff, _ = User.objects.get_or_create(username="bench-staff", defaults={"is_staff": True})
+            token = str(AccessToken.for_user(staff))
+
+            server, base_url = serve_in_process(graph_url)
+            report["meta"]["server"] = "in-process ThreadedWSGIServer"
+            try:
+                for name in scenarios:
+                    report["scenarios"][name] = run_scenario(
+                        base_url, name, args.requests, args.concurrency, token, args.warmup,
+                    )
+            finally:
+                server.shutdown()
+                server.server_close()
+                connection.close()
+        stub.shutdown()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
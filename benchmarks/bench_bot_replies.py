@@ -0,0 +1,120 @@
+"""
+Benchmark: CPU cost of answering a WhatsApp message.
+
+    python benchmarks/bench_bot_replies.py --settings backend.settings.test --rounds 300
+
+Two measurements, both CPU time per message (best of --repeat):
+
+- replies: building each reply's text and Graph API payload the old way
+  (generate_* + buttons_payload/list_payload from scratch) against the
+  compiled way (ReplyTemplates.get + render, payload with the prebuilt action);
+- end_to_end: WhatsAppResponseService.plan_reply over a mix of customer
+  messages, i.e. the bot's state machine plus payload building. Run it on
+  an older checkout for the before figure.
+
+Needs no database: the bot keeps its state in memory. Prints JSON.
+"""
+import argparse
+import json
+import logging
+import time
+
+from support import setup_django
+
+MESSAGES = ['hi', 'browse_cars', 'suv', 'car_suv_001', '1', 'help', 'price', 'where', 'xyz', 'book_suv_001']
+
+
+def cpu_per_call(function, calls, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        function()
+        best = min(best, time.process_time() - start)
+    return round(best / calls * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--settings", default="backend.settings.test")
+    parser.add_argument("--rounds", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django(args.settings)
+    # Time the work, not the log handlers (the f-strings are still built)
+    logging.disable(logging.CRITICAL)
+
+    from backend.vemacars import whatsapp_cloud
+    from backend.vemacars.car_rental_bot import CarRentalBotService
+    from backend.vemacars.whatsapp_cloud import WhatsAppResponseService
+
+    bot = CarRentalBotService()
+    service = WhatsAppResponseService()
+    whatsapp_cloud.car_rental_bot_service = bot
+    footer = 'CarRental Pro - Your Premium Car Rental Service'
+
+    results = {}
+    if hasattr(bot, 'templates'):
+        car = bot.get_car_by_id('suv_001')
+        legacy = {
+            'welcome': lambda name: service.buttons_payload(
+                '2557', bot.generate_welcome_message(name), bot.get_main_menu_buttons(), None, footer),
+            'category_selection': lambda name: service.list_payload(
+                '2557', bot.generate_category_selection(name), 'Select Option', bot.get_category_list_items(),
+                None, 'CarRental Pro'),
+            'car_details': lambda name: service.buttons_payload(
+                '2557', bot.generate_car_details(car, name), bot.get_car_action_buttons(car['id']), None, footer),
+            'help': lambda name: service.buttons_payload(
+                '2557', bot.generate_help_message(name), bot.get_help_buttons(), None, footer),
+        }
+        compiled = {
+            'welcome': ('welcome',),
+            'category_selection': ('category_selection',),
+            'car_details': ('car_details', 'suv_001'),
+            'help': ('help',),
+        }
+
+        def compiled_reply(key):
+            def build(name):
+                reply = bot.templates.get(*key)
+                text = reply.render(customer_name=name)
+                if reply.interactive['type'] == 'list':
+                    return service.list_payload(
+                        '2557', text, 'Select Option', reply.list_items, None, 'CarRental Pro',
+                        action=reply.interactive['action'])
+                return service.buttons_payload(
+                    '2557', text, reply.buttons, None, footer, action=reply.interactive['action'])
+            return build
+
+        for reply, build in legacy.items():
+            fast = compiled_reply(compiled[reply])
+            assert fast('Asha') == build('Asha')
+            results[reply] = {
+                'before_us': cpu_per_call(lambda: [build('Asha') for _ in range(args.rounds * 10)], args.rounds * 10, args.repeat),
+                'after_us': cpu_per_call(lambda: [fast('Asha') for _ in range(args.rounds * 10)], args.rounds * 10, args.repeat),
+            }
+
+    def conversations():
+        for i in range(args.rounds):
+            for message in MESSAGES:
+                service.plan_reply({'from': f'2557{i % 50:08d}', 'message': message, 'name': 'Asha'})
+
+    def bot_only():
+        for i in range(args.rounds):
+            for message in MESSAGES:
+                bot.process_message(f'2557{i % 50:08d}', message, 'Asha')
+
+    calls = args.rounds * len(MESSAGES)
+    print(json.dumps({
+        "rounds": args.rounds,
+        "messages": MESSAGES,
+        "replies": results,
+        "end_to_end": {
+            "process_message_us": cpu_per_call(bot_only, calls, args.repeat),
+            "plan_reply_us": cpu_per_call(conversations, calls, args.repeat),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
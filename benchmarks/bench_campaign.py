@@ -0,0 +1,101 @@
+"""
+Benchmark: sending a WhatsApp campaign to N customers.
+
+    python benchmarks/bench_campaign.py --settings backend.settings.test --customers 5000 --latency-ms 150 --rate-limit 80
+
+Seeds N customers in a throwaway test database and starts stub_graph.py with
+the given latency and per-second limit. It then measures two things:
+
+- baseline: the old way, one WhatsAppResponseService.send_text_message
+  after another, on a sample of --baseline-sample numbers;
+- campaign: run_campaign() over the whole audience.
+
+It also counts the SQL queries the campaign makes. Prints JSON.
+"""
+import argparse
+import json
+import os
+import tempfile
+
+from stub_graph import start_stub
+from support import count_queries, setup_django, test_database, timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--settings", default="backend.settings.test")
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=int, default=150, help="Graph API stub latency.")
+    parser.add_argument("--rate-limit", type=int, default=80, help="Graph API messages per second.")
+    parser.add_argument("--baseline-sample", type=int, default=100)
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    server, url = start_stub(latency_ms=args.latency_ms, rate_limit=args.rate_limit)
+    os.environ.update({
+        "WHATSAPP_GRAPH_URL": url,
+        "WHATSAPP_ACCESS_TOKEN": "bench",
+        "WHATSAPP_PHONE_NUMBER_ID": "bench",
+        "WHATSAPP_RATE_LIMIT_DIR": tempfile.mkdtemp(prefix="bench-campaign-"),
+        "WHATSAPP_SEND_RATE": str(args.rate_limit),
+    })
+    setup_django(args.settings)
+
+    from django.conf import settings
+
+    # test settings pin their own temp dir; keep the bucket private to this run
+    settings.WHATSAPP_RATE_LIMIT_DIR = os.environ["WHATSAPP_RATE_LIMIT_DIR"]
+
+    from backend.api.models import Customer
+    from backend.vemacars.campaigns import run_campaign
+    from backend.vemacars.models import Campaign
+    from backend.vemacars.whatsapp_cloud import WhatsAppResponseService
+
+    with test_database():
+        with timer() as seed:
+            Customer.objects.bulk_create(
+                [
+                    Customer(
+                        name=f"Customer {i}", email=f"bench{i}@example.com",
+                        phone_number=f"2557{i:08d}", phone_key=f"2557{i:08d}",
+                    )
+                    for i in range(args.customers)
+                ],
+                batch_size=1000,
+            )
+
+        service = WhatsAppResponseService()
+        with timer() as baseline:
+            for i in range(args.baseline_sample):
+                service.send_text_message(f"2558{i:08d}", "Weekend offer")
+        baseline_rate = args.baseline_sample / baseline["seconds"]
+
+        campaign = Campaign.objects.create(name="Bench", message="Weekend offer", audience="customers")
+        with timer() as elapsed, count_queries() as queries:
+            counts = run_campaign(campaign, args.chunk_size, args.concurrency)
+        campaign.refresh_from_db()
+
+    server.shutdown()
+    print(json.dumps({
+        "customers": args.customers,
+        "graph_api": {"latency_ms": args.latency_ms, "rate_limit": args.rate_limit},
+        "seed_seconds": round(seed["seconds"], 2),
+        "baseline": {
+            "messages_per_second": round(baseline_rate, 1),
+            "projected_seconds": round(args.customers / baseline_rate, 1),
+        },
+        "campaign": {
+            "counts": counts,
+            "status": campaign.status,
+            "seconds": round(elapsed["seconds"], 1),
+            "messages_per_second": round(counts["sent"] / elapsed["seconds"], 1),
+            "queries": queries["queries"],
+            "chunk_size": args.chunk_size,
+            "concurrency": args.concurrency,
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark: cost of opening a DB connection per request vs reusing one.
+
+    python benchmarks/bench_connections.py --settings backend.settings.dev --iterations 2000
+
+Runs a one-row query repeatedly. The three modes are:
+
+- reconnect: close the connection before every query. This is what
+  CONN_MAX_AGE=0 does.
+- reused: keep the connection open.
+- health-checked: keep it open and ping it before each query. This is what
+  CONN_HEALTH_CHECKS does at the start of each request.
+
+The difference between reconnect and reused is the latency that persistent
+connections take off every request. Prints JSON.
+"""
+import argparse
+import json
+
+from support import setup_django, timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--settings", default="backend.settings.dev")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django(args.settings)
+    from django.db import connection
+
+    def query():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+
+    def reconnect():
+        connection.close()
+        query()
+
+    def health_checked():
+        connection.is_usable()
+        query()
+
+    query()  # warm up
+    report = {"database": connection.vendor, "iterations": args.iterations}
+    for name, step in (("reconnect", reconnect), ("reused", query), ("health_checked", health_checked)):
+        with timer() as elapsed:
+            for _ in range(args.iterations):
+                step()
+        report[f"{name}_ms"] = round(elapsed["seconds"] / args.iterations * 1000, 3)
+
+    report["saved_per_request_ms"] = round(report["reconnect_ms"] - report["health_checked_ms"], 3)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
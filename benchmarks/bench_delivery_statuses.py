@@ -0,0 +1,110 @@
+"""
+Benchmark: ingesting WhatsApp delivery status webhooks.
+
+    python benchmarks/bench_delivery_statuses.py --webhooks 5000
+
+Posts --webhooks status-only webhooks (sent, delivered, read for each message,
+as the Graph API does) to /webhooks/whatsapp/ through Django's test client,
+once per mode:
+
+- inline: WHATSAPP_STATUS_FLUSH_INTERVAL=0, one INSERT per webhook;
+- buffered: the default background writer, one bulk INSERT per batch.
+
+Reports per-webhook latency, queries run inside the request, and how long the
+writer takes to get every row into MessageStatus. It then times
+delivery_metrics() over the stored rows. Prints JSON.
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from support import count_queries, setup_django, test_database, timer
+
+
+def status_webhook(message_id, status, timestamp):
+    value = {'id': message_id, 'status': status, 'timestamp': str(timestamp), 'recipient_id': '255712000000'}
+    return {'object': 'whatsapp_business_account', 'entry': [{'changes': [{'value': {'statuses': [value]}}]}]}
+
+
+def run_mode(webhooks, client):
+    from backend.vemacars.delivery import status_writer
+    from backend.vemacars.models import MessageStatus
+
+    MessageStatus.objects.all().delete()
+    latencies = []
+    with count_queries() as queries, timer() as elapsed:
+        for payload in webhooks:
+            start = time.perf_counter()
+            response = client.post('/webhooks/whatsapp/', payload, content_type='application/json')
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.content
+    request_queries = queries["queries"]
+
+    # Wait for the writer thread to drain this worker's buffer
+    with timer() as drain:
+        while MessageStatus.objects.count() < len(webhooks):
+            time.sleep(0.01)
+
+    latencies.sort()
+    return {
+        "webhooks": len(webhooks),
+        "seconds": round(elapsed["seconds"], 2),
+        "webhooks_per_second": round(len(webhooks) / elapsed["seconds"]),
+        "mean_us": round(statistics.mean(latencies) * 1e6),
+        "p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6),
+        "queries_per_webhook": round(request_queries / len(webhooks), 3),
+        "rows_stored_after_s": round(drain["seconds"], 2),
+        "writer_pending": status_writer.pending,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--settings", default="backend.settings.test")
+    parser.add_argument("--webhooks", type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_django(args.settings)
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    if connection.vendor == "sqlite":
+        # A file, not :memory:, so the writer thread sees the same database
+        test_name = os.path.join(tempfile.gettempdir(), "vemacars-bench-statuses.sqlite3")
+        connection.settings_dict.setdefault("TEST", {})["NAME"] = test_name
+
+    start = 1767225600
+    webhooks = [
+        status_webhook(f"wamid.{i // 3}", ("sent", "delivered", "read")[i % 3], start + i)
+        for i in range(args.webhooks)
+    ]
+    report = {"database": connection.vendor, "modes": {}}
+    with test_database():
+        client = Client()
+        with override_settings(WHATSAPP_STATUS_FLUSH_INTERVAL=0):
+            report["modes"]["inline"] = run_mode(webhooks, client)
+        # Test settings turn buffering off; use the production defaults
+        with override_settings(WHATSAPP_STATUS_FLUSH_INTERVAL=1.0, WHATSAPP_STATUS_BATCH_SIZE=500):
+            report["modes"]["buffered"] = run_mode(webhooks, client)
+
+        from backend.vemacars.delivery import delivery_metrics
+
+        since = datetime.datetime.fromtimestamp(start, tz=datetime.timezone.utc)
+        with timer() as metrics_time, count_queries() as queries:
+            metrics = delivery_metrics(since)
+        report["metrics"] = {
+            "seconds": round(metrics_time["seconds"], 3),
+            "queries": queries["queries"],
+            "sent_to_delivered": metrics["sent_to_delivered"],
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: bulk import vs one serializer save per row.
+
+    python benchmarks/bench_import.py --rows 10000
+
+Compares the previous onboarding path (CustomerSerializer validation plus one
+INSERT per row, as POST /api/customers/ does) with
+backend.api.importers.import_rows (single validation pass, batch uniqueness
+check, chunked bulk_create in one transaction). Prints JSON.
+"""
+import argparse
+import json
+
+from support import count_queries, setup_django, test_database, timer
+
+
+def make_rows(count, prefix):
+    return [
+        {
+            "name": f"Customer {i}",
+            "email": f"{prefix}{i}@example.com",
+            "phone_number": f"+2557{i:08d}",
+            "address": f"Plot {i}, Dar es Salaam",
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--skip-baseline", action="store_true", help="Only time the bulk import.")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+
+    from backend.api.importers import import_rows
+    from backend.api.serializers import CustomerSerializer
+
+    report = {"rows": args.rows, "batch_size": args.batch_size, "database": None}
+    with test_database():
+        report["database"] = connection.vendor
+
+        if not args.skip_baseline:
+            rows = make_rows(args.rows, "single")
+            with count_queries() as counted, timer() as elapsed:
+                for row in rows:
+                    serializer = CustomerSerializer(data=row)
+                    serializer.is_valid(raise_exception=True)
+                    serializer.save()
+            report["per_row"] = {
+                "seconds": round(elapsed["seconds"], 3),
+                "rows_per_second": round(args.rows / elapsed["seconds"]),
+                "queries": counted["queries"],
+            }
+
+        rows = make_rows(args.rows, "bulk")
+        with count_queries() as counted, timer() as elapsed:
+            result = import_rows("customers", rows, batch_size=args.batch_size)
+        assert result["created"] == args.rows, result["errors"][:5]
+        report["bulk_import"] = {
+            "seconds": round(elapsed["seconds"], 3),
+            "rows_per_second": round(args.rows / elapsed["seconds"]),
+            "queries": counted["queries"],
+        }
+
+        if "per_row" in report:
+            report["speedup"] = round(report["per_row"]["seconds"] / report["bulk_import"]["seconds"], 1)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark: outbound WhatsApp throughput against a rate-limited Graph API.
+
+    python benchmarks/bench_send_rate.py --rate-limit 50 --messages 600 --processes 3 --threads 8
+
+Starts stub_graph.py with a per-second message limit. Several processes
+(standing in for gunicorn workers) then push a broadcast through
+WhatsAppResponseService as fast as they can. Meanwhile one thread sends a
+customer reply every 100 ms and records how long each reply takes.
+
+--no-limiter restores the old behaviour for comparison: no shared bucket
+and no retries. Throttled messages are simply lost.
+
+Prints JSON: messages delivered and lost, sustained msgs/s, how many
+attempts the stub throttled, and reply latency.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from stub_graph import start_stub
+from support import setup_django, timer
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000, 1)
+
+
+def send_many(phones, threads, priority, results):
+    from backend.vemacars.whatsapp_cloud import WhatsAppResponseService
+
+    service = WhatsAppResponseService()
+    chunks = [phones[i::threads] for i in range(threads)]
+
+    def run(chunk):
+        for phone in chunk:
+            results.put(service.send_text_message(phone, "Weekend offer: 20% off SUVs", priority=priority)["success"])
+
+    workers = [threading.Thread(target=run, args=(chunk,)) for chunk in chunks]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate-limit", type=int, default=50, help="Graph stub messages per second.")
+    parser.add_argument("--latency-ms", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=600, help="Broadcast size.")
+    parser.add_argument("--processes", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=8, help="Sending threads per process.")
+    parser.add_argument("--burst", type=int, default=0, help="WHATSAPP_SEND_BURST (default: rate / 4).")
+    parser.add_argument("--no-limiter", action="store_true")
+    args = parser.parse_args()
+
+    server, url = start_stub(latency_ms=args.latency_ms, rate_limit=args.rate_limit)
+    os.environ.update({
+        "WHATSAPP_GRAPH_URL": url,
+        "WHATSAPP_ACCESS_TOKEN": "bench",
+        "WHATSAPP_PHONE_NUMBER_ID": "bench",
+        "WHATSAPP_RATE_LIMIT_DIR": tempfile.mkdtemp(prefix="bench-send-rate-"),
+        "WHATSAPP_SEND_RATE": str(args.rate_limit),
+    })
+    if args.burst:
+        os.environ["WHATSAPP_SEND_BURST"] = str(args.burst)
+    if args.no_limiter:
+        os.environ.update({"WHATSAPP_SEND_RATE": "1000000", "WHATSAPP_SEND_RETRIES": "1"})
+    setup_django(os.environ.get("DJANGO_SETTINGS_MODULE", "backend.settings.test"))
+
+    from backend.vemacars.ratelimit import BROADCAST, REPLY
+    from backend.vemacars.whatsapp_cloud import WhatsAppResponseService
+
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    phones = [f"2557{i:08d}" for i in range(args.messages)]
+    processes = [
+        context.Process(target=send_many, args=(phones[i::args.processes], args.threads, BROADCAST, results))
+        for i in range(args.processes)
+    ]
+
+    reply_latencies, reply_failures = [], 0
+    done = threading.Event()
+
+    def replies():
+        nonlocal reply_failures
+        service = WhatsAppResponseService()
+        while not done.is_set():
+            start = time.perf_counter()
+            if service.send_text_message("255799999999", "Your booking is confirmed", priority=REPLY)["success"]:
+                reply_latencies.append(time.perf_counter() - start)
+            else:
+                reply_failures += 1
+            time.sleep(0.1)
+
+    with timer() as elapsed:
+        for process in processes:
+            process.start()
+        reply_thread = threading.Thread(target=replies)
+        reply_thread.start()
+        outcomes = [results.get() for _ in phones]
+        done.set()
+        for process in processes:
+            process.join()
+        reply_thread.join()
+    server.shutdown()
+
+    delivered = sum(outcomes)
+    handler = server.RequestHandlerClass
+    print(json.dumps({
+        "limiter": not args.no_limiter,
+        "graph_rate_limit": args.rate_limit,
+        "senders": f"{args.processes} processes x {args.threads} threads",
+        "broadcast": {
+            "messages": args.messages,
+            "delivered": delivered,
+            "lost": args.messages - delivered,
+            "seconds": round(elapsed["seconds"], 2),
+            "delivered_per_second": round(delivered / elapsed["seconds"], 1),
+        },
+        "graph_api": {"accepted": handler.sent_count, "throttled_attempts": handler.throttled_count},
+        "replies": {
+            "sent": len(reply_latencies),
+            "failed": reply_failures,
+            "p50_ms": percentile(reply_latencies, 50),
+            "p99_ms": percentile(reply_latencies, 99),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: reading a long WhatsApp conversation a page at a time.
+
+    python benchmarks/bench_transcripts.py --messages 50000 --other-messages 200000
+
+Seeds one customer with --messages transcript rows among --other-messages rows
+for other phones. It then walks the whole conversation twice, 50 rows a page,
+newest first:
+
+- keyset_api: following `next` links of /api/whatsapp/conversations/<phone>/;
+- keyset_orm: the query those pages run, without the HTTP/DRF overhead;
+- offset_orm: the same pages with LIMIT/OFFSET, for comparison.
+
+Reports the first, middle and last page times. Prints JSON.
+"""
+import argparse
+import datetime
+import json
+import os
+import tempfile
+
+from support import count_queries, setup_django, test_database, timer
+
+PAGE_SIZE = 50
+CUSTOMER = "255700000001"
+
+
+def seed(messages, other_messages):
+    from django.utils import timezone
+
+    from backend.vemacars.models import ConversationMessage
+
+    start = timezone.now() - datetime.timedelta(days=365)
+    total = messages + other_messages
+    # The customer's messages are spread evenly through the table
+    every = max(1, total // max(messages, 1))
+    rows = []
+    for i in range(total):
+        ours = i % every == 0 and i // every < messages
+        phone = CUSTOMER if ours else f"2556{i % 5000:08d}"
+        rows.append(ConversationMessage(
+            phone=phone, direction="in" if i % 2 else "out", kind="text",
+            body=f"Message {i}", created_at=start + datetime.timedelta(seconds=i),
+        ))
+        if len(rows) == 5000:
+            ConversationMessage.objects.bulk_create(rows)
+            rows = []
+    ConversationMessage.objects.bulk_create(rows)
+    return ConversationMessage.objects.filter(phone=CUSTOMER).count()
+
+
+def summary(times):
+    return {
+        "pages": len(times),
+        "first_ms": round(times[0] * 1000, 2),
+        "middle_ms": round(times[len(times) // 2] * 1000, 2),
+        "last_ms": round(times[-1] * 1000, 2),
+        "total_s": round(sum(times), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--settings", default="backend.settings.test")
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--other-messages", type=int, default=200000)
+    args = parser.parse_args()
+
+    setup_django(args.settings)
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from rest_framework.test import APIClient
+
+    from backend.api.middleware import ReplicaRoutingMiddleware
+    from backend.vemacars.models import ConversationMessage
+
+    if connection.vendor == "sqlite":
+        test_name = os.path.join(tempfile.gettempdir(), "vemacars-bench-transcripts.sqlite3")
+        connection.settings_dict.setdefault("TEST", {})["NAME"] = test_name
+
+    with test_database():
+        with timer() as seeding:
+            conversation = seed(args.messages, args.other_messages)
+
+        client = APIClient()
+        client.cookies[ReplicaRoutingMiddleware.cookie_name] = "1"
+        client.force_authenticate(User.objects.create_user("bench-staff", is_staff=True))
+
+        keyset, url, params = [], f"/api/whatsapp/conversations/{CUSTOMER}/", {"page_size": PAGE_SIZE}
+        client.get(url, params)  # warm-up: URL resolver, serializer setup
+        with count_queries() as queries:
+            while url:
+                with timer() as page:
+                    response = client.get(url, params)
+                keyset.append(page["seconds"])
+                url, params = response.data["next"], None
+        keyset_queries = queries["queries"]
+
+        messages = ConversationMessage.objects.filter(phone=CUSTOMER).order_by("-created_at", "-id")
+        keyset_orm, page_query = [], messages
+        while True:
+            with timer() as page:
+                rows = list(page_query[:PAGE_SIZE])
+            keyset_orm.append(page["seconds"])
+            if len(rows) < PAGE_SIZE:
+                break
+            # What CursorPagination does: a range on created_at (ties are
+            # skipped by offset), so the (phone, created_at) index seeks to it
+            page_query = messages.filter(created_at__lt=rows[-1].created_at)
+
+        offset = []
+        for start in range(0, conversation, PAGE_SIZE):
+            with timer() as page:
+                list(messages[start:start + PAGE_SIZE])
+            offset.append(page["seconds"])
+
+    print(json.dumps({
+        "database": connection.vendor,
+        "rows": args.messages + args.other_messages,
+        "conversation": conversation,
+        "seed_seconds": round(seeding["seconds"], 1),
+        "keyset_api": {**summary(keyset), "queries_per_page": round(keyset_queries / len(keyset), 2)},
+        "keyset_orm": summary(keyset_orm),
+        "offset_orm": summary(offset),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
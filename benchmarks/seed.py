@@ -0,0 +1,173 @@
+"""
+Seed a synthetic dataset for the API benchmarks.
+
+    python benchmarks/seed.py --cars 5000 --images-per-car 10 --bookings 1000000 --force
+
+Rows are written with chunked bulk_create and explicit primary keys, so the
+same code path works on SQLite and MySQL (which does not return ids from a
+multi-row INSERT). Booking reference codes and totals are computed here
+because bulk_create skips Model.save().
+
+Used by bench_api.py against a throwaway test database; the command line
+above writes into whatever database DJANGO_SETTINGS_MODULE points at, so it
+refuses to run without --force.
+"""
+import argparse
+import datetime
+import json
+import random
+from decimal import Decimal
+
+from support import setup_django, timer
+
+CHUNK_SIZE = 5000
+
+CAR_NAMES = ["Toyota RAV4", "Subaru Forester", "Toyota Alphard", "Nissan X-Trail", "Toyota Vitz", "Land Cruiser"]
+LOCATIONS = ["Dar es Salaam", "Arusha", "Mwanza", "Dodoma", "Zanzibar"]
+
+
+def next_id(model):
+    from django.db.models import Max
+
+    return (model.objects.aggregate(top=Max("pk"))["top"] or 0) + 1
+
+
+def chunks(total, size=CHUNK_SIZE):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def seed_dataset(cars=5000, images_per_car=10, customers=10000, bookings=100000, extras=5, seed=42):
+    """
+    Insert the dataset and return a dict of row counts and timings.
+    """
+    from django.db import transaction
+
+    from backend.api.models import Booking, BookingCustomerInfo, Car, CarImage, Customer, Extra
+
+    rng = random.Random(seed)
+    report = {}
+
+    with timer() as elapsed:
+        extra_rows = Extra.objects.bulk_create(
+            [Extra(id=next_id(Extra) + i, name=f"Extra {i}", price=Decimal(5 * (i + 1))) for i in range(extras)]
+        )
+
+        car_start = next_id(Car)
+        prices = {}
+        image_start = next_id(CarImage)
+        for start, size in chunks(cars):
+            batch = []
+            for i in range(start, start + size):
+                price = Decimal(rng.randrange(40, 250))
+                prices[car_start + i] = price
+                batch.append(Car(
+                    id=car_start + i,
+                    name=f"{rng.choice(CAR_NAMES)} #{i}",
+                    car_type=rng.choice(["SUV", "Sedan", "Hatchback"]),
+                    seats=rng.choice([4, 5, 7]),
+                    location=rng.choice(LOCATIONS),
+                    price_per_day=price,
+                    overview="Well maintained, insured and ready for long trips. " * 10,
+                ))
+            images = [
+                CarImage(
+                    id=image_start + (car.id - car_start) * images_per_car + j,
+                    car_id=car.id, image=f"cars/seed-{car.id}-{j}.jpg", is_primary=j == 0,
+                )
+                for car in batch for j in range(images_per_car)
+            ]
+            with transaction.atomic():
+                Car.objects.bulk_create(batch)
+                CarImage.objects.bulk_create(images, batch_size=CHUNK_SIZE)
+
+        customer_start = next_id(Customer)
+        for start, size in chunks(customers):
+            batch = [
+                Customer(
+                    id=customer_start + i, name=f"Customer {i}",
+                    email=f"seed{customer_start + i}@example.com", phone_number=f"+2557{customer_start + i:08d}",
+                )
+                for i in range(start, start + size)
+            ]
+            for customer in batch:
+                customer.refresh_keys()
+            Customer.objects.bulk_create(batch)
+
+        booking_start = next_id(Booking)
+        ExtraLink = Booking.extras.through
+        first_day = datetime.date(2024, 1, 1)
+        for start, size in chunks(bookings):
+            rows, infos, links = [], [], []
+            for i in range(start, start + size):
+                booking_id = booking_start + i
+                car_id = car_start + rng.randrange(cars)
+                customer_id = customer_start + rng.randrange(customers)
+                rental_start = first_day + datetime.timedelta(days=rng.randrange(730))
+                days = rng.randrange(1, 14)
+                chosen = rng.sample(extra_rows, rng.randrange(len(extra_rows) + 1))
+
+                rows.append(Booking(
+                    id=booking_id,
+                    car_id=car_id,
+                    status=rng.choice(["pending", "approved", "approved", "completed", "cancelled"]),
+                    rental_start=rental_start,
+                    rental_end=rental_start + datetime.timedelta(days=days),
+                    pickup_location=rng.choice(LOCATIONS),
+                    dropoff_location=rng.choice(LOCATIONS),
+                    reference_code=f"BOOK-{booking_id:08X}",
+                    total_price=prices[car_id] * days + sum(extra.price for extra in chosen),
+                ))
+                info = BookingCustomerInfo(
+                    booking_id=booking_id, customer_id=customer_id, full_name=f"Customer {customer_id}",
+                    email=f"seed{customer_id}@example.com", phone_number=f"+2557{customer_id:08d}",
+                )
+                info.refresh_keys()
+                infos.append(info)
+                links.extend(ExtraLink(booking_id=booking_id, extra_id=extra.id) for extra in chosen)
+
+            with transaction.atomic():
+                Booking.objects.bulk_create(rows)
+                BookingCustomerInfo.objects.bulk_create(infos)
+                ExtraLink.objects.bulk_create(links, batch_size=CHUNK_SIZE)
+
+    report.update({
+        "cars": cars,
+        "images": cars * images_per_car,
+        "customers": customers,
+        "bookings": bookings,
+        "extras": extras,
+        "seed_seconds": round(elapsed["seconds"], 1),
+    })
+    return report
+
+
+def add_dataset_arguments(parser):
+    parser.add_argument("--cars", type=int, default=5000)
+    parser.add_argument("--images-per-car", type=int, default=10)
+    parser.add_argument("--customers", type=int, default=10000)
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--extras", type=int, default=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument("--settings", default="backend.settings.dev")
+    parser.add_argument("--force", action="store_true", help="Really write into the configured database.")
+    args = parser.parse_args()
+
+    setup_django(args.settings)
+    from django.db import connection
+
+    target = f"{connection.vendor}:{connection.settings_dict['NAME']}"
+    if not args.force:
+        parser.error(f"refusing to seed {target} without --force")
+
+    report = seed_dataset(args.cars, args.images_per_car, args.customers, args.bookings, args.extras)
+    report["database"] = target
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
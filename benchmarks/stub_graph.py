@@ -0,0 +1,112 @@
+"""
+Stand-in for the WhatsApp Cloud (Graph) API so webhook benchmarks never
+reach Meta. Accepts POST /<phone_number_id>/messages and answers like the
+real endpoint, optionally after a fixed delay.
+
+    python benchmarks/stub_graph.py --port 9100 --latency-ms 80 [--rate-limit 80]
+
+With --rate-limit it enforces a per-second message limit like the Graph API
+throughput tiers, answering error 130429 once the limit is exceeded.
+
+Point the app at it with WHATSAPP_GRAPH_URL=http://127.0.0.1:9100 (plus any
+WHATSAPP_ACCESS_TOKEN / WHATSAPP_PHONE_NUMBER_ID values).
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class GraphStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY a
+    # keep-alive client (httpx) waits ~40 ms on delayed ACK for every reply
+    disable_nagle_algorithm = True
+    latency = 0.0
+    rate_limit = 0
+    counter = itertools.count(1)
+    window = [0, 0]  # [second, messages accepted in it]
+    window_lock = threading.Lock()
+    sent_count = 0
+    throttled_count = 0
+
+    def admit(self):
+        cls = type(self)
+        with self.window_lock:
+            second = int(time.time())
+            if self.window[0] != second:
+                self.window[:] = [second, 0]
+            if self.rate_limit and self.window[1] >= self.rate_limit:
+                cls.throttled_count += 1
+                return False
+            self.window[1] += 1
+            cls.sent_count += 1
+            return True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.latency:
+            time.sleep(self.latency)
+
+        if not self.admit():
+            return self.reply(400, {"error": {"code": 130429, "message": "Rate limit hit", "type": "OAuthException"}})
+        self.reply(200, {
+            "messaging_product": "whatsapp",
+            "contacts": [{"input": payload.get("to"), "wa_id": payload.get("to")}],
+            "messages": [{"id": f"wamid.stub{next(self.counter)}"}],
+        })
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections when hundreds of async
+    # conversations call the stub at once
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def start_stub(port=0, latency_ms=0, rate_limit=0):
+    """
+    Start the stub on a daemon thread; returns (server, base_url). The
+    handler class (server.RequestHandlerClass) counts sent_count and
+    throttled_count.
+    """
+    handler = type("Handler", (GraphStubHandler,), {
+        "latency": latency_ms / 1000, "rate_limit": rate_limit, "window": [0, 0],
+        "sent_count": 0, "throttled_count": 0,
+    })
+    server = StubServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--rate-limit", type=int, default=0, help="Messages per second before answering 130429.")
+    args = parser.parse_args()
+
+    server, url = start_stub(args.port, args.latency_ms, args.rate_limit)
+    print(f"Graph API stub listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
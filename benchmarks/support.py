@@ -0,0 +1,68 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+Benchmarks run against a throwaway test database created from whatever
+DJANGO_SETTINGS_MODULE points at, so they never touch real data.
+"""
+import contextlib
+import os
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django(settings_module="backend.settings.dev"):
+    sys.path.insert(0, str(REPO_ROOT))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+
+    import django
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database(keepdb=False):
+    """
+    Create (and afterwards destroy) test databases for every alias.
+    """
+    from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+@contextlib.contextmanager
+def timer():
+    """
+    Yields a dict whose 'seconds' key is filled in when the block exits.
+    """
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["seconds"] = time.perf_counter() - start
+
+
+@contextlib.contextmanager
+def count_queries(using="default"):
+    """
+    Count SQL statements with an execute wrapper (unlike CaptureQueriesContext
+    this has no 9000-query log limit). Yields a dict with a 'queries' key.
+    """
+    from django.db import connections
+
+    result = {"queries": 0}
+
+    def wrapper(execute, sql, params, many, context):
+        result["queries"] += 1
+        return execute(sql, params, many, context)
+
+    with connections[using].execute_wrapper(wrapper):
+        yield result
@@ -0,0 +1,77 @@
+"""
+Gunicorn configuration for production (used by the Shipfile run line).
+
+    gunicorn --config gunicorn.conf.py
+
+Everything is environment driven:
+
+    GUNICORN_BIND         address to bind (default 0.0.0.0:8000)
+    WEB_CONCURRENCY       worker processes (default 2 x cores + 1)
+    GUNICORN_THREADS      threads per worker; > 1 uses the gthread worker so
+                          requests blocked on MySQL or the Graph API don't
+                          hold a whole process (default 4)
+    GUNICORN_TIMEOUT      seconds before a silent worker is killed and
+                          restarted (default 30)
+    GUNICORN_PRELOAD      import the app once in the master before forking
+                          (default 1)
+    GUNICORN_MAX_REQUESTS recycle a worker after this many requests (default
+                          1000, jittered), bounding slow memory growth
+
+Workers share nothing in memory, so the Django cache must be shared:
+backend.settings.prod defaults to a FileBasedCache under /var/tmp (one host)
+and refuses to start on LocMemCache. Running more than one host requires
+CACHE_BACKEND/CACHE_LOCATION pointing at Redis or Memcached.
+
+Reloads: `kill -HUP <master>` restarts workers gracefully, letting in-flight
+requests finish within graceful_timeout. With preloading on, HUP re-forks the
+code already loaded in the master; to roll out new code without dropping
+connections send USR2 (new master), then TERM the old master once the new
+workers are up, or restart the service.
+"""
+import multiprocessing
+import os
+
+
+def env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+wsgi_app = "backend.wsgi:application"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+workers = env_int("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1)
+threads = env_int("GUNICORN_THREADS", 4)
+worker_class = "gthread" if threads > 1 else "sync"
+
+timeout = env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = env_int("GUNICORN_KEEPALIVE", 5)
+
+max_requests = env_int("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = max_requests // 10
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").lower() in ("1", "true", "yes")
+
+# Heartbeat files on tmpfs: a slow disk must not make workers look hung
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    server.log.info(
+        "Up to %d persistent DB connections (workers x threads); keep below MySQL max_connections",
+        workers * threads,
+    )
+
+
+def post_fork(server, worker):
+    # Connections opened while preloading belong to the master; never share
+    # a socket between processes
+    from django.db import connections
+
+    for connection in connections.all(initialized_only=True):
+        connection.close()